@@ -412,6 +412,35 @@ def create_app(test_config=None):
         JWT_CSRF_IN_COOKIES=True,                  # store CSRF token in a cookie
     )
 
+    # Seconds a worker may serve its cached /api/books payload before re-reading the catalog
+    app.config["CATALOG_CACHE_TTL"] = int(os.getenv("CATALOG_CACHE_TTL", 60))
+    # Seconds a user's cached profile is trusted before reloading it (0 = always reload);
+    # this also bounds how long a demoted or deleted user keeps API access via role_required
+    app.config["PRINCIPAL_CACHE_TTL"] = int(os.getenv("PRINCIPAL_CACHE_TTL", 30))
+    # Sell-through forecast: sales window looked at, and days of sales a reorder should cover
+    app.config["FORECAST_WINDOW_DAYS"] = int(os.getenv("FORECAST_WINDOW_DAYS", 90))
+    app.config["FORECAST_COVER_DAYS"] = int(os.getenv("FORECAST_COVER_DAYS", 60))
+    # Operation list page sizes (?limit= may ask for up to MAX_PAGE_SIZE)
+    app.config["OPERATIONS_PAGE_SIZE"] = int(os.getenv("OPERATIONS_PAGE_SIZE", 50))
+    app.config["ADMIN_HISTORY_PAGE_SIZE"] = int(os.getenv("ADMIN_HISTORY_PAGE_SIZE", 25))
+    app.config["MAX_PAGE_SIZE"] = int(os.getenv("MAX_PAGE_SIZE", 200))
+    # /api/admin/changes: entries per response by default, and at most
+    app.config["CHANGES_PAGE_SIZE"] = int(os.getenv("CHANGES_PAGE_SIZE", 1000))
+    app.config["CHANGES_MAX_PAGE_SIZE"] = int(os.getenv("CHANGES_MAX_PAGE_SIZE", 10000))
+    # ... and how long a change may wait for its transaction to commit (see services/changes.py)
+    app.config["CHANGES_SETTLE_SECONDS"] = int(os.getenv("CHANGES_SETTLE_SECONDS", 300))
+    # Background jobs: pool size, backlog limit, stuck-job detection, result files.
+    # JOBS_EAGER runs jobs inline when submitted (tests, debugging).
+    app.config["JOBS_MAX_WORKERS"] = int(os.getenv("JOBS_MAX_WORKERS", 2))
+    app.config["JOBS_MAX_QUEUED"] = int(os.getenv("JOBS_MAX_QUEUED", 20))
+    app.config["JOBS_STALE_AFTER"] = int(os.getenv("JOBS_STALE_AFTER", 600))
+    app.config["JOBS_HEARTBEAT_EVERY"] = float(os.getenv("JOBS_HEARTBEAT_EVERY", 60))
+    app.config["JOBS_MAX_ATTEMPTS"] = int(os.getenv("JOBS_MAX_ATTEMPTS", 3))
+    app.config["JOBS_RESULT_DIR"] = os.getenv("JOBS_RESULT_DIR", os.path.join(app.instance_path, "jobs"))
+    app.config["JOBS_EAGER"] = os.getenv("JOBS_EAGER", "0") == "1"
+    # JSON encoder for responses: auto (orjson if installed) | orjson | stdlib | flask
+    app.config["JSON_BACKEND"] = os.getenv("JSON_BACKEND", "auto")
+
     if test_config:
         app.config.update(test_config)
 
@@ -419,8 +448,26 @@ def create_app(test_config=None):
     migrate.init_app(app, db)
     jwt.init_app(app)
 
+    from .services.catalog import init_catalog_cache
+    from .utils.auth import init_principal_cache, init_principal_loader
+    from .utils.json_provider import init_json_provider
+    from .services.jobs import init_job_runner
+    init_catalog_cache(app)
+    init_principal_cache(app)
+    init_principal_loader(jwt)
+    init_json_provider(app)
+    init_job_runner(app)
+
     from .cli_seed import seed_command
+    from .cli_stock import rebuild_stock_command, checkpoint_stock_command
+    from .cli_analytics import backfill_rollup_command, forecast_command
+    from .cli_import import import_sheets_command
     app.cli.add_command(seed_command)
+    app.cli.add_command(rebuild_stock_command)
+    app.cli.add_command(checkpoint_stock_command)
+    app.cli.add_command(backfill_rollup_command)
+    app.cli.add_command(forecast_command)
+    app.cli.add_command(import_sheets_command)
 
     register_error_handler(app)
 
@@ -429,18 +476,15 @@ def create_app(test_config=None):
         g.correlation_id = uuid.uuid4() 
         g.request_id = request.headers.get('X-Request-ID', str(uuid.uuid4()))
         g._t0 = time.time()
+        app.extensions["jobs"].recover_once()  # first request only: pick up jobs a dead process left behind
 
     @app.after_request
-    @jwt_required(optional=True)
     def access_log(resp):
-        # from app.routes.main import current_user
-        # cu = current_user()
-
-        try:
-            # No DB query here — just read identity from JWT
-            user_id = get_jwt_identity()  # usually str/int, or None
-        except Exception:
-            user_id = None
+        # No DB query nor token decoding here: reuse the identity the view
+        # already verified, if any
+        from app.utils.auth import current_principal
+        principal = current_principal(optional=True)
+        user_id = principal.id if principal else None
 
         t1 = time.time()
         duration = int((t1 - g._t0) * 1000)  # in ms
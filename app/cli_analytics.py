@@ -0,0 +1,43 @@
+# app/cli_analytics.py
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from .extensions import db
+from .services.forecast import compute_suggestions
+from .services.ledger import rebuild_sales_rollup
+
+
+@click.command("backfill-rollup")
+@click.option("--from", "start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="First day to rebuild (YYYY-MM-DD). Defaults to the beginning of the ledger.")
+@click.option("--to", "end", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Last day to rebuild (YYYY-MM-DD). Defaults to today.")
+@with_appcontext
+def backfill_rollup_command(start, end):
+    """Rebuild sales_daily_rollup from the ledger. Usage: `flask backfill-rollup [--from DATE] [--to DATE]`"""
+    try:
+        count = rebuild_sales_rollup(start.date() if start else None, end.date() if end else None)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        click.echo(f"❌ Backfill failed: {exc}")
+        raise
+    click.echo(f"✅ {count} rollup row(s) written.")
+
+
+@click.command("forecast")
+@click.option("--window", type=int, default=None, help="Days of sales history to use (default: FORECAST_WINDOW_DAYS).")
+@click.option("--cover", type=int, default=None, help="Days of sales a reorder should cover (default: FORECAST_COVER_DAYS).")
+@with_appcontext
+def forecast_command(window, cover):
+    """Recompute reorder suggestions for every customer. Usage: `flask forecast [--window N] [--cover N]`"""
+    window = window or current_app.config["FORECAST_WINDOW_DAYS"]
+    cover = cover or current_app.config["FORECAST_COVER_DAYS"]
+    try:
+        count = compute_suggestions(window_days=window, cover_days=cover)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        click.echo(f"❌ Forecast failed: {exc}")
+        raise
+    click.echo(f"✅ {count} suggestion(s) computed ({window}-day window, {cover}-day cover).")
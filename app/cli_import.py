@@ -0,0 +1,40 @@
+# app/cli_import.py
+import time
+import click
+from flask.cli import with_appcontext
+from .extensions import db
+from .services.sheets_import import import_sheets
+
+
+@click.command("import-sheets")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--dry-run", is_flag=True, default=False, help="Parse and report, but roll everything back.")
+@click.option("--max-errors", type=int, default=50, help="Error lines to print (all are counted).")
+@with_appcontext
+def import_sheets_command(paths, dry_run, max_errors):
+    """Import legacy Google Sheets CSV exports. Usage: `flask import-sheets [--dry-run] FILE...`
+
+    Expected columns: partner,date,type,title,quantity[,ref] (see app/services/sheets_import.py).
+    """
+    t0 = time.perf_counter()
+    try:
+        result = import_sheets(paths)
+    except Exception as exc:
+        db.session.rollback()
+        click.echo(f"❌ Import failed: {exc}")
+        raise
+
+    for error in result.errors[:max_errors]:
+        click.echo(f"  {error.file}:{error.line}: {error.message}")
+    if len(result.errors) > max_errors:
+        click.echo(f"  … and {len(result.errors) - max_errors} more")
+
+    summary = (f"{result.operations} operation(s), {result.items} item(s) from {len(paths)} file(s) "
+               f"in {time.perf_counter() - t0:.1f}s; {result.skipped} already imported, "
+               f"{len(result.errors)} line(s) rejected")
+    if dry_run:
+        db.session.rollback()
+        click.echo(f"🔎 Dry run: {summary} (nothing written).")
+        return
+    db.session.commit()
+    click.echo(f"{'⚠️ ' if result.errors else '✅'} Imported {summary}.")
@@ -1,11 +1,15 @@
 # app/cli_seed.py
 import json
+import time
 from datetime import datetime
 import click
 from werkzeug.security import generate_password_hash
 from flask.cli import with_appcontext
 from .extensions import db
 from .models import User, Book, Operation, OperationItem  # adjust import
+from .services.ledger import rebuild_customer_stock, rebuild_sales_rollup
+from .services.workflow import rebuild_customer_workflow
+from .services.synthetic import generate
 
 # ---------- helpers ----------
 def upsert_user(email, name, role, raw_password=None):
@@ -66,13 +70,14 @@ def create_operation(op_dict, user_map, book_map):
         status=normalized_status,
         created_at=created_at,
         date=created_at.date() if created_at else None,
+        # Items inserted with the operation, so its totals and their prices are set on insert
+        items=[
+            OperationItem(book_id=book_map[it["book_id"]].id, quantity=it["qty"])
+            for it in op_dict.get("items", [])
+        ],
     )
     db.session.add(op)
-    db.session.flush()  # ensure op.id exists for items
-
-    for it in op_dict.get("items", []):
-        book = book_map[it["book_id"]]
-        db.session.add(OperationItem(operation_id=op.id, book_id=book.id, quantity=it["qty"]))
+    db.session.flush()
 
     return op
 
@@ -132,18 +137,52 @@ def _load_seed_dict(seed_dict):
     for op in seed_dict.get("operations", []):
         create_operation(op, user_map=user_map, book_map=book_map)
 
+    # 4) Derived tables (stock balances, daily rollup, workflow state)
+    rebuild_customer_stock()
+    rebuild_sales_rollup()
+    rebuild_customer_workflow()
+
 @click.command("seed")
 @click.option("--from-json", "json_path", type=click.Path(exists=True, dir_okay=False), default=None,
               help="Optional path to a JSON seed file (otherwise uses built-in fixture).")
 @click.option("--reset/--no-reset", default=False, help="DEV ONLY: drop+create tables before seeding.")
+@click.option("--synthetic", is_flag=True, default=False, help="Generate a large synthetic dataset instead.")
+@click.option("--partners", type=int, default=20, show_default=True, help="[synthetic] Partner accounts.")
+@click.option("--titles", type=int, default=50, show_default=True, help="[synthetic] Books in the catalog.")
+@click.option("--series", type=int, default=5, show_default=True, help="[synthetic] Book series.")
+@click.option("--years", type=float, default=2, show_default=True, help="[synthetic] Years of history.")
+@click.option("--orders-per-month", type=float, default=2, show_default=True, help="[synthetic] Orders per partner and month.")
+@click.option("--random-seed", type=int, default=42, show_default=True, help="[synthetic] Same value, same dataset.")
+@click.option("--end-date", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="[synthetic] Last day of history (YYYY-MM-DD). Defaults to today.")
 @with_appcontext
-def seed_command(json_path, reset):
-    """Idempotent seed command. Usage: `flask seed [--reset] [--from-json path]`"""
+def seed_command(json_path, reset, synthetic, partners, titles, series, years, orders_per_month, random_seed, end_date):
+    """Idempotent seed command. Usage: `flask seed [--reset] [--from-json path]`
+
+    `flask seed --synthetic [--partners N --titles N --series N --years N --orders-per-month N]`
+    adds a large generated dataset (partners log in with password "synthetic").
+    """
     if reset:
         click.echo("⚠️  DEV RESET: dropping and recreating all tables…")
         db.drop_all()
         db.create_all()
 
+    if synthetic:
+        t0 = time.perf_counter()
+        try:
+            counts = generate(partners=partners, titles=titles, series=series, years=years,
+                              orders_per_month=orders_per_month, seed=random_seed,
+                              end=end_date.date() if end_date else None)
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            click.echo(f"❌ Synthetic seed failed: {exc}")
+            raise
+        click.echo(f"✅ Synthetic dataset: {counts['partners']} partner(s), {counts['books']} book(s), "
+                   f"{counts['operations']} operation(s), {counts['items']} item line(s) "
+                   f"in {time.perf_counter() - t0:.1f}s.")
+        return
+
     seed_data = SEED_FIXTURE
     if json_path:
         click.echo(f"Loading seed from {json_path} …")
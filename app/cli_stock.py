@@ -0,0 +1,47 @@
+# app/cli_stock.py
+from datetime import date, timedelta
+import click
+from flask.cli import with_appcontext
+from .extensions import db
+from .services.ledger import rebuild_customer_stock, write_checkpoints
+
+
+@click.command("rebuild-stock")
+@click.option("--dry-run", is_flag=True, default=False, help="Only report drift, don't rewrite customer_stock.")
+@with_appcontext
+def rebuild_stock_command(dry_run):
+    """Rebuild customer_stock from the raw ledger. Usage: `flask rebuild-stock [--dry-run]`"""
+    drift = rebuild_customer_stock()
+    for customer_id, book_id, stored, expected in drift:
+        click.echo(f"  /u/{customer_id}/ book {book_id}: stored={stored} ledger={expected}")
+
+    if dry_run:
+        db.session.rollback()
+        click.echo(f"🔎 {len(drift)} drifted balance(s) found (dry run, nothing written).")
+        return
+
+    db.session.commit()
+    if drift:
+        click.echo(f"⚠️  Fixed {len(drift)} drifted balance(s).")
+    else:
+        click.echo("✅ customer_stock matches the ledger.")
+
+
+@click.command("checkpoint-stock")
+@click.option("--as-of", "as_of", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Snapshot date (YYYY-MM-DD). Defaults to yesterday.")
+@with_appcontext
+def checkpoint_stock_command(as_of):
+    """Write inventory checkpoints for every customer. Usage: `flask checkpoint-stock [--as-of YYYY-MM-DD]`
+
+    Meant to run from a scheduler (e.g. nightly cron, or at quarter end).
+    """
+    as_of = as_of.date() if as_of else date.today() - timedelta(days=1)
+    try:
+        count = write_checkpoints(as_of)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        click.echo(f"❌ Checkpoint failed: {exc}")
+        raise
+    click.echo(f"✅ {count} checkpoint row(s) written as of {as_of.isoformat()}.")
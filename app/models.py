@@ -1,8 +1,9 @@
 from app.extensions import db
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import func, and_, or_
+from sqlalchemy import text
 from datetime import date, datetime
-from sqlalchemy import event
+from decimal import Decimal
+from sqlalchemy import event, insert, inspect, select, update
 
 # def inventory(customer_id=None, book_id=None):
 #     if not customer_id and not book_id:
@@ -65,6 +66,9 @@ class User(BaseModel):
     store_name = db.Column(db.String(30))
     address = db.Column(db.String(120))
     phone = db.Column(db.String(20))
+    # Bumped whenever one of the customer's operations is created or changes
+    # state (see listeners below); used as the ETag of ledger-backed reads.
+    ledger_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     operations = db.relationship("Operation", backref="customer")
 
@@ -80,20 +84,8 @@ class User(BaseModel):
         return check_password_hash(self.password_hash, password)
     
     def count_books(self, book_id):
-        total = (
-            db.session.query(func.coalesce(func.sum(OperationItem.quantity), 0))
-            .join(Operation)
-            .filter(Operation.customer_id == self.id)
-            .filter(OperationItem.book_id == book_id)
-            .filter(
-                or_(
-                    and_(Operation.type == 'order', Operation.status == 'delivered'),
-                    (Operation.type == 'report')
-                )
-            )
-            .scalar()
-        )
-        return total
+        stock = db.session.get(CustomerStock, (self.id, book_id))
+        return stock.quantity if stock else 0
     
     def __repr__(self):
         return f"/u/{self.id}/ for {self.name}"
@@ -109,8 +101,13 @@ class Operation(db.Model):
     type = db.Column(db.String(10), nullable=False, default="order")  # 'order' | 'report'
     status = db.Column(db.String(12), nullable=True, default="pending")  # orders: pending|approved|delivered|cancelled; reports: recorded
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # Ledger day: the creation day, then the delivery day once an order is delivered
     date = db.Column(db.Date, nullable=False, default=date.today)
     notes = db.Column(db.Text, nullable=True)
+    # Totals of the items, signed like them (negative for reports); set at creation
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    total_quantity = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(10, 2), nullable=False, default=0)
 
     # relationships
     # customer = db.relationship("User", backref="operations")
@@ -120,6 +117,19 @@ class Operation(db.Model):
         cascade="all, delete-orphan"
     )
 
+    # Hot access paths: per-customer timelines (optionally by type) sorted by
+    # (created_at, id), the admin board's actionable orders and global history.
+    __table_args__ = (
+        db.Index('ix_operation_customer_created', 'customer_id', 'created_at', 'id'),
+        db.Index('ix_operation_customer_type_created', 'customer_id', 'type', 'created_at', 'id'),
+        db.Index('ix_operation_created', 'created_at', 'id'),
+        db.Index(
+            'ix_operation_actionable', 'created_at', 'id',
+            postgresql_where=text("type = 'order' AND status IN ('pending', 'approved')"),
+            sqlite_where=text("type = 'order' AND status IN ('pending', 'approved')"),
+        ),
+    )
+
     def __repr__(self):
         details = ''
         for item in self.items:
@@ -137,6 +147,84 @@ def _set_operation_dates(mapper, connection, target):
         target.date = target.created_at.date()
 
 
+def operation_totals(lines):
+    """item_count/total_quantity/total_amount of an operation's (quantity, unit_price) lines."""
+    lines = list(lines)
+    return {
+        "item_count": len(lines),
+        "total_quantity": sum(quantity for quantity, _ in lines),
+        "total_amount": sum((quantity * Decimal(str(price)) for quantity, price in lines), Decimal(0)),
+    }
+
+
+@event.listens_for(Operation, "before_insert")
+def _set_operation_totals(mapper, connection, target):
+    # Operations built by the schemas arrive complete; for the others, items
+    # get the current catalog price and the totals follow from them
+    unpriced = [item for item in target.items if item.unit_price_at_time is None]
+    if unpriced:
+        # Use the books already at hand (no lazy load mid-flush), query the others' prices
+        books = [inspect(item).dict.get("book") for item in unpriced]
+        missing = {item.book_id for item, book in zip(unpriced, books) if book is None}
+        prices = dict(connection.execute(select(Book.id, Book.unit_price).where(Book.id.in_(missing))).all()) if missing else {}
+        for item, book in zip(unpriced, books):
+            item.unit_price_at_time = book.unit_price if book is not None else prices[item.book_id]
+    if target.item_count is None:
+        for key, value in operation_totals((item.quantity, item.unit_price_at_time) for item in target.items).items():
+            setattr(target, key, value)
+
+
+def bump_ledger_versions(connection, customer_ids):
+    """Increment ``user.ledger_version`` for the given customers on ``connection``."""
+    customer_ids = set(customer_ids)
+    if customer_ids:
+        users = User.__table__
+        connection.execute(
+            update(users)
+            .where(users.c.id.in_(customer_ids))
+            .values(ledger_version=users.c.ledger_version + 1)
+        )
+
+
+@event.listens_for(Operation, "after_insert")
+@event.listens_for(Operation, "after_delete")
+def _bump_ledger_version(mapper, connection, target):
+    bump_ledger_versions(connection, [target.customer_id])
+
+
+@event.listens_for(Operation, "after_update")
+def _bump_ledger_version_on_state_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ("type", "status", "customer_id", "date")):
+        bump_ledger_versions(connection, [target.customer_id])
+
+
+@event.listens_for(Operation, "after_insert")
+def _track_customer_workflow(mapper, connection, target):
+    # A new order becomes the customer's last one; a report counts as filed since it
+    if target.type == "report":
+        values = {"reported_since": True}
+    elif target.status in LIVE_ORDER_STATUSES:
+        values = {"last_order_id": target.id, "last_order_status": target.status, "reported_since": False}
+    else:
+        return
+    workflow = CustomerWorkflow.__table__
+    connection.execute(update(workflow).where(workflow.c.customer_id == target.customer_id).values(**values))
+
+
+@event.listens_for(User, "after_insert")
+def _create_customer_workflow(mapper, connection, target):
+    if target.role == "customer":
+        connection.execute(insert(CustomerWorkflow.__table__).values(customer_id=target.id, reported_since=False))
+
+
+@event.listens_for(User, "before_update")
+def _bump_ledger_version_on_rename(mapper, connection, target):
+    # The customer's name is part of the inventory/stats payloads
+    if inspect(target).attrs.name.history.has_changes():
+        target.ledger_version = User.ledger_version + 1
+
+
 class OperationItem(db.Model):
     __tablename__ = "operation_item"
 
@@ -144,12 +232,18 @@ class OperationItem(db.Model):
     operation_id = db.Column(db.Integer, db.ForeignKey("operation.id"), nullable=False)
     book_id = db.Column(db.Integer, db.ForeignKey("book.id"), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    # unit_price_at_time = db.Column(db.Numeric(5, 2), nullable=False)
+    unit_price_at_time = db.Column(db.Numeric(5, 2), nullable=False)  # the book's price when the operation was created
 
     # relationships
     operation = db.relationship("Operation", back_populates="items")
     book = db.relationship("Book")
 
+    # Covering indexes: items by operation (joins) and by book (per-title sums)
+    __table_args__ = (
+        db.Index('ix_operation_item_operation', 'operation_id', 'book_id', 'quantity'),
+        db.Index('ix_operation_item_book', 'book_id', 'operation_id', 'quantity'),
+    )
+
     def __repr__(self):
         if self.quantity > 0:
             return f"{self.quantity}x {self.book.title}\n"
@@ -158,3 +252,197 @@ class OperationItem(db.Model):
     
     def __str__(self):
         return f"{self.quantity} | {self.book.title}"
+
+
+
+class CustomerStock(db.Model):
+    """Materialized stock balance per (customer, book).
+
+    Kept in step with the ledger by ``app.services.ledger`` in the same
+    transaction as the workflow transition; ``flask rebuild-stock`` recomputes
+    it from the raw operations.
+    """
+    __tablename__ = "customer_stock"
+
+    customer_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+
+    book = db.relationship("Book")
+
+    def __repr__(self):
+        return f"{self.quantity} | {self.book_id} @ /u/{self.customer_id}/"
+
+
+# Orders that count for admission: the latest of them is the customer's last order
+LIVE_ORDER_STATUSES = ("pending", "approved", "delivered")
+
+
+class CustomerWorkflow(db.Model):
+    """Where a customer stands in the order/report cycle.
+
+    Holds the last order not cancelled, its status, and whether a sales
+    report was filed since. New orders are admitted with one conditional
+    update of this row (``app.services.workflow``); it is kept in step in the
+    same transaction as each operation and rebuilt from the raw operations
+    by ``rebuild_customer_workflow``.
+    """
+    __tablename__ = "customer_workflow"
+
+    customer_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    last_order_id = db.Column(db.Integer, nullable=True)  # NULL: no order yet
+    last_order_status = db.Column(db.String(12), nullable=True)
+    reported_since = db.Column(db.Boolean, nullable=False, default=False)
+
+
+class InventoryCheckpoint(db.Model):
+    """Snapshot of a customer's ledger totals per book at the end of ``as_of_date``.
+
+    Written by ``flask checkpoint-stock``; as-of queries start from the latest
+    checkpoint and only replay the operations dated after it.
+    """
+    __tablename__ = "inventory_checkpoint"
+
+    customer_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), primary_key=True)
+    as_of_date = db.Column(db.Date, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    delivered_qty = db.Column(db.Integer, nullable=False, default=0)
+    sold_qty = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_inventory_checkpoint_customer_date', 'customer_id', 'as_of_date'),
+    )
+
+
+class SalesDailyRollup(db.Model):
+    """Per-day sales/delivery totals for one (customer, book).
+
+    Maintained by ``app.services.ledger`` alongside ``customer_stock``;
+    ``flask backfill-rollup`` rebuilds it from the raw ledger.
+    """
+    __tablename__ = "sales_daily_rollup"
+
+    date = db.Column(db.Date, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), primary_key=True)
+    sold_qty = db.Column(db.Integer, nullable=False, default=0)
+    delivered_qty = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(10, 2), nullable=False, default=0)
+
+
+class ReorderSuggestion(db.Model):
+    """Cached sell-through forecast for one (customer, book), written by ``flask forecast``."""
+    __tablename__ = "reorder_suggestion"
+
+    customer_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), primary_key=True)
+    stock = db.Column(db.Integer, nullable=False)
+    sold_qty = db.Column(db.Integer, nullable=False)  # sold during the window
+    velocity = db.Column(db.Float, nullable=False)  # books sold per day
+    days_of_cover = db.Column(db.Float, nullable=True)  # NULL when nothing sold
+    suggested_qty = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+
+class Job(db.Model):
+    """Background admin task (export, backfill, rebuild...) run by ``app.services.jobs``.
+
+    The table is the queue: workers claim ``queued`` rows with a conditional
+    UPDATE, so each job runs once even with several app processes.
+    """
+    __tablename__ = "job"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False)
+    params = db.Column(db.JSON, nullable=True)
+    status = db.Column(db.String(10), nullable=False, default="queued")  # queued|running|done|failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # percent
+    result = db.Column(db.JSON, nullable=True)  # short summary, e.g. {"rows": 1234}
+    result_path = db.Column(db.String(255), nullable=True)  # file to download, if any
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # last progress report while running
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_job_status_created', 'status', 'created_at'),
+    )
+
+class ChangeLog(db.Model):
+    """Append-only feed of row changes, read by ``/api/admin/changes``.
+
+    Written in the same transaction as the change by the mapper listeners
+    below; Core bulk paths call ``log_changes`` themselves.
+    """
+    __tablename__ = "change_log"
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(30), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(6), nullable=False)  # insert | update | delete
+    data = db.Column(db.JSON, nullable=True)  # row after the change; changed columns only for updates
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# Columns never copied to the change feed
+CHANGE_LOG_EXCLUDE = {"password_hash", "ledger_version"}
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def log_changes(connection, table_name, op, rows):
+    """Append ``rows`` (dicts with an ``id``) to the change log on ``connection``."""
+    now = datetime.utcnow()
+    entries = [
+        {
+            "table_name": table_name, "row_id": row["id"], "op": op, "changed_at": now,
+            "data": {k: _json_value(v) for k, v in row.items() if k not in CHANGE_LOG_EXCLUDE},
+        }
+        for row in rows
+    ]
+    if entries:
+        connection.execute(insert(ChangeLog.__table__), entries)
+
+
+def _row(mapper, target, keys=None):
+    return {
+        attr.key: getattr(target, attr.key)
+        for attr in mapper.column_attrs
+        if attr.key not in CHANGE_LOG_EXCLUDE and (keys is None or attr.key in keys or attr.key == "id")
+    }
+
+
+def _log_insert(mapper, connection, target):
+    log_changes(connection, mapper.local_table.name, "insert", [_row(mapper, target)])
+
+
+def _log_update(mapper, connection, target):
+    state = inspect(target)
+    changed = {
+        attr.key for attr in mapper.column_attrs
+        if attr.key not in CHANGE_LOG_EXCLUDE and state.attrs[attr.key].history.has_changes()
+    }
+    if changed:
+        log_changes(connection, mapper.local_table.name, "update", [_row(mapper, target, changed)])
+
+
+def _log_delete(mapper, connection, target):
+    log_changes(connection, mapper.local_table.name, "delete", [{"id": target.id}])
+
+
+for _model in (Operation, OperationItem, Book, User):
+    event.listen(_model, "after_insert", _log_insert)
+    event.listen(_model, "after_update", _log_update)
+    event.listen(_model, "after_delete", _log_delete)
+
@@ -1,72 +1,99 @@
-import io
-import csv
-from flask import Blueprint, request, jsonify, Response
-from flask_jwt_extended import jwt_required 
-from sqlalchemy import case, desc, or_, and_
-from app.models import Operation, OperationItem, Book, User, db
-from app.schemas import BookSchema, OperationCancelSchema, OperationSchema
+from flask import Blueprint, request, jsonify, Response, send_file, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import case, desc, or_, and_, select
+from app.models import Job, Operation, db
+from app.schemas import BookSchema, BulkOrderSchema, JobCreateSchema, JobSchema, OperationCancelSchema, OperationSchema
+from app.services.changes import change_feed
+from app.services.export import LEVELS, csv_chunks, export_statement, gzip_chunks
+from app.services.forecast import list_suggestions
+from app.services.jobs import enqueue
+from app.services.orders import BULK_ACTIONS, bulk_transition
+from app.services.transitions import order_infos, transition
+from app.services.read_models import dump_operations, operation_page, operation_rows
+from app.services.stats import BUCKETS, GROUPS, customer_stats, inventory_matrix, sales_timeseries
 from app.utils.decorators import role_required
-from app.utils.helpers import error_response
+from app.utils.helpers import error_response, cursor_arg, date_arg, limit_arg, flag_arg
 from app import log_event
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/api/admin")
 
+# Status the admin saw -> the confirm step it calls for
+CONFIRM_ACTIONS = {"pending": "approve", "approved": "deliver"}
+
 @admin_bp.route("/orders/<int:order_id>/confirm", methods=["PUT"])
 @jwt_required()
 @role_required("admin")
 def confirm_order(order_id: int):
     """
-    Admin confirm order
+    Admin confirm order, one step: pending -> approved, approved -> delivered.
+    With {"expected_status": "..."} (the status the admin saw) the step is the
+    one from that status, and a 409 tells the order moved meanwhile. Without
+    it, the step is the one from the current status.
     """
-    order = Operation.query.get(order_id)
-    if not order or order.type != 'order' or order.status not in ('pending', 'approved'):
+    body = request.get_json(silent=True) or {}
+    if "expected_status" in body:
+        expected = body["expected_status"]
+        if expected not in CONFIRM_ACTIONS:
+            return error_response("expected_status must be pending or approved", 400, "expected_status")
+    else:
+        expected = db.session.scalar(
+            select(Operation.status).where(Operation.id == order_id, Operation.type == "order")
+        )
+        if expected not in CONFIRM_ACTIONS:
+            return error_response("Order not found or not pending/approved", 404, "order")
+    done = transition(order_id, CONFIRM_ACTIONS[expected])
+    if done.action is None:
+        if done.type == "order" and done.status in CONFIRM_ACTIONS:
+            return error_response(f"Order is {done.status} now, reload and try again", 409, "order")
         return error_response("Order not found or not pending/approved", 404, "order")
+    db.session.commit()
+
+    order = order_infos([order_id])[order_id]
+    event, msg = ("order approved", "Order approved") if done.action == "approve" else ("order delivered", "Order delivered")
+    log_event(event, order_id=order.id, customer_id=order.customer_id, customer=order.email, books_count=order.books_count)
+    return jsonify({"msg": msg}), 200
 
-    if order.status == "pending":
-        order.status = "approved"
-        db.session.commit()
-        log_event(
-            "order approved",
-            order_id=order.id,
-            customer_id=order.customer.id,
-            customer=order.customer.email,
-            books_count=sum(item.quantity for item in order.items)
-        )
-        return jsonify({"msg": "Order approved"}), 200
 
-    order.status = "delivered"
-    order.type = 'order'
+@admin_bp.route("/orders/bulk", methods=["POST"])
+@jwt_required()
+@role_required("admin")
+def bulk_orders():
+    """
+    Approve, deliver or cancel many orders at once: {"ids": [...], "action": "approve"|"deliver"|"cancel", "notes": "..."}.
+    Returns one outcome per id: the new status, or why the order was left alone.
+    """
+    data = BulkOrderSchema().load(request.get_json(silent=True) or {})
+    outcomes, moved = bulk_transition(data["ids"], data["action"], data["notes"])
     db.session.commit()
-    log_event(
-        "order delivered",
-        order_id=order.id,
-        customer_id=order.customer.id,
-        customer=order.customer.email,
-        books_count=sum(item.quantity for item in order.items)
-    )
-    return jsonify({"msg": "Order delivered"}), 200
+
+    event = BULK_ACTIONS[data["action"]].event
+    for order in moved:
+        log_event(event, order_id=order.id, customer_id=order.customer_id, customer=order.email,
+                  books_count=order.books_count, bulk=True)
+    return {
+        "action": data["action"],
+        "updated": len(moved),
+        "results": [{"id": id, "outcome": outcome} for id, outcome in outcomes.items()],
+    }, 200
 
 
 @admin_bp.route("/operations/<int:operation_id>", methods=["DELETE"])
 @jwt_required()
 @role_required("admin")
 def delete_operation(operation_id):
-    op = Operation.query.get(operation_id)
-    if not op:
-        return error_response("Order or Report not found", 404, "operation")    
-    if (op.type == 'order' and op.status != 'cancelled'):
-        payload = request.get_json(silent=True) or {}
-        note = (payload.get("notes") or "").strip()
-        op.status = "cancelled"
-        if note:
-            op.notes = note
-        db.session.commit()
-        return OperationSchema().dump(op), 200
-    
-    if op.type == 'report':
-        db.session.delete(op)
-        db.session.commit()
+    """
+    Cancel an order (taking a delivered one back out of the stock) or delete a report.
+    """
+    note = ((request.get_json(silent=True) or {}).get("notes") or "").strip()
+    done = transition(operation_id, "revoke", "cancel", "delete", notes=note)
+    if done.id is None:
+        return error_response("Order or Report not found", 404, "operation")
+    if done.action is None:
+        return error_response("Order already cancelled", 409, "operation")
+    db.session.commit()
+    if done.action == "delete":
         return "", 204
+    return OperationSchema().dump(db.session.get(Operation, operation_id)), 200
 
 
 @admin_bp.route("/operations", methods=["GET"])
@@ -76,7 +103,7 @@ def all_operations():
     # 0 = orders, 1 = reports (donc reports après)
     type_rank = case((Operation.type == "order", 0), else_=1)
 
-    base = Operation.query.order_by(type_rank, desc(Operation.created_at), desc(Operation.id))
+    order = (type_rank, desc(Operation.created_at), desc(Operation.id))
 
     actionable_q = or_(
         and_(Operation.type == "order", Operation.status.in_(["pending", "approved"])),
@@ -84,25 +111,96 @@ def all_operations():
         # and_(Operation.type == "report", Operation.status == "error"),
     )
 
-    actionable = (
-       base
-        .filter(actionable_q)
-        .order_by(Operation.created_at.desc())
-        .all()
+    with_items = flag_arg("items")
+    actionable = operation_rows(actionable_q, order_by=order, items=with_items)
+    # History pages newest first; ?cursor= takes the previous response's next_cursor
+    history, next_cursor = operation_page(
+        ~actionable_q, cursor=cursor_arg(), limit=limit_arg("ADMIN_HISTORY_PAGE_SIZE"), items=with_items,
     )
 
-    history = (
-        base
-        .filter(~actionable_q)
-        .order_by(Operation.created_at.desc())
-        .limit(25)
-        .all()
+    return {
+        "actionable": dump_operations(actionable),
+        "history": dump_operations(history),
+        "next_cursor": next_cursor,
+    }, 200
+
+
+
+
+@admin_bp.route("/inventory/matrix")
+@jwt_required()
+@role_required("admin")
+def get_inventory_matrix():
+    """
+    Network-wide stock: customers x books, with totals and stock value
+    """
+    matrix = inventory_matrix(
+        customer_ids=request.args.getlist("customer_id", type=int),
+        book_ids=request.args.getlist("book_id", type=int),
+        series_ids=request.args.getlist("series_id", type=int),
+    )
+    return {"data": matrix}, 200
+
+
+@admin_bp.route("/stats")
+@jwt_required()
+@role_required("admin")
+def all_customer_stats():
+    """
+    Statistics of every customer in one round-trip (same shape as /api/users/<id>/stats)
+    """
+    return {"data": customer_stats()}, 200
+
+
+@admin_bp.route("/analytics/timeseries")
+@jwt_required()
+@role_required("admin")
+def analytics_timeseries():
+    """
+    Sales/delivery time series from the daily rollup.
+    ?bucket=day|week|month|quarter&group_by=customer|book|series&from=&to=
+    """
+    bucket = request.args.get("bucket", "month")
+    group_by = request.args.get("group_by") or None
+    if bucket not in BUCKETS:
+        return error_response(f"Unknown bucket, expected one of {', '.join(BUCKETS)}", 400, "bucket")
+    if group_by and group_by not in GROUPS:
+        return error_response(f"Unknown grouping, expected one of {', '.join(GROUPS)}", 400, "group_by")
+
+    series = sales_timeseries(
+        bucket=bucket,
+        group_by=group_by,
+        start=date_arg("from"),
+        end=date_arg("to"),
+        customer_ids=request.args.getlist("customer_id", type=int),
+        book_ids=request.args.getlist("book_id", type=int),
+        series_ids=request.args.getlist("series_id", type=int),
     )
+    return {"data": {"bucket": bucket, "group_by": group_by, "series": series}}, 200
 
-    schema = OperationSchema(many=True)
-    return {"actionable": schema.dump(actionable), "history": schema.dump(history)}, 200
+
+@admin_bp.route("/suggestions")
+@jwt_required()
+@role_required("admin")
+def all_suggestions():
+    """
+    Reorder suggestions for the whole network (optionally ?customer_id=)
+    """
+    return {"data": list_suggestions(request.args.get("customer_id", type=int))}, 200
 
 
+@admin_bp.route("/changes")
+@jwt_required()
+@role_required("admin")
+def changes():
+    """
+    NDJSON feed of row changes after ?since=<seq> (default 0), at most ?limit= entries.
+    The last line carries the resume_token to pass as the next ?since=; the most
+    recent changes are sent again by the next call (dedupe on seq).
+    """
+    since = request.args.get("since", 0, type=int)
+    limit = limit_arg("CHANGES_PAGE_SIZE", max_key="CHANGES_MAX_PAGE_SIZE")
+    return Response(stream_with_context(change_feed(since, limit)), mimetype="application/x-ndjson")
 
 
 @admin_bp.route("/books", methods=["POST"])
@@ -125,65 +223,80 @@ def add_book():
 @jwt_required()
 @role_required("admin")
 def export_operations_csv():
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # En-têtes
-    writer.writerow([
-        "ID opération",
-        "Date",
-        "Client",
-        "Livre",
-        "Quantité",
-        "Prix unitaire",
-        "Total",
-        "Type",
-        "Statut",
-        "Notes"
-    ])
-
-    # Requête : 1 ligne = 1 article
-    rows = (
-        db.session.query(
-            Operation.id,
-            Operation.date,
-            User.name,
-            Book.title,
-            OperationItem.quantity,
-            Book.unit_price,
-            Operation.type,
-            Operation.status,
-            Operation.notes,
-        )
-        .join(User, Operation.customer_id == User.id)
-        .join(OperationItem, OperationItem.operation_id == Operation.id)
-        .join(Book, OperationItem.book_id == Book.id)
-        .order_by(Operation.created_at.desc())
-        .limit(500)  # sécurité bêta
-        .all()
-    )
+    """Stream the ledger as CSV, one line per item (or per operation with ?level=operation).
 
-    for r in rows:
-        total = r.quantity * r.unit_price
-        writer.writerow([
-            r.id,
-            r.date.strftime("%Y-%m-%d"),
-            r.name,
-            r.title,
-            r.quantity,
-            r.unit_price,
-            total,
-            "Commande" if r.type == "order" else "Rapport",
-            r.status or "—",
-            r.notes or ""
-        ])
-
-    output.seek(0)
-
-    return Response(
-        output.getvalue(),
-        mimetype="text/csv",
-        headers={
-            "Content-Disposition": "attachment; filename=toplivres_operations.csv"
-        }
+    Optional filters: ?from=&to= (YYYY-MM-DD), ?customer_id=, ?type=order|report,
+    ?status=. Gzipped on the fly when the client accepts it.
+    """
+    op_type = request.args.get("type")
+    if op_type and op_type not in ("order", "report"):
+        return error_response("Must be one of: order, report", 400, "type")
+    level = request.args.get("level", "item")
+    if level not in LEVELS:
+        return error_response("Must be one of: item, operation", 400, "level")
+    stmt = export_statement(
+        start=date_arg("from"),
+        end=date_arg("to"),
+        customer_id=request.args.get("customer_id", type=int),
+        type=op_type,
+        status=request.args.get("status"),
+        level=level,
     )
+
+    headers = {"Content-Disposition": "attachment; filename=toplivres_operations.csv", "Vary": "Accept-Encoding"}
+    chunks = csv_chunks(stmt, level)
+    if "gzip" in request.accept_encodings:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(stream_with_context(chunks), mimetype="text/csv", headers=headers)
+
+
+# -------------------------
+# Background jobs
+# -------------------------
+@admin_bp.route("/jobs", methods=["POST"])
+@jwt_required()
+@role_required("admin")
+def create_job():
+    """
+    Queue a background job: {"kind": "export_csv"|"backfill_rollup"|"rebuild_stock"|"forecast", "params": {...}}.
+    Poll GET /api/admin/jobs/<id>; download the result when it is done.
+    """
+    data = JobCreateSchema().load(request.get_json(silent=True) or {})
+    try:
+        job = enqueue(data["kind"], data["params"], created_by=int(get_jwt_identity()))
+    except RuntimeError as exc:
+        return error_response(str(exc), 429, "job")
+    return JobSchema().dump(job), 202, {"Location": f"/api/admin/jobs/{job.id}"}
+
+
+@admin_bp.route("/jobs")
+@jwt_required()
+@role_required("admin")
+def list_jobs():
+    jobs = Job.query.order_by(Job.id.desc()).limit(50).all()
+    return {"data": JobSchema(many=True).dump(jobs)}, 200
+
+
+@admin_bp.route("/jobs/<int:job_id>")
+@jwt_required()
+@role_required("admin")
+def get_job(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return error_response("Job not found", 404, "job")
+    return JobSchema().dump(job), 200
+
+
+@admin_bp.route("/jobs/<int:job_id>/download")
+@jwt_required()
+@role_required("admin")
+def download_job_result(job_id):
+    job = db.session.get(Job, job_id)
+    if not job:
+        return error_response("Job not found", 404, "job")
+    if job.status != "done" or not job.result_path:
+        return error_response("Job has no result to download yet", 409, "job")
+    return send_file(job.result_path, as_attachment=True, download_name=f"toplivres_{job.kind}_{job.id}.csv")
+
@@ -4,6 +4,7 @@ from werkzeug.security import generate_password_hash
 from app.extensions import db
 from app.models import User
 from app.schemas import UserSchema
+from app.utils.auth import cache_principal
 from datetime import timedelta
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -54,7 +55,8 @@ def login():
     user = User.query.filter_by(email=email).first()
     if not user or not user.check_password(password):
         return jsonify({"error": "Invalid email and password"}), 401
-    
+    cache_principal(user)  # the token's first requests won't need to load the user
+
     token = create_access_token(
         identity=str(user.id),
         additional_claims={"role": user.role},
@@ -1,13 +1,19 @@
-from flask import Blueprint, jsonify, request, render_template, redirect, url_for
+from flask import Blueprint, current_app, jsonify, request, render_template, redirect, url_for
 from app.extensions import db
-from app.models import Book, Operation, OperationItem, User
-from app.schemas import BookSchema, OperationSchema, UserSchema, UserUpdateSchema
-from app.utils.decorators import role_required
-from app.utils.helpers import error_response
-from sqlalchemy import select, func, and_, or_
+from app.models import Book, CustomerStock, Operation, SalesDailyRollup, User
+from app.schemas import BookSchema, UserSchema, UserUpdateSchema
+from app.utils.auth import current_principal, load_principal
+from app.utils.decorators import ledger_etag, role_required
+from app.utils.helpers import error_response, cursor_arg, date_arg, limit_arg, flag_arg
+from app.services.ledger import stock_as_of
+from app.services.read_models import dump_operations, operation_page
+from app.services.stats import customer_stats, stats_result
+from app.services.forecast import list_suggestions
+from app.services.catalog import catalog_cache
+from sqlalchemy import select, func
 from sqlalchemy.orm import aliased
 
-from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, decode_token
+from flask_jwt_extended import jwt_required, get_jwt_identity, decode_token
 from marshmallow import ValidationError
 from sqlalchemy.exc import IntegrityError
 
@@ -21,11 +27,26 @@ main_bp = Blueprint('main', __name__)
 # SSR-first
 # -------------------------
 def current_user():
+    """Principal (id, role, name, email) of the cookie's owner, via the principal cache."""
     token = request.cookies.get("access_token_cookie")
     if not token:
         return None
-    #   print(decode_token(token))
-    return User.query.get(decode_token(token)["sub"])
+    try:
+        claims = decode_token(token)
+    except Exception:  # expired or tampered cookie: treat as logged out
+        return None
+    return load_principal(claims["sub"])
+
+def ledger_owner(id=None):
+    """Customer whose ledger a request reads, for ``ledger_etag``.
+
+    Customers can only read their own ledger; admins name the customer in
+    the URL (``/<id>/``) or with ``?id=``.
+    """
+    user_id, role = int(get_jwt_identity()), current_principal().role
+    if role == "customer":
+        return user_id if id in (None, user_id) else None
+    return id if id is not None else request.args.get("id", type=int)
 
 # -------------------------
 # ORDERS (request 4 delivery) and SALES REPORT
@@ -47,52 +68,45 @@ def user_info():
 
 @main_bp.route('/api/users/inventory')
 @jwt_required()
+@ledger_etag(ledger_owner)
 def get_inventory():
-    user_id, claims = int(get_jwt_identity()), get_jwt()
-
-    if claims["role"] == "customer":
-        stmt = (
-            select(User.id, User.name, Book.title, func.sum(OperationItem.quantity).label('stock'))
-                .join(Operation, Operation.customer_id == User.id)
-                .join(OperationItem, OperationItem.operation_id == Operation.id)
-                .join(Book, OperationItem.book_id == Book.id)
-                .where(
-                    and_(
-                        User.id == user_id,
-                        or_(
-                            and_(Operation.type == 'order', Operation.status == 'delivered'),
-                            (Operation.type == 'report')
-                        )
-                    )
-                )
-                # .group_by(Book.title, User.name)
+    user_id, role = int(get_jwt_identity()), current_principal().role
+    as_of = date_arg("as_of")
+
+    customer_id = user_id if role == "customer" else request.args.get("id", type=int)
+
+    if as_of:
+        # Historical balances: nearest checkpoint + operations dated after it
+        totals = stock_as_of(as_of, customer_id)
+        names = dict(db.session.execute(
+            select(User.id, User.name).where(User.id.in_({c for c, _ in totals}))
+        ).all())
+        titles = dict(db.session.execute(
+            select(Book.id, Book.title).where(Book.id.in_({b for _, b in totals}))
+        ).all())
+        rows = sorted(
+            ((c, names[c], titles[b], t.quantity) for (c, b), t in totals.items()),
+            key=lambda row: (row[1], row[2])
         )
     else:
+        # Balances are maintained in customer_stock by the ledger service,
+        # so this is a primary-key range read instead of a scan of operation_item.
         stmt = (
-            select(User.id, User.name, Book.title, func.sum(OperationItem.quantity).label('stock'))
-                .join(Operation, Operation.customer_id == User.id)
-                .join(OperationItem, OperationItem.operation_id == Operation.id)
-                .join(Book, OperationItem.book_id == Book.id)
-                .where(
-                    or_(
-                        and_(Operation.type == 'order', Operation.status == 'delivered'),
-                        (Operation.type == 'report')
-                    )
-                )
-                # .group_by(Book.title, User.name)
+            select(User.id, User.name, Book.title, CustomerStock.quantity)
+                .join(CustomerStock, CustomerStock.customer_id == User.id)
+                .join(Book, CustomerStock.book_id == Book.id)
         )
-        if request.args:
-            user_id = int(request.args["id"])
-            stmt = stmt.where(User.id == user_id)
+        if customer_id is not None:
+            stmt = stmt.where(User.id == customer_id)
+        rows = db.session.execute(stmt.order_by(User.name, Book.title)).all()
 
-    inventory = db.session.execute(stmt.group_by(Book.title, User.name, User.id)).all()
     inventory = [
         {
-            "id": row.id,
-            "name": row.name,
-            "title": row.title,
-            "stock": row.stock,
-        } for row in inventory
+            "id": id,
+            "name": name,
+            "title": title,
+            "stock": stock,
+        } for id, name, title, stock in rows
     ]
 
     return {"data": inventory}, 200
@@ -193,75 +207,71 @@ def update_current_user_password():
 
 @main_bp.route('/api/users/<int:id>/stats')
 @jwt_required()
+@ledger_etag(ledger_owner)
 def get_user_stats(id):
-    user_id, claims = int(get_jwt_identity()), get_jwt()
+    user_id, role = int(get_jwt_identity()), current_principal().role
 
-    if claims["role"] == "customer" and id != user_id:
+    if role == "customer" and id != user_id:
         return error_response("Unauthorized", 403, "reports")
 
-    user = User.query.get(id)
-    if not user:
-        return error_response("User not found", 404, "user")
-
-    total_sales = (
-        db.session.query(func.sum(-OperationItem.quantity))
-        .join(Operation, OperationItem.operation_id == Operation.id)
-        .filter(Operation.customer_id == id)
-        .filter(OperationItem.quantity < 0)
-        .scalar()
-    )
-
-    total_delivered = (
-        db.session.query(func.sum(OperationItem.quantity))
-        .join(Operation, OperationItem.operation_id == Operation.id)
-        .filter(Operation.customer_id == id)
-        .filter(and_(Operation.type == 'order', Operation.status == 'delivered'))
-        .scalar()
-    )
-
-    total_amount = (
-        db.session.query(func.sum(-OperationItem.quantity * Book.unit_price))
-        .select_from(OperationItem)
-        .join(Operation, OperationItem.operation_id == Operation.id)
-        .join(Book, OperationItem.book_id == Book.id)
-        .filter(Operation.customer_id == id)
-        .filter(OperationItem.quantity < 0)
-        .scalar()
-    )
-
-    total_sales = total_sales or 0
-    total_delivered = total_delivered or 0
-    delivery_ratio = round(total_sales / total_delivered, 2) if total_delivered > 0 else 0
-    
-    result = {
-        "id": user.id,
-        "name": user.name,
-        "total_amount": float(total_amount) if total_amount else 0.0,
-        "total_sales": total_sales,
-        "total_delivered": total_delivered,
-        "delivery_ratio": delivery_ratio
-    }
+    as_of = date_arg("as_of")
+    if as_of:
+        user = User.query.get(id)
+        if not user:
+            return error_response("User not found", 404, "user")
+        # Totals at the end of as_of, from the nearest inventory checkpoint
+        totals = stock_as_of(as_of, id)
+        # Revenue at the prices of the time, from the daily rollup
+        revenue = db.session.scalar(
+            select(func.sum(SalesDailyRollup.revenue))
+            .where(SalesDailyRollup.customer_id == id, SalesDailyRollup.date <= as_of)
+        )
+        result = stats_result(
+            user.id, user.name,
+            total_sales=sum(t.sold for t in totals.values()),
+            total_delivered=sum(t.delivered for t in totals.values()),
+            total_amount=revenue,
+            stock=sum(t.quantity for t in totals.values()),
+        )
+        result["as_of"] = as_of.isoformat()
+    else:
+        # Single conditional-aggregation query (also resolves the user)
+        stats = customer_stats([id])
+        if not stats:
+            return error_response("User not found", 404, "user")
+        result = stats[0]
+
     print(result)
     return {"data": result}
 
+@main_bp.route('/api/users/<int:id>/suggestions')
+@jwt_required()
+def get_user_suggestions(id):
+    """Reorder suggestions computed by the forecast job (see `flask forecast`)."""
+    user_id, role = int(get_jwt_identity()), current_principal().role
+
+    if role == "customer" and id != user_id:
+        return error_response("Unauthorized", 403, "suggestions")
+
+    return {"data": list_suggestions(id)}, 200
+
 @main_bp.route("/api/operations")
 @jwt_required()
 @role_required("customer")
+@ledger_etag(ledger_owner)
 def get_history():
         customer_id = int(get_jwt_identity())
-        query = Operation.query.filter_by(customer_id=customer_id)
-        if (request.args):
-            filter_type = request.args["type"]
-            if filter_type == "order":
-                query = query.filter(Operation.type == 'order')
-            elif filter_type == "report":
-                query = query.filter(Operation.type == 'report')
-            # else:
-                # All except cancelled orders
-                # query = query.filter(or_(Operation.type == 'report', and_(Operation.type == 'order', Operation.status != 'cancelled')))
-        query = query.order_by(Operation.created_at.desc(), Operation.id.desc())
-        schema = OperationSchema(many=True)
-        return jsonify({"data": schema.dump(query.all())}), 200
+        criteria = [Operation.customer_id == customer_id]
+        filter_type = request.args.get("type")
+        if filter_type == "order":
+            criteria.append(Operation.type == 'order')
+        elif filter_type == "report":
+            criteria.append(Operation.type == 'report')
+        # else:
+            # All except cancelled orders
+            # query = query.filter(or_(Operation.type == 'report', and_(Operation.type == 'order', Operation.status != 'cancelled')))
+        rows, next_cursor = operation_page(*criteria, cursor=cursor_arg(), limit=limit_arg("OPERATIONS_PAGE_SIZE"), items=flag_arg("items"))
+        return jsonify({"data": dump_operations(rows), "next_cursor": next_cursor}), 200
 
 
 # -------------------------
@@ -283,8 +293,16 @@ def books_list():
               items:
                 $ref: '#/definitions/Book'
     """
-    books = Book.query.all()
-    return jsonify({ "data": books_schema.dump(books) }), 200
+    # Served from the in-process catalog cache; no query nor serialization
+    # unless the catalog changed. Clients revalidate with If-None-Match.
+    entry = catalog_cache().get()
+    if request.if_none_match.contains(entry.etag):
+        resp = current_app.response_class(status=304)
+    else:
+        resp = current_app.response_class(entry.body, mimetype="application/json")
+    resp.set_etag(entry.etag)
+    resp.cache_control.no_cache = True
+    return resp
 
 
 @main_bp.route('/books/<int:book_id>')
@@ -2,10 +2,13 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.extensions import db
 from app.models import Operation
-from app.schemas import OperationSchema, DeliveryOperationSchema #, OperationCancelSchema
-from app.services.operations import can_request_delivery
+from app.schemas import DeliveryOperationSchema #, OperationCancelSchema
+from app.services.read_models import dump_operations, operation_page
+from app.services.transitions import transition
+from app.services.workflow import ORDER_PENDING, admit_order, order_admission
+from app.utils.auth import load_principal
 from app.utils.decorators import role_required
-from app.utils.helpers import error_response
+from app.utils.helpers import error_response, cursor_arg, limit_arg, flag_arg
 from app import log_event
 
 order_bp = Blueprint("order", __name__, url_prefix="/api/orders")
@@ -17,24 +20,20 @@ def create_order():
     schema = DeliveryOperationSchema()
     op = schema.load(request.json)
 
-    user_id = int(get_jwt_identity())
-
-    report, prev = can_request_delivery(user_id)
-    if prev and prev.status == "pending":
+    op.customer_id = int(get_jwt_identity())
+    op.type = 'order'
+    op.status = 'pending'
+    refused = admit_order(op)
+    if refused == ORDER_PENDING:
         return error_response("Wait for delivery or cancel existing request first", 403, "order")
-    if prev and not report:
+    if refused:
         return error_response(
             "order_report_required",
             403,
             "order",
         )
-    
-    op.customer_id = user_id
-    op.type = 'order'
-    op.status = 'pending'
-    db.session.add(op)
     db.session.commit()
-    log_event("order created", order_id=op.id, customer=op.customer.email, books_count=sum([item.quantity for item in op.items]))
+    log_event("order created", order_id=op.id, customer=op.customer.email, books_count=op.total_quantity)
     return schema.dump(op), 201
 
 
@@ -43,12 +42,20 @@ def create_order():
 @role_required("customer")
 def list_orders():
     customer_id = int(get_jwt_identity())
-    schema = OperationSchema(many=True)
-    orders = Operation.query.filter(
-            Operation.customer_id == customer_id,
-            (Operation.type == 'order') & (Operation.status.in_(["delivered", "approved", "pending"]))
-        ).all()
-    return jsonify({"data": schema.dump(orders)}), 200
+    orders, next_cursor = operation_page(
+        Operation.customer_id == customer_id,
+        (Operation.type == 'order') & (Operation.status.in_(["delivered", "approved", "pending"])),
+        cursor=cursor_arg(), limit=limit_arg("OPERATIONS_PAGE_SIZE"), items=flag_arg("items"),
+    )
+    return jsonify({"data": dump_operations(orders), "next_cursor": next_cursor}), 200
+
+
+@order_bp.route("/admission")
+@jwt_required()
+@role_required("customer")
+def get_admission():
+    """Whether the customer may place an order now: {"refused": null|"pending"|"report_required", ...}."""
+    return {"data": order_admission(int(get_jwt_identity()))._asdict()}, 200
 
 
 @order_bp.route("/<int:operation_id>", methods=["DELETE"])
@@ -56,17 +63,13 @@ def list_orders():
 @role_required("customer")
 def cancel_order(operation_id):
     customer_id = int(get_jwt_identity())
-    # Does the operation exists,
-    # is it of the pending type
-    # is it owned by the customer sending the request
-    op = Operation.query.get(operation_id)
-    if (not op) or (not (op.type == 'order' and op.status in ["delivered", "approved", "pending"])) or (not op.customer_id == customer_id):
+    # Only the customer's own pending orders can be withdrawn; other customers'
+    # operations are reported as not found
+    done = transition(operation_id, "withdraw", customer_id=customer_id)
+    if done.action is None:
+        if done.type == "order" and done.status in ("approved", "delivered"):
+            return error_response("You can only cancel pending order", 403, "order")
         return error_response("Order not found", 404, "order")
-    #elif not op.customer_id == int(get_jwt_identity()):
-    #    return jsonify({"msg": "You don't own the request you are trying to cancel."}), 403
-    if not (op.status == "pending"):
-        return error_response("You can only cancel pending order", 403, "order")   
-    op.status = "cancelled"
     db.session.commit()
-    log_event("order cancelled", order_id=op.id, customer=op.customer.email, reason="user_deleted_pending")
-    return OperationSchema().dump(op), 204
+    log_event("order cancelled", order_id=operation_id, customer=load_principal(customer_id).email, reason="user_deleted_pending")
+    return "", 204
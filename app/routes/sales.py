@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Operation, User, db
-from app.schemas import OperationSchema, SalesReportOperationSchema
+from app.models import Operation, db
+from app.schemas import SalesReportOperationSchema
+from app.services.ledger import apply_to_ledger
+from app.services.read_models import dump_operations, operation_page
 from app.utils.decorators import role_required
 from app import log_event
-from app.utils.helpers import error_response
+from app.utils.helpers import error_response, cursor_arg, limit_arg, flag_arg
 from marshmallow import ValidationError
 
 sales_bp = Blueprint("sale", __name__, url_prefix="/api/sales")
@@ -14,12 +16,11 @@ sales_bp = Blueprint("sale", __name__, url_prefix="/api/sales")
 @role_required("customer")
 def list_sales():
     customer_id = int(get_jwt_identity())
-    schema = OperationSchema(many=True)
-    sales = Operation.query.filter(
-        Operation.customer_id == customer_id,
-        Operation.type == "report"
+    sales, next_cursor = operation_page(
+        Operation.customer_id == customer_id, Operation.type == "report",
+        cursor=cursor_arg(), limit=limit_arg("OPERATIONS_PAGE_SIZE"), items=flag_arg("items"),
     )
-    return jsonify({"data": schema.dump(sales)}), 200
+    return jsonify({"data": dump_operations(sales), "next_cursor": next_cursor}), 200
 
 
 @sales_bp.route("", methods=["POST"])
@@ -27,20 +28,20 @@ def list_sales():
 @role_required("customer")
 def report_sale():
     customer_id = int(get_jwt_identity())
-    user = User.query.get(customer_id)
 
-    schema = SalesReportOperationSchema(user_id=user.id)
+    schema = SalesReportOperationSchema(user_id=customer_id)
     data = request.get_json()
     try:
         report = schema.load(data)
     except ValidationError as err:
         return error_response(err.messages, 400)
     
-    report.customer_id = user.id
+    report.customer_id = customer_id
     report.type = "report"
     report.status = "recorded"
     db.session.add(report)
+    apply_to_ledger(report)
     db.session.commit()
     log_event("report submitted", report_id=report.id, customer=report.customer.email,
-              books_count=-sum([item.quantity for item in report.items]))
+              books_count=-report.total_quantity)
     return schema.dump(report), 201
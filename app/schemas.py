@@ -4,8 +4,11 @@ from app.extensions import db
 
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema, fields, auto_field
 #from marshmallow import fields, validates_schema, ValidationError
-from app.models import Book, Series, User, Operation, OperationItem
+from app.models import Book, Job, Series, User, Operation, OperationItem, operation_totals
 from app.services.operations import get_inventory
+from app.services.export import LEVELS
+from app.services.jobs import JOB_KINDS
+from app.services.orders import BULK_ACTIONS
 
 class BookSeriesSchema(SQLAlchemyAutoSchema):
     class Meta:
@@ -73,6 +76,7 @@ class ItemSchema(SQLAlchemyAutoSchema):
 
     book_id = auto_field(required=True)
     quantity = auto_field(required=True)
+    unit_price_at_time = auto_field(dump_only=True)  # set from the catalog on creation
     # book = ma.fields.Nested(BookSchema, only=("title",), dump_only=True)
     book = ma.fields.Function(lambda obj: obj.book.title if obj.book else None)
 
@@ -98,6 +102,10 @@ class OperationSchema(SQLAlchemyAutoSchema):
     items = ma.fields.Nested(ItemSchema, many=True)
     customer = ma.fields.Nested(UserSchema, only=("id", "name")) #customer_id = auto_field(dump_only=True)
     notes = auto_field()
+    # Computed from the items when the operation is created
+    item_count = auto_field(dump_only=True)
+    total_quantity = auto_field(dump_only=True)
+    total_amount = auto_field(dump_only=True)
 
 
 class BaseOperationSchema(OperationSchema):
@@ -105,6 +113,22 @@ class BaseOperationSchema(OperationSchema):
         pass  # inherit model, fields, etc.
 
 
+def merge_items(items):
+    """Fold lines that repeat a book_id into the first one, keeping line order."""
+    merged = {}
+    for item in items:
+        if item.book_id in merged:
+            merged[item.book_id].quantity += item.quantity
+        else:
+            merged[item.book_id] = item
+    return list(merged.values())
+
+
+def books_by_id(book_ids):
+    """{id: Book} for the given ids, in a single IN query."""
+    return {book.id: book for book in Book.query.filter(Book.id.in_(book_ids))}
+
+
 class DeliveryOperationSchema(BaseOperationSchema):
     @ma.validates_schema
     def validate_items_for_delivery(self, data, **kwargs):
@@ -112,9 +136,14 @@ class DeliveryOperationSchema(BaseOperationSchema):
         items = data.get("items", [])
         if not items:
             raise ma.ValidationError("At least one item is required.", "items")
+        items = data["items"] = merge_items(items)
+        catalog = books_by_id([item.book_id for item in items])
         for item in items:
-            if not Book.query.get(item.book_id):
+            if item.book_id not in catalog:
                 raise ma.ValidationError(f"No book with id {item.book_id} in catalog", "items")
+        for item in items:
+            item.unit_price_at_time = catalog[item.book_id].unit_price
+        data.update(operation_totals((item.quantity, item.unit_price_at_time) for item in items))
 
 class SalesReportOperationSchema(BaseOperationSchema):
     def __init__(self, *args, **kwargs):
@@ -128,15 +157,18 @@ class SalesReportOperationSchema(BaseOperationSchema):
         if not items:
             raise ma.ValidationError("At least one item is required.", "items")
 
-        #user_id = self.context.get("user_id")  # pass user_id when loading
-        inventory, errors = get_inventory(self.user_id), {}
-
+        # One query for the books, one for the matching stock rows,
+        # whatever the size of the report
+        items = data["items"] = merge_items(items)
+        book_ids = [item.book_id for item in items]
+        catalog, errors = books_by_id(book_ids), {}
+        inventory = get_inventory(self.user_id, book_ids)
 
         for item in items:
             book_id = item.book_id
             qty = item.quantity
 
-            book = Book.query.get(book_id)
+            book = catalog.get(book_id)
 
             if not book:
                 errors.setdefault("items", []).append(f"No book with id {book_id} in the catalog")
@@ -148,8 +180,70 @@ class SalesReportOperationSchema(BaseOperationSchema):
                 item.quantity = -qty
         if errors:
             raise ma.ValidationError(errors)
+        for item in items:
+            item.unit_price_at_time = catalog[item.book_id].unit_price
+        data.update(operation_totals((item.quantity, item.unit_price_at_time) for item in items))
+
+
+class BulkOrderSchema(ma.Schema):
+    ids = ma.fields.List(ma.fields.Integer(), required=True, validate=ma.validate.Length(min=1, max=500))
+    action = ma.fields.String(required=True, validate=ma.validate.OneOf(sorted(BULK_ACTIONS)))
+    notes = ma.fields.String(load_default=None, validate=ma.validate.Length(max=500))
 
 
 class OperationCancelSchema(ma.Schema):
     customer_id = ma.fields.Integer(load_only=True)
     op_date = ma.fields.Date(required=True, load_only=True)
+
+
+class JobSchema(SQLAlchemyAutoSchema):
+    class Meta:
+        model = Job
+        include_fk = True
+        exclude = ("result_path",)
+
+    download = ma.fields.Method("get_download")
+
+    def get_download(self, job):
+        if job.status == "done" and job.result_path:
+            return f"/api/admin/jobs/{job.id}/download"
+        return None
+
+
+class DateRangeJobParamsSchema(ma.Schema):
+    from_ = ma.fields.Date(data_key="from")
+    to = ma.fields.Date()
+
+
+class ExportJobParamsSchema(DateRangeJobParamsSchema):
+    customer_id = ma.fields.Integer(strict=True)
+    type = ma.fields.String(validate=ma.validate.OneOf(["order", "report"]))
+    status = ma.fields.String()
+    level = ma.fields.String(validate=ma.validate.OneOf(LEVELS))
+
+
+class ForecastJobParamsSchema(ma.Schema):
+    window = ma.fields.Integer(strict=True, validate=ma.validate.Range(min=1))
+    cover = ma.fields.Integer(strict=True, validate=ma.validate.Range(min=1))
+
+
+# Params each job kind accepts; anything else is refused
+JOB_PARAMS = {
+    "export_csv": ExportJobParamsSchema,
+    "backfill_rollup": DateRangeJobParamsSchema,
+    "rebuild_stock": ma.Schema,
+    "forecast": ForecastJobParamsSchema,
+}
+
+
+class JobCreateSchema(ma.Schema):
+    kind = ma.fields.String(required=True, validate=ma.validate.OneOf(sorted(JOB_KINDS)))
+    params = ma.fields.Dict(load_default=dict)
+
+    @ma.validates_schema
+    def validate_params(self, data, **kwargs):
+        # The job stores the params as sent, so they are only checked here
+        errors = JOB_PARAMS[data["kind"]]().validate(data["params"])
+        if errors:
+            raise ma.ValidationError({"params": errors})
+
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import Book, Series
+
+CatalogEntry = namedtuple("CatalogEntry", "version etag body built_at")
+
+
+class CatalogCache:
+    """In-process cache of the serialized /api/books payload.
+
+    The entry is keyed by a catalog version bumped whenever a transaction
+    touching Book/Series commits in this process. ``ttl`` (seconds) bounds
+    how long another worker's changes can go unnoticed; 0 disables expiry.
+    The ETag is a hash of the payload, so every worker agrees on it.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.version = 0
+        self._entry = None
+        self._lock = threading.Lock()
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+
+    def get(self):
+        entry = self._entry
+        if entry and entry.version == self.version and not self._expired(entry):
+            return entry
+        with self._lock:
+            # Another thread may have rebuilt it while this one waited
+            entry = self._entry
+            if entry and entry.version == self.version and not self._expired(entry):
+                return entry
+            version = self.version
+            body = self._build()
+            entry = CatalogEntry(version, hashlib.sha1(body).hexdigest(), body, time.monotonic())
+            self._entry = entry
+        return entry
+
+    def _expired(self, entry):
+        return bool(self.ttl) and time.monotonic() - entry.built_at > self.ttl
+
+    @staticmethod
+    def _build():
+        from app.schemas import BookSchema
+
+        books = Book.query.options(selectinload(Book.series)).order_by(Book.id).all()
+        payload = {"data": BookSchema(many=True).dump(books)}
+        if hasattr(current_app.json, "dumps_bytes"):  # FastJSONProvider: skip the str round trip
+            return current_app.json.dumps_bytes(payload)
+        return current_app.json.dumps(payload).encode()
+
+
+def init_catalog_cache(app):
+    app.extensions["catalog_cache"] = CatalogCache(ttl=app.config["CATALOG_CACHE_TTL"])
+
+
+def catalog_cache():
+    return current_app.extensions["catalog_cache"]
+
+
+# Any committed change to books or series invalidates the cached catalog
+@event.listens_for(Session, "after_flush")
+def _track_catalog_changes(session, flush_context):
+    if any(isinstance(obj, (Book, Series)) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_catalog_version(session):
+    if session.info.pop("catalog_changed", False) and has_app_context():
+        cache = current_app.extensions.get("catalog_cache")
+        if cache:
+            cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_catalog_changes(session):
+    session.info.pop("catalog_changed", None)
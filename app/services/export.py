@@ -0,0 +1,138 @@
+"""Streaming CSV export of the operation ledger, one line per item or per operation."""
+import csv
+import io
+import zlib
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Book, Operation, OperationItem, User
+
+HEADER = [
+    "ID opération",
+    "Date",
+    "Client",
+    "Livre",
+    "Quantité",
+    "Prix unitaire",
+    "Total",
+    "Type",
+    "Statut",
+    "Notes",
+]
+
+# level=operation: one line per operation, from its stored totals
+OPERATION_HEADER = [
+    "ID opération",
+    "Date",
+    "Client",
+    "Lignes",
+    "Quantité",
+    "Total",
+    "Type",
+    "Statut",
+    "Notes",
+]
+LEVELS = ("item", "operation")
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL) and per chunk sent
+BATCH_SIZE = 1000
+
+
+def export_statement(start=None, end=None, customer_id=None, type=None, status=None, level="item"):
+    """Item lines (or operations, with level="operation") matching the filters, newest first."""
+    if level == "operation":
+        stmt = (
+            select(
+                Operation.id, Operation.date, User.name, Operation.item_count, Operation.total_quantity,
+                Operation.total_amount, Operation.type, Operation.status, Operation.notes,
+            )
+            .join(User, Operation.customer_id == User.id)
+            .order_by(Operation.created_at.desc(), Operation.id.desc())
+        )
+    else:
+        stmt = (
+            select(
+                Operation.id, Operation.date, User.name, Book.title, OperationItem.quantity,
+                OperationItem.unit_price_at_time, Operation.type, Operation.status, Operation.notes,
+            )
+            .join(User, Operation.customer_id == User.id)
+            .join(OperationItem, OperationItem.operation_id == Operation.id)
+            .join(Book, OperationItem.book_id == Book.id)
+            .order_by(Operation.created_at.desc(), Operation.id.desc(), OperationItem.id)
+        )
+    if start:
+        stmt = stmt.where(Operation.date >= start)
+    if end:
+        stmt = stmt.where(Operation.date <= end)
+    if customer_id is not None:
+        stmt = stmt.where(Operation.customer_id == customer_id)
+    if type:
+        stmt = stmt.where(Operation.type == type)
+    if status:
+        stmt = stmt.where(Operation.status == status)
+    return stmt
+
+
+def _item_line(r):
+    return [
+        r.id,
+        r.date.strftime("%Y-%m-%d"),
+        r.name,
+        r.title,
+        r.quantity,
+        r.unit_price_at_time,
+        r.quantity * r.unit_price_at_time,
+        "Commande" if r.type == "order" else "Rapport",
+        r.status or "—",
+        r.notes or "",
+    ]
+
+
+def _operation_line(r):
+    return [
+        r.id,
+        r.date.strftime("%Y-%m-%d"),
+        r.name,
+        r.item_count,
+        r.total_quantity,
+        r.total_amount,
+        "Commande" if r.type == "order" else "Rapport",
+        r.status or "—",
+        r.notes or "",
+    ]
+
+
+def csv_chunks(stmt, level="item"):
+    """Yield the CSV (header included) as UTF-8 chunks of BATCH_SIZE lines.
+
+    Rows are streamed with ``yield_per``, so memory stays flat whatever the
+    number of lines.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    header, line = (OPERATION_HEADER, _operation_line) if level == "operation" else (HEADER, _item_line)
+    writer.writerow(header)
+    yield drain()
+
+    result = db.session.execute(stmt.execution_options(yield_per=BATCH_SIZE))
+    for rows in result.partitions():
+        writer.writerows(line(r) for r in rows)
+        yield drain()
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of byte chunks on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+
+from app.extensions import db
+from app.models import Book, CustomerStock, ReorderSuggestion, SalesDailyRollup, User
+from sqlalchemy import select, insert, delete, func, case, cast, and_, or_, Float, literal
+
+
+def compute_suggestions(window_days=90, cover_days=60, as_of=None):
+    """Recompute ``reorder_suggestion`` for every (customer, book) holding stock.
+
+    velocity      = books sold per day over the last ``window_days``
+    days_of_cover = current stock / velocity
+    suggested_qty = what is needed to cover ``cover_days`` of sales, minus stock
+
+    Runs as one set-based INSERT ... SELECT over customer_stock and the daily
+    rollup, so the cost does not grow with a Python loop over all pairs.
+    Returns the number of rows written. The caller commits.
+    """
+    as_of = as_of or date.today()
+    sold = (
+        select(
+            SalesDailyRollup.customer_id,
+            SalesDailyRollup.book_id,
+            func.sum(SalesDailyRollup.sold_qty).label("qty"),
+        )
+        .where(SalesDailyRollup.date > as_of - timedelta(days=window_days))
+        .where(SalesDailyRollup.date <= as_of)
+        .group_by(SalesDailyRollup.customer_id, SalesDailyRollup.book_id)
+        .subquery()
+    )
+    sold_qty = func.coalesce(sold.c.qty, 0)
+    stock = CustomerStock.quantity
+    # ceil(sold * cover / window) with integer arithmetic, portable across dialects
+    demand = (sold_qty * cover_days + (window_days - 1)) // window_days
+
+    source = (
+        select(
+            CustomerStock.customer_id,
+            CustomerStock.book_id,
+            stock,
+            sold_qty,
+            cast(sold_qty, Float) / window_days,
+            case((sold_qty > 0, cast(stock, Float) * window_days / sold_qty), else_=None),
+            case((demand > stock, demand - stock), else_=0),
+            literal(datetime.utcnow()),
+        )
+        .outerjoin(sold, and_(
+            sold.c.customer_id == CustomerStock.customer_id,
+            sold.c.book_id == CustomerStock.book_id,
+        ))
+        # Pairs with neither stock nor recent sales have nothing to forecast
+        .where(or_(stock != 0, sold_qty > 0))
+    )
+
+    db.session.execute(delete(ReorderSuggestion))
+    result = db.session.execute(
+        insert(ReorderSuggestion).from_select(
+            ["customer_id", "book_id", "stock", "sold_qty", "velocity",
+             "days_of_cover", "suggested_qty", "computed_at"],
+            source,
+        )
+    )
+    return result.rowcount
+
+
+def list_suggestions(customer_id=None):
+    stmt = (
+        select(ReorderSuggestion, User.name, Book.title)
+        .join(User, ReorderSuggestion.customer_id == User.id)
+        .join(Book, ReorderSuggestion.book_id == Book.id)
+        .order_by(ReorderSuggestion.suggested_qty.desc(), User.name, Book.title)
+    )
+    if customer_id is not None:
+        stmt = stmt.where(ReorderSuggestion.customer_id == customer_id)
+
+    return [
+        {
+            "customer_id": s.customer_id,
+            "name": name,
+            "book_id": s.book_id,
+            "title": title,
+            "stock": s.stock,
+            "sold_qty": s.sold_qty,
+            "velocity": round(s.velocity, 3),
+            "days_of_cover": round(s.days_of_cover, 1) if s.days_of_cover is not None else None,
+            "suggested_qty": s.suggested_qty,
+            "computed_at": s.computed_at.isoformat(),
+        }
+        for s, name, title in db.session.execute(stmt)
+    ]
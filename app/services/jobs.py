@@ -0,0 +1,227 @@
+"""In-process background jobs for heavy admin tasks.
+
+Jobs are rows of the ``job`` table. ``JobRunner`` runs them on a bounded
+thread pool inside the app process (no broker): a worker claims a queued job
+with a conditional UPDATE, runs its handler in a fresh app context and
+records the outcome. While a job runs, a companion thread refreshes its
+heartbeat every JOBS_HEARTBEAT_EVERY seconds, whatever the handler does.
+Jobs whose worker died (no heartbeat for JOBS_STALE_AFTER seconds) are
+requeued, or failed after JOBS_MAX_ATTEMPTS, by ``recover()`` when a
+process starts serving.
+
+With JOBS_EAGER set (tests), jobs run inline when submitted.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.extensions import db
+from app.models import Job
+from app.services.export import BATCH_SIZE, csv_chunks, export_statement
+from app.services.forecast import compute_suggestions
+from app.services.ledger import rebuild_customer_stock, rebuild_sales_rollup
+
+ACTIVE = ("queued", "running")
+
+
+def _day(params, key):
+    return date.fromisoformat(params[key]) if params.get(key) else None
+
+
+def report_progress(job_id, percent=None):
+    """Record a heartbeat (and progress), outside the job's own transaction.
+
+    Best effort: on SQLite the write can be refused while the job holds a
+    read cursor open, which must not fail the job.
+    """
+    values = {"heartbeat_at": datetime.utcnow()}
+    if percent is not None:
+        values["progress"] = min(int(percent), 99)
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(**values))
+    except SQLAlchemyError:
+        pass
+
+
+def result_file(job, extension):
+    directory = current_app.config["JOBS_RESULT_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"job-{job.id}.{extension}")
+
+
+# -------------------------
+# Handlers: handler(job) -> result summary (dict). They may set job.result_path.
+# -------------------------
+def export_csv_job(job):
+    """CSV export (same columns and filters as /api/admin/export/csv).
+
+    With params.customer_id it doubles as a customer statement; params.level
+    = "operation" writes one line per operation.
+    """
+    params = job.params or {}
+    level = "operation" if params.get("level") == "operation" else "item"
+    stmt = export_statement(
+        start=_day(params, "from"), end=_day(params, "to"), customer_id=params.get("customer_id"),
+        type=params.get("type"), status=params.get("status"), level=level,
+    )
+    total = db.session.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    path = result_file(job, "csv")
+    with open(path, "wb") as out:
+        for done, chunk in enumerate(csv_chunks(stmt, level)):
+            out.write(chunk)
+            if total and done:
+                report_progress(job.id, 100 * done * BATCH_SIZE / total)
+    job.result_path = path
+    return {"rows": total}
+
+
+def backfill_rollup_job(job):
+    params = job.params or {}
+    rows = rebuild_sales_rollup(_day(params, "from"), _day(params, "to"))
+    db.session.commit()
+    return {"rows": rows}
+
+
+def rebuild_stock_job(job):
+    drift = rebuild_customer_stock()
+    db.session.commit()
+    return {"drift": len(drift)}
+
+
+def forecast_job(job):
+    params = job.params or {}
+    window = params.get("window") or current_app.config["FORECAST_WINDOW_DAYS"]
+    cover = params.get("cover") or current_app.config["FORECAST_COVER_DAYS"]
+    count = compute_suggestions(window_days=window, cover_days=cover)
+    db.session.commit()
+    return {"suggestions": count}
+
+
+JOB_KINDS = {
+    "export_csv": export_csv_job,
+    "backfill_rollup": backfill_rollup_job,
+    "rebuild_stock": rebuild_stock_job,
+    "forecast": forecast_job,
+}
+
+
+class JobRunner:
+    def __init__(self, app):
+        self.app = app
+        self.eager = app.config["JOBS_EAGER"]
+        self.executor = None if self.eager else ThreadPoolExecutor(
+            max_workers=app.config["JOBS_MAX_WORKERS"], thread_name_prefix="job"
+        )
+        self._recovered = False
+        self._lock = threading.Lock()
+
+    def submit(self, job_id):
+        if self.eager:
+            self.run(job_id)
+        else:
+            self.executor.submit(self.run, job_id)
+
+    def run(self, job_id):
+        """Claim and run one job; a no-op if another worker got it first."""
+        with self.app.app_context():
+            now = datetime.utcnow()
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", started_at=now, heartbeat_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                return
+
+            job = db.session.get(Job, job_id)
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stop), daemon=True,
+                                         name=f"job-{job_id}-heartbeat")
+            heartbeat.start()
+            try:
+                result = JOB_KINDS[job.kind](job)
+            except Exception as exc:
+                db.session.rollback()
+                current_app.logger.exception("job %s (%s) failed", job_id, job.kind)
+                job = db.session.get(Job, job_id)
+                job.status, job.error = "failed", str(exc) or type(exc).__name__
+            else:
+                job.status, job.progress, job.result = "done", 100, result
+            finally:
+                stop.set()
+                heartbeat.join()
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+    def _heartbeat(self, job_id, stop):
+        """Keep the running job's heartbeat fresh until ``stop`` is set."""
+        every = self.app.config["JOBS_HEARTBEAT_EVERY"]
+        with self.app.app_context():
+            while not stop.wait(every):
+                report_progress(job_id)
+
+    def recover(self):
+        """Requeue jobs left running by a dead worker, then resubmit everything queued."""
+        config = self.app.config
+        with self.app.app_context():
+            stale = datetime.utcnow() - timedelta(seconds=config["JOBS_STALE_AFTER"])
+            is_stuck = (Job.status == "running") & (Job.heartbeat_at < stale)
+            db.session.execute(
+                update(Job)
+                .where(is_stuck, Job.attempts >= config["JOBS_MAX_ATTEMPTS"])
+                .values(status="failed", error="Worker stopped responding", finished_at=datetime.utcnow())
+            )
+            db.session.execute(update(Job).where(is_stuck).values(status="queued", progress=0))
+            db.session.commit()
+            queued = db.session.scalars(select(Job.id).where(Job.status == "queued").order_by(Job.id)).all()
+        for job_id in queued:
+            self.submit(job_id)
+        return queued
+
+    def recover_once(self):
+        """``recover()`` the first time this process serves a request."""
+        if self._recovered or self.eager:
+            return
+        with self._lock:
+            if self._recovered:
+                return
+            self._recovered = True
+        try:
+            self.recover()
+        except SQLAlchemyError:  # e.g. job table not migrated yet
+            self.app.logger.exception("job recovery failed")
+
+
+def init_job_runner(app):
+    app.extensions["jobs"] = JobRunner(app)
+
+
+def job_runner():
+    return current_app.extensions["jobs"]
+
+
+def enqueue(kind, params=None, created_by=None):
+    """Create a queued job and hand it to the runner. Returns the Job.
+
+    Raises ValueError for an unknown kind, RuntimeError when JOBS_MAX_QUEUED
+    jobs are already waiting or running.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    active = db.session.scalar(select(func.count()).select_from(Job).where(Job.status.in_(ACTIVE)))
+    if active >= current_app.config["JOBS_MAX_QUEUED"]:
+        raise RuntimeError("Too many jobs in progress, try again later")
+
+    job = Job(kind=kind, params=params or {}, created_by=created_by)
+    db.session.add(job)
+    db.session.commit()
+    job_runner().submit(job.id)
+    db.session.refresh(job)
+    return job
@@ -0,0 +1,262 @@
+from collections import defaultdict, namedtuple
+
+from app.extensions import db
+from app.models import CustomerStock, InventoryCheckpoint, Operation, OperationItem, SalesDailyRollup
+from sqlalchemy import select, insert, func, case, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Operations that count towards a customer's stock: delivered orders (+)
+# and recorded sales reports (-).
+STOCK_FILTER = or_(
+    and_(Operation.type == 'order', Operation.status == 'delivered'),
+    (Operation.type == 'report')
+)
+
+# Ledger totals for one (customer, book): current stock, books delivered, books sold
+LedgerTotals = namedtuple("LedgerTotals", "quantity delivered sold")
+
+
+def _operation_ids(operations):
+    """Ids of Operation objects (flushed first) or of plain ids, as given by bulk paths."""
+    if isinstance(operations, (Operation, int)):
+        operations = [operations]
+    db.session.flush()  # make sure new operations and their items have ids
+    return [op if isinstance(op, int) else op.id for op in operations]
+
+
+def _ledger_rows(operation_ids):
+    """(customer_id, date, type, book_id, quantity, amount) sums for the given operations."""
+    if not operation_ids:
+        return []
+    return db.session.execute(
+        select(
+            Operation.customer_id, Operation.date, Operation.type, OperationItem.book_id,
+            func.sum(OperationItem.quantity), func.sum(OperationItem.quantity * OperationItem.unit_price_at_time),
+        )
+        .join(Operation, OperationItem.operation_id == Operation.id)
+        .where(Operation.id.in_(operation_ids))
+        .group_by(Operation.customer_id, Operation.date, Operation.type, OperationItem.book_id)
+    ).all()
+
+
+def upsert(model):
+    """``INSERT`` into ``model`` supporting ``on_conflict_do_update`` (PostgreSQL, SQLite)."""
+    dialect = postgresql if db.session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
+
+
+def increment_rows(model, deltas):
+    """Add ``{primary key: {column: delta}}`` to ``model`` rows in the current transaction.
+
+    One ``INSERT ... ON CONFLICT DO UPDATE SET column = column + excluded.column``:
+    missing rows are inserted and existing ones incremented in place, so
+    concurrent writers never overwrite each other's changes, nor fail when
+    both create the same row.
+    """
+    if not deltas:
+        return
+    pk = [c.key for c in model.__mapper__.primary_key]
+    columns = sorted({column for changes in deltas.values() for column in changes})
+    stmt = upsert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=pk, set_={column: getattr(model, column) + stmt.excluded[column] for column in columns}
+    )
+    db.session.execute(stmt, [
+        {**dict(zip(pk, key)), **{column: changes.get(column, 0) for column in columns}}
+        for key, changes in deltas.items()
+    ])
+    # Rows already loaded in the session hold the old values
+    for key in deltas:
+        row = db.session.identity_map.get(model.__mapper__.identity_key_from_primary_key(key))
+        if row is not None:
+            db.session.expire(row)
+
+
+def apply_stock_deltas(deltas):
+    """Add ``{(customer_id, book_id): delta}`` to ``customer_stock``."""
+    increment_rows(CustomerStock, {key: {"quantity": delta} for key, delta in deltas.items()})
+
+
+def apply_to_ledger(operations, sign=1):
+    """Record that operations entered (sign=1) or left (sign=-1) the stock ledger.
+
+    Call it with the operation(s), or their ids, before committing the
+    transition that makes them count (delivery, report) or stop counting
+    (report deletion, cancellation of a delivered order). Updates
+    customer_stock and sales_daily_rollup, and drops checkpoints the change
+    lands in.
+    """
+    stock, rollup, earliest = defaultdict(int), {}, {}
+    for customer_id, day, op_type, book_id, qty, amount in _ledger_rows(_operation_ids(operations)):
+        stock[(customer_id, book_id)] += sign * qty
+        earliest[customer_id] = min(day, earliest.get(customer_id, day))
+
+        totals = rollup.setdefault((day, customer_id, book_id), {"sold_qty": 0, "delivered_qty": 0, "revenue": 0})
+        if op_type == 'report':
+            totals["sold_qty"] += -sign * qty
+            totals["revenue"] += -sign * amount
+        else:
+            totals["delivered_qty"] += sign * qty
+
+    apply_stock_deltas(stock)
+    increment_rows(SalesDailyRollup, rollup)
+    invalidate_checkpoints(earliest)
+
+
+def ledger_stock(customer_id=None):
+    """Recompute {(customer_id, book_id): quantity} from the raw ledger."""
+    stmt = (
+        select(Operation.customer_id, OperationItem.book_id, func.sum(OperationItem.quantity))
+        .join(Operation, OperationItem.operation_id == Operation.id)
+        .where(STOCK_FILTER)
+        .group_by(Operation.customer_id, OperationItem.book_id)
+    )
+    if customer_id is not None:
+        stmt = stmt.where(Operation.customer_id == customer_id)
+    return {(c, b): qty or 0 for c, b, qty in db.session.execute(stmt)}
+
+
+def rebuild_customer_stock():
+    """Resync ``customer_stock`` with the ledger.
+
+    Returns the drift found as a list of
+    ``(customer_id, book_id, stored, expected)`` tuples. The caller commits.
+    """
+    expected = ledger_stock()
+    stored = {(row.customer_id, row.book_id): row for row in CustomerStock.query}
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        row = stored.get(key)
+        have, want = (row.quantity if row else 0), expected.get(key, 0)
+        if have != want:
+            drift.append((*key, row.quantity if row else None, expected.get(key)))
+
+        if key not in expected:
+            db.session.delete(row)
+        elif row is None:
+            db.session.add(CustomerStock(customer_id=key[0], book_id=key[1], quantity=want))
+        elif have != want:
+            row.quantity = want
+    return drift
+
+
+# -------------------------
+# Checkpoints (as-of-date inventory)
+# -------------------------
+def invalidate_checkpoints(earliest):
+    """Drop checkpoints a ledger change lands in: {customer_id: first affected date}."""
+    if not earliest:
+        return
+    InventoryCheckpoint.query.filter(or_(*(
+        and_(InventoryCheckpoint.customer_id == customer_id, InventoryCheckpoint.as_of_date >= day)
+        for customer_id, day in earliest.items()
+    ))).delete(synchronize_session=False)
+
+
+def _totals_stmt():
+    delivered = func.sum(case((Operation.type == 'order', OperationItem.quantity), else_=0))
+    sold = func.sum(case((Operation.type == 'report', -OperationItem.quantity), else_=0))
+    return (
+        select(Operation.customer_id, OperationItem.book_id, delivered, sold)
+        .join(Operation, OperationItem.operation_id == Operation.id)
+        .where(STOCK_FILTER)
+        .group_by(Operation.customer_id, OperationItem.book_id)
+    )
+
+
+def stock_as_of(as_of, customer_id=None):
+    """Ledger totals at the end of ``as_of``: {(customer_id, book_id): LedgerTotals}.
+
+    Starts from each customer's latest checkpoint on or before ``as_of`` and
+    only replays the operations dated after it.
+    """
+    latest = (
+        select(InventoryCheckpoint.customer_id, func.max(InventoryCheckpoint.as_of_date).label("as_of_date"))
+        .where(InventoryCheckpoint.as_of_date <= as_of)
+        .group_by(InventoryCheckpoint.customer_id)
+    )
+    if customer_id is not None:
+        latest = latest.where(InventoryCheckpoint.customer_id == customer_id)
+    latest = latest.subquery()
+
+    totals = defaultdict(lambda: [0, 0])
+    checkpoint_rows = db.session.execute(
+        select(InventoryCheckpoint.customer_id, InventoryCheckpoint.book_id,
+               InventoryCheckpoint.delivered_qty, InventoryCheckpoint.sold_qty)
+        .join(latest, and_(
+            InventoryCheckpoint.customer_id == latest.c.customer_id,
+            InventoryCheckpoint.as_of_date == latest.c.as_of_date,
+        ))
+    ).all()
+    delta = (
+        _totals_stmt()
+        .outerjoin(latest, latest.c.customer_id == Operation.customer_id)
+        .where(Operation.date <= as_of)
+        .where(or_(latest.c.as_of_date.is_(None), Operation.date > latest.c.as_of_date))
+    )
+    if customer_id is not None:
+        delta = delta.where(Operation.customer_id == customer_id)
+
+    for rows in (checkpoint_rows, db.session.execute(delta).all()):
+        for c, b, delivered, sold in rows:
+            totals[(c, b)][0] += delivered or 0
+            totals[(c, b)][1] += sold or 0
+    return {key: LedgerTotals(d - s, d, s) for key, (d, s) in totals.items()}
+
+
+def write_checkpoints(as_of):
+    """Snapshot every customer's ledger totals at the end of ``as_of``.
+
+    Returns the number of rows written. The caller commits.
+    """
+    totals = stock_as_of(as_of)
+    InventoryCheckpoint.query.filter(InventoryCheckpoint.as_of_date == as_of).delete(synchronize_session=False)
+    if totals:
+        db.session.execute(insert(InventoryCheckpoint), [
+            {
+                "customer_id": customer_id, "book_id": book_id, "as_of_date": as_of,
+                "quantity": t.quantity, "delivered_qty": t.delivered, "sold_qty": t.sold,
+            }
+            for (customer_id, book_id), t in totals.items()
+        ])
+    return len(totals)
+
+
+# -------------------------
+# Daily sales rollup
+# -------------------------
+def rebuild_sales_rollup(start=None, end=None):
+    """Recompute ``sales_daily_rollup`` for [start, end] (default: everything).
+
+    Returns the number of rows written. The caller commits.
+    """
+    in_range = []
+    if start:
+        in_range.append(SalesDailyRollup.date >= start)
+    if end:
+        in_range.append(SalesDailyRollup.date <= end)
+    SalesDailyRollup.query.filter(*in_range).delete(synchronize_session=False)
+
+    sold = case((Operation.type == 'report', -OperationItem.quantity), else_=0)
+    delivered = case((Operation.type == 'order', OperationItem.quantity), else_=0)
+    source = (
+        select(
+            Operation.date, Operation.customer_id, OperationItem.book_id,
+            func.sum(sold), func.sum(delivered), func.sum(sold * OperationItem.unit_price_at_time),
+        )
+        .join(Operation, OperationItem.operation_id == Operation.id)
+        .where(STOCK_FILTER)
+        .group_by(Operation.date, Operation.customer_id, OperationItem.book_id)
+    )
+    if start:
+        source = source.where(Operation.date >= start)
+    if end:
+        source = source.where(Operation.date <= end)
+
+    result = db.session.execute(
+        insert(SalesDailyRollup).from_select(
+            ["date", "customer_id", "book_id", "sold_qty", "delivered_qty", "revenue"], source
+        )
+    )
+    return result.rowcount
@@ -1,45 +1,16 @@
 from app.extensions import db
-from app.models import Operation, OperationItem
-from sqlalchemy import func, and_, or_
+from app.models import CustomerStock
 
 # legacy commented helpers removed
 
-def get_inventory(user_id):
-    rows = (
-        db.session.query(OperationItem.book_id, func.sum(OperationItem.quantity))
-        .join(Operation)
-        .filter(
-            Operation.customer_id == user_id,
-            or_(
-                and_(Operation.type == 'order', Operation.status == 'delivered'),
-                (Operation.type == 'report')
-            )
-        )
-        .group_by(OperationItem.book_id)
-        .all()
+def get_inventory(user_id, book_ids=None):
+    """{book_id: quantity} on hand for a customer, optionally limited to ``book_ids``."""
+    query = (
+        db.session.query(CustomerStock.book_id, CustomerStock.quantity)
+        .filter(CustomerStock.customer_id == user_id)
     )
+    if book_ids is not None:
+        query = query.filter(CustomerStock.book_id.in_(book_ids))
+    rows = query.all()
     # Turn list of tuples into dict { book_id: quantity }
     return {book_id: qty or 0 for book_id, qty in rows}
-
-def can_request_delivery(user_id):
-    last_delivery = (
-        Operation.query
-        .filter_by(customer_id=user_id)
-        .filter(and_(Operation.type == 'order', Operation.status.in_(['pending', 'approved', 'delivered'])))
-        .order_by(Operation.created_at.desc(), Operation.id.desc())
-        .first()
-    )
-    if not last_delivery:
-        return None, None # No previous deliveries, can request
-    # last_delivery == pending case handled by caller's checks
-    report_exists = (
-        Operation.query
-        .filter_by(customer_id=user_id)
-        .filter(Operation.type == 'report')
-        .filter(
-            (Operation.created_at > last_delivery.created_at)
-            | ((Operation.created_at == last_delivery.created_at) & (Operation.id > last_delivery.id))
-        )
-        .first()
-    )
-    return report_exists is not None, last_delivery
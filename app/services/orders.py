@@ -0,0 +1,44 @@
+"""Set-based order transitions for the admin bulk endpoint."""
+from collections import namedtuple
+
+from app.services.transitions import TRANSITIONS, apply_transition, order_infos
+
+# bulk action -> (transition applied, log event)
+BulkAction = namedtuple("BulkAction", "transition event")
+BULK_ACTIONS = {
+    "approve": BulkAction("approve", "order approved"),
+    "deliver": BulkAction("deliver", "order delivered"),
+    "cancel": BulkAction("cancel", "order cancelled"),
+}
+
+
+def bulk_transition(ids, action, notes=None):
+    """Move the orders ``ids`` through ``action`` in one UPDATE.
+
+    Returns ({id: outcome}, [OrderInfo of the orders moved]); the outcome is
+    the new status, or "not_found" / "not_an_order" / "invalid_status:<status>"
+    / "conflict" (changed by someone else meanwhile). The caller commits.
+    """
+    spec = TRANSITIONS[BULK_ACTIONS[action].transition]
+    ids = list(dict.fromkeys(ids))  # duplicates count once
+    infos = order_infos(ids)
+
+    outcomes, eligible = dict.fromkeys(ids), []  # in request order
+    for id in ids:
+        info = infos.get(id)
+        if info is None:
+            outcomes[id] = "not_found"
+        elif info.type != "order":
+            outcomes[id] = "not_an_order"
+        elif info.status not in spec.sources:
+            outcomes[id] = f"invalid_status:{info.status}"
+        else:
+            eligible.append(id)
+
+    moved = set()
+    if eligible:
+        note = notes if action == "cancel" else None
+        moved = {id for id, _ in apply_transition(BULK_ACTIONS[action].transition, eligible, notes=note)}
+    for id in eligible:
+        outcomes[id] = spec.target if id in moved else "conflict"
+    return outcomes, [infos[id] for id in eligible if id in moved]
@@ -0,0 +1,134 @@
+"""Read models for the operation lists.
+
+History, orders, sales and the admin board only read operations to turn
+them into JSON. Instead of ORM entities dumped through ``OperationSchema``,
+they fetch plain Core rows into slotted dataclasses and serialize them with
+``dump_operations``, which produces the exact same JSON shape.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import select, tuple_
+
+from app.extensions import db
+from app.models import Book, Operation, OperationItem, User
+from app.utils.helpers import encode_cursor
+
+# Keyset order of the paginated lists, the same as the workflow's "last order"
+NEWEST_FIRST = (Operation.created_at.desc(), Operation.id.desc())
+
+# Operation ids per item query; keeps the IN list under every backend's bind limit
+ITEMS_CHUNK = 900
+
+
+@dataclass(slots=True)
+class ItemRow:
+    book_id: int
+    quantity: int
+    unit_price_at_time: object
+    book: str
+
+
+@dataclass(slots=True)
+class OperationRow:
+    id: int
+    type: str
+    status: str
+    created_at: object
+    date: object
+    notes: str
+    customer_id: int
+    customer_name: str
+    item_count: int
+    total_quantity: int
+    total_amount: object
+    items: list = None  # None when the items were not loaded
+
+
+def operation_rows(*criteria, order_by=(), limit=None, items=True):
+    """Operations matching ``criteria`` as OperationRow, with their totals.
+
+    Two queries for up to ITEMS_CHUNK operations: the operations joined to
+    their customer, then all their items joined to their book. With
+    ``items=False`` only the first one runs.
+    """
+    stmt = (
+        select(
+            Operation.id, Operation.type, Operation.status, Operation.created_at,
+            Operation.date, Operation.notes, Operation.customer_id, User.name,
+            Operation.item_count, Operation.total_quantity, Operation.total_amount,
+        )
+        .join(User, Operation.customer_id == User.id)
+        .where(*criteria)
+        .order_by(*order_by)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    rows = [OperationRow(*row) for row in db.session.execute(stmt)]
+    if not items:
+        return rows
+
+    for row in rows:
+        row.items = []
+    by_id = {row.id: row for row in rows}
+    ids = list(by_id)
+    for start in range(0, len(ids), ITEMS_CHUNK):
+        lines = db.session.execute(
+            select(
+                OperationItem.operation_id, OperationItem.book_id, OperationItem.quantity,
+                OperationItem.unit_price_at_time, Book.title,
+            )
+            .join(Book, OperationItem.book_id == Book.id)
+            .where(OperationItem.operation_id.in_(ids[start:start + ITEMS_CHUNK]))
+            .order_by(OperationItem.id)
+        )
+        for operation_id, *item in lines:
+            by_id[operation_id].items.append(ItemRow(*item))
+    return rows
+
+
+def operation_page(*criteria, cursor=None, limit, items=True):
+    """One page of operations, newest first: (rows, next_cursor).
+
+    ``cursor`` is the (created_at, id) key of the last row of the previous
+    page; next_cursor is None on the last page.
+    """
+    if cursor is not None:
+        criteria += (tuple_(Operation.created_at, Operation.id) < cursor,)
+    rows = operation_rows(*criteria, order_by=NEWEST_FIRST, limit=limit + 1, items=items)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _dump(row):
+    data = {
+        "id": row.id,
+        "type": row.type,
+        "status": row.status,
+        "created_at": _iso(row.created_at),
+        "date": _iso(row.date),
+        "notes": row.notes,
+        "customer": {"id": row.customer_id, "name": row.customer_name},
+        "item_count": row.item_count,
+        "total_quantity": row.total_quantity,
+        "total_amount": row.total_amount,
+    }
+    if row.items is not None:
+        data["items"] = [
+            {"book_id": item.book_id, "quantity": item.quantity, "unit_price_at_time": item.unit_price_at_time, "book": item.book}
+            for item in row.items
+        ]
+    return data
+
+
+def dump_operations(rows):
+    """Serialize OperationRow objects like ``OperationSchema(many=True).dump``.
+
+    "items" is left out for rows loaded without them.
+    """
+    return [_dump(row) for row in rows]
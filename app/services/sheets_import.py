@@ -0,0 +1,242 @@
+"""Import of the legacy Google Sheets dépôt-vente history (CSV exports).
+
+One CSV line per book line of a delivery or a sales report::
+
+    partner,date,type,title,quantity[,ref]
+    AYA DISTRIBUTION,2023-02-14,livraison,DOM: Practice,6
+    AYA DISTRIBUTION,28/02/2023,vente,DOM: Practice,2
+
+French headers (partenaire, titre/livre, quantité) are accepted too.
+``partner`` is a customer name or email, ``type`` one of livraison/delivery/
+order or vente/sale/report, ``quantity`` a positive count. Lines sharing
+(partner, date, type, ref) within a batch become one operation; deliveries
+are imported as delivered orders, sales as recorded reports.
+
+Files are read as a stream and written in batches with Core executemany;
+bad lines are reported and skipped. A batch is only cut between operations,
+and lines of an operation already written by an earlier batch of the run
+(unsorted files) are added to it. Each imported operation remembers its
+source in ``notes`` so a re-run skips what was already imported.
+"""
+import csv
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+
+from app.extensions import db
+from app.models import Book, Operation, OperationItem, User, bump_ledger_versions, log_changes, operation_totals
+from app.services.ledger import invalidate_checkpoints, rebuild_customer_stock, rebuild_sales_rollup
+from app.services.workflow import rebuild_customer_workflow
+
+# Lines buffered before a batch is written
+BATCH_ROWS = 5000
+
+SOURCE_PREFIX = "sheet:"
+
+HEADER_ALIASES = {
+    "partner": "partner", "partenaire": "partner", "client": "partner",
+    "date": "date",
+    "type": "type",
+    "title": "title", "titre": "title", "livre": "title", "book": "title",
+    "quantity": "quantity", "quantité": "quantity", "quantite": "quantity", "qty": "quantity",
+    "ref": "ref", "référence": "ref", "reference": "ref",
+}
+TYPES = {
+    "livraison": "order", "delivery": "order", "order": "order", "commande": "order",
+    "vente": "report", "ventes": "report", "sale": "report", "sales": "report", "report": "report",
+}
+
+# A line that could not be imported
+RowError = namedtuple("RowError", "file line message")
+
+
+class ImportResult:
+    def __init__(self):
+        self.operations = 0
+        self.items = 0
+        self.skipped = 0  # operations already imported by a previous run
+        self.errors = []
+        self.customers = set()
+
+
+def _parse_date(raw):
+    raw = raw.strip()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y"):
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"invalid date {raw!r}")
+
+
+class SheetImporter:
+    """Resolve partners and books from in-memory maps, insert in batches."""
+
+    def __init__(self):
+        self.customers = {}
+        for id, name, email in db.session.execute(select(User.id, User.name, User.email).where(User.role == "customer")):
+            self.customers[name.strip().lower()] = id
+            self.customers[email.strip().lower()] = id
+        self.books, self.prices = {}, {}
+        for id, title, unit_price in db.session.execute(select(Book.id, Book.title, Book.unit_price)):
+            self.books[title.strip().lower()] = id
+            self.prices[id] = unit_price
+        self.imported = set(db.session.scalars(
+            select(Operation.notes).where(Operation.notes.like(f"{SOURCE_PREFIX}%"))
+        ))
+        # Operations written by this run: {source: (id, {book_id: [item id, quantity]})}
+        self.written = {}
+        # {customer_id: earliest date imported}, for the checkpoints to drop
+        self.earliest = {}
+        self.result = ImportResult()
+
+    def _parse(self, filename, row):
+        partner = (row.get("partner") or "").strip()
+        customer_id = self.customers.get(partner.lower())
+        if customer_id is None:
+            raise ValueError(f"unknown partner {partner!r}")
+        op_type = TYPES.get((row.get("type") or "").strip().lower())
+        if op_type is None:
+            raise ValueError(f"unknown type {row.get('type')!r}")
+        title = (row.get("title") or "").strip()
+        book_id = self.books.get(title.lower())
+        if book_id is None:
+            raise ValueError(f"unknown book {title!r}")
+        try:
+            quantity = int(row.get("quantity") or "")
+        except ValueError:
+            raise ValueError(f"invalid quantity {row.get('quantity')!r}")
+        if quantity <= 0:
+            raise ValueError(f"quantity must be positive, got {quantity}")
+        day = _parse_date(row.get("date") or "")
+        ref = (row.get("ref") or "").strip()
+        source = f"{SOURCE_PREFIX}{filename}#{customer_id}/{day.isoformat()}/{op_type}/{ref}"
+        return source, customer_id, op_type, day, book_id, quantity if op_type == "order" else -quantity
+
+    def read(self, path):
+        """Import one CSV file, batch by batch."""
+        filename = os.path.basename(path)
+        batch = {}
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.reader(f)
+            header = [HEADER_ALIASES.get(h.strip().lower(), h.strip().lower()) for h in next(reader, [])]
+            missing = {"partner", "date", "type", "title", "quantity"} - set(header)
+            if missing:
+                self.result.errors.append(RowError(filename, 1, f"missing column(s): {', '.join(sorted(missing))}"))
+                return
+            lines = 0
+            for line_no, values in enumerate(reader, start=2):
+                if not any(v.strip() for v in values):
+                    continue
+                try:
+                    source, customer_id, op_type, day, book_id, qty = self._parse(filename, dict(zip(header, values)))
+                except ValueError as exc:
+                    self.result.errors.append(RowError(filename, line_no, str(exc)))
+                    continue
+                if lines >= BATCH_ROWS and source not in batch:
+                    # Full, and this line starts another operation: the batch holds whole operations
+                    self.write(batch)
+                    batch, lines = {}, 0
+                op = batch.setdefault(source, {"customer_id": customer_id, "type": op_type, "date": day, "items": {}})
+                op["items"][book_id] = op["items"].get(book_id, 0) + qty
+                lines += 1
+        self.write(batch)
+
+    def write(self, batch):
+        """Insert a batch of {source: operation} with two executemany statements."""
+        self.extend([(source, op) for source, op in batch.items() if source in self.written])
+        operations = [(source, op) for source, op in batch.items() if source not in self.imported]
+        self.result.skipped += len(batch) - len(operations) - sum(source in self.written for source in batch)
+        if not operations:
+            return
+
+        rows = [
+            {
+                "customer_id": op["customer_id"], "type": op["type"],
+                "status": "delivered" if op["type"] == "order" else "recorded",
+                "date": op["date"], "created_at": datetime.combine(op["date"], datetime.min.time()),
+                "notes": source,
+                **operation_totals((qty, self.prices[book_id]) for book_id, qty in op["items"].items()),
+            }
+            for source, op in operations
+        ]
+        ids = db.session.scalars(
+            insert(Operation).returning(Operation.id, sort_by_parameter_order=True), rows
+        ).all()
+        items = [
+            {"operation_id": op_id, "book_id": book_id, "quantity": qty, "unit_price_at_time": self.prices[book_id]}
+            for op_id, (_, op) in zip(ids, operations)
+            for book_id, qty in op["items"].items()
+        ]
+        item_ids = db.session.scalars(
+            insert(OperationItem).returning(OperationItem.id, sort_by_parameter_order=True), items
+        ).all()
+
+        connection = db.session.connection()
+        log_changes(connection, "operation", "insert", [{"id": id, **row} for id, row in zip(ids, rows)])
+        log_changes(connection, "operation_item", "insert", [{"id": id, **item} for id, item in zip(item_ids, items)])
+
+        self.imported.update(source for source, _ in operations)
+        item_ids = iter(item_ids)
+        for op_id, (source, op) in zip(ids, operations):
+            self.written[source] = (op_id, {book_id: [next(item_ids), qty] for book_id, qty in op["items"].items()})
+        for row in rows:
+            customer_id = row["customer_id"]
+            self.earliest[customer_id] = min(row["date"], self.earliest.get(customer_id, row["date"]))
+        self.result.customers.update(self.earliest)
+        self.result.operations += len(ids)
+        self.result.items += len(items)
+
+    def extend(self, operations):
+        """Add the lines of operations written by an earlier batch to them."""
+        if not operations:
+            return
+        changed, added, totals = [], [], []
+        for source, op in operations:
+            op_id, lines = self.written[source]
+            for book_id, qty in op["items"].items():
+                if book_id in lines:
+                    lines[book_id][1] += qty
+                    changed.append({"id": lines[book_id][0], "quantity": lines[book_id][1]})
+                else:
+                    lines[book_id] = [None, qty]
+                    added.append((lines[book_id], {
+                        "operation_id": op_id, "book_id": book_id, "quantity": qty,
+                        "unit_price_at_time": self.prices[book_id],
+                    }))
+            totals.append({"id": op_id, **operation_totals((qty, self.prices[book_id]) for book_id, (_, qty) in lines.items())})
+
+        connection = db.session.connection()
+        if changed:
+            db.session.execute(update(OperationItem), changed)
+            log_changes(connection, "operation_item", "update", changed)
+        if added:
+            items = [item for _, item in added]
+            item_ids = db.session.scalars(
+                insert(OperationItem).returning(OperationItem.id, sort_by_parameter_order=True), items
+            ).all()
+            for (line, _), id in zip(added, item_ids):
+                line[0] = id
+            log_changes(connection, "operation_item", "insert", [{"id": id, **item} for id, item in zip(item_ids, items)])
+            self.result.items += len(items)
+        db.session.execute(update(Operation), totals)
+        log_changes(connection, "operation", "update", totals)
+
+    def finish(self):
+        """Refresh the derived tables, checkpoints, workflow rows and ledger versions. The caller commits."""
+        if self.result.operations:
+            rebuild_customer_stock()
+            rebuild_sales_rollup()
+            invalidate_checkpoints(self.earliest)
+            rebuild_customer_workflow(self.result.customers)
+            bump_ledger_versions(db.session.connection(), self.result.customers)
+        return self.result
+
+
+def import_sheets(paths):
+    importer = SheetImporter()
+    for path in paths:
+        importer.read(path)
+    return importer.finish()
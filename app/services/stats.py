@@ -0,0 +1,207 @@
+from datetime import timedelta
+
+from app.extensions import db
+from app.models import Book, CustomerStock, Operation, SalesDailyRollup, Series, User
+from sqlalchemy import select, func, case, and_
+
+# Period start for each supported bucket size
+BUCKETS = {
+    "day": lambda d: d,
+    "week": lambda d: d - timedelta(days=d.weekday()),
+    "month": lambda d: d.replace(day=1),
+    "quarter": lambda d: d.replace(month=3 * ((d.month - 1) // 3) + 1, day=1),
+}
+
+# group_by -> (key column, label column) over sales_daily_rollup
+GROUPS = {
+    "customer": (SalesDailyRollup.customer_id, User.name),
+    "book": (SalesDailyRollup.book_id, Book.title),
+    "series": (Book.series_id, Series.name),
+}
+
+
+def stats_query(user_ids=None):
+    """One statement computing the ledger statistics of many customers.
+
+    Sales, deliveries and revenue come from a single conditional aggregation
+    over the operations' stored totals (revenue at the prices of the time, no
+    join); outstanding stock from customer_stock.
+    """
+    is_report = Operation.type == 'report'
+    delivered = case(
+        (and_(Operation.type == 'order', Operation.status == 'delivered'), Operation.total_quantity),
+        else_=0
+    )
+    ledger = (
+        select(
+            Operation.customer_id.label("customer_id"),
+            func.sum(case((is_report, -Operation.total_quantity), else_=0)).label("total_sales"),
+            func.sum(delivered).label("total_delivered"),
+            func.sum(case((is_report, -Operation.total_amount), else_=0)).label("total_amount"),
+        )
+        .group_by(Operation.customer_id)
+    )
+    stock = (
+        select(CustomerStock.customer_id.label("customer_id"), func.sum(CustomerStock.quantity).label("stock"))
+        .group_by(CustomerStock.customer_id)
+    )
+    if user_ids is not None:
+        ledger = ledger.where(Operation.customer_id.in_(user_ids))
+        stock = stock.where(CustomerStock.customer_id.in_(user_ids))
+    ledger, stock = ledger.subquery(), stock.subquery()
+
+    stmt = (
+        select(User.id, User.name, ledger.c.total_sales, ledger.c.total_delivered,
+               ledger.c.total_amount, stock.c.stock)
+        .outerjoin(ledger, ledger.c.customer_id == User.id)
+        .outerjoin(stock, stock.c.customer_id == User.id)
+        .order_by(User.name)
+    )
+    if user_ids is None:
+        return stmt.where(User.role == "customer")
+    return stmt.where(User.id.in_(user_ids))
+
+
+def stats_result(id, name, total_sales, total_delivered, total_amount, stock=0):
+    total_sales = total_sales or 0
+    total_delivered = total_delivered or 0
+    total_amount = float(total_amount) if total_amount else 0.0
+    return {
+        "id": id,
+        "name": name,
+        "total_amount": total_amount,
+        "total_sales": total_sales,
+        "total_delivered": total_delivered,
+        "delivery_ratio": round(total_sales / total_delivered, 2) if total_delivered > 0 else 0,
+        "revenue": round(total_amount, 2),
+        "sell_through": round(total_sales / total_delivered, 4) if total_delivered > 0 else 0,
+        "outstanding_stock": stock or 0,
+    }
+
+
+def customer_stats(user_ids=None):
+    """Statistics for the given users (default: every customer), in one query."""
+    return [stats_result(*row) for row in db.session.execute(stats_query(user_ids))]
+
+
+def inventory_matrix(customer_ids=None, book_ids=None, series_ids=None):
+    """Dense customers x books stock matrix with row/column totals and values.
+
+    Stock comes from ``customer_stock`` in a single query. Building the dense
+    matrix costs O(customers x books); the cells and every total are then
+    filled in one pass over the non-zero balances, using precomputed axis
+    positions.
+    """
+    customers_q = select(User.id, User.name).where(User.role == "customer").order_by(User.name)
+    books_q = (
+        select(Book.id, Book.title, Book.unit_price, Series.name)
+        .outerjoin(Series, Book.series_id == Series.id)
+        .order_by(Book.title)
+    )
+    stock_q = (
+        select(CustomerStock.customer_id, CustomerStock.book_id, CustomerStock.quantity)
+        .join(User, CustomerStock.customer_id == User.id)
+        .join(Book, CustomerStock.book_id == Book.id)
+        .where(User.role == "customer", CustomerStock.quantity != 0)
+    )
+    if customer_ids:
+        customers_q = customers_q.where(User.id.in_(customer_ids))
+        stock_q = stock_q.where(CustomerStock.customer_id.in_(customer_ids))
+    if book_ids:
+        books_q = books_q.where(Book.id.in_(book_ids))
+        stock_q = stock_q.where(CustomerStock.book_id.in_(book_ids))
+    if series_ids:
+        books_q = books_q.where(Book.series_id.in_(series_ids))
+        stock_q = stock_q.where(Book.series_id.in_(series_ids))
+
+    customers = db.session.execute(customers_q).all()
+    books = db.session.execute(books_q).all()
+    row_of = {c.id: i for i, c in enumerate(customers)}
+    col_of = {b.id: j for j, b in enumerate(books)}
+    prices = [float(b.unit_price) for b in books]
+
+    stock = [[0] * len(books) for _ in customers]
+    row_totals, column_totals = [0] * len(customers), [0] * len(books)
+    row_values = [0.0] * len(customers)
+    for customer_id, book_id, qty in db.session.execute(stock_q):
+        i, j = row_of[customer_id], col_of[book_id]
+        stock[i][j] = qty
+        row_totals[i] += qty
+        column_totals[j] += qty
+        row_values[i] += qty * prices[j]
+
+    row_values = [round(value, 2) for value in row_values]
+    column_values = [round(total * price, 2) for total, price in zip(column_totals, prices)]
+
+    return {
+        "customers": [{"id": c.id, "name": c.name} for c in customers],
+        "books": [
+            {"id": b.id, "title": b.title, "unit_price": float(b.unit_price), "series": b.name}
+            for b in books
+        ],
+        "stock": stock,
+        "row_totals": row_totals,
+        "column_totals": column_totals,
+        "row_values": row_values,
+        "column_values": column_values,
+        "total": sum(row_totals),
+        "total_value": round(sum(column_values), 2),
+    }
+
+
+def sales_timeseries(bucket="month", group_by=None, start=None, end=None,
+                     customer_ids=None, book_ids=None, series_ids=None):
+    """Sold/delivered quantities and revenue per period (and group) from the daily rollup.
+
+    The database reduces to one row per (day, group); bucketing into
+    weeks/months/quarters happens on that already small result.
+    """
+    period_of = BUCKETS[bucket]
+    key_col, label_col = GROUPS[group_by] if group_by else (None, None)
+
+    columns = [SalesDailyRollup.date]
+    if group_by:
+        columns += [key_col, label_col]
+    stmt = (
+        select(
+            *columns,
+            func.sum(SalesDailyRollup.sold_qty),
+            func.sum(SalesDailyRollup.delivered_qty),
+            func.sum(SalesDailyRollup.revenue),
+        )
+        .select_from(SalesDailyRollup)
+        .join(User, SalesDailyRollup.customer_id == User.id)
+        .join(Book, SalesDailyRollup.book_id == Book.id)
+        .outerjoin(Series, Book.series_id == Series.id)
+        .group_by(*columns)
+        .order_by(SalesDailyRollup.date)
+    )
+    if start:
+        stmt = stmt.where(SalesDailyRollup.date >= start)
+    if end:
+        stmt = stmt.where(SalesDailyRollup.date <= end)
+    if customer_ids:
+        stmt = stmt.where(SalesDailyRollup.customer_id.in_(customer_ids))
+    if book_ids:
+        stmt = stmt.where(SalesDailyRollup.book_id.in_(book_ids))
+    if series_ids:
+        stmt = stmt.where(Book.series_id.in_(series_ids))
+
+    series = {}
+    for row in db.session.execute(stmt):
+        day, sold, delivered, revenue = row[0], row[-3], row[-2], row[-1]
+        key, label = (row[1], row[2]) if group_by else (None, None)
+        points = series.setdefault(key, {"key": key, "label": label, "points": {}})["points"]
+        point = points.setdefault(period_of(day), {"sold_qty": 0, "delivered_qty": 0, "revenue": 0.0})
+        point["sold_qty"] += sold or 0
+        point["delivered_qty"] += delivered or 0
+        point["revenue"] = round(point["revenue"] + float(revenue or 0), 2)
+
+    return [
+        {
+            "key": s["key"],
+            "label": s["label"],
+            "points": [{"period": period.isoformat(), **p} for period, p in sorted(s["points"].items())],
+        }
+        for s in sorted(series.values(), key=lambda s: (s["label"] is None, s["label"] or ""))
+    ]
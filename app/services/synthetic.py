@@ -0,0 +1,158 @@
+"""Deterministic synthetic dataset for load tests and benchmarks (``flask seed --synthetic``).
+
+Each partner follows the real workflow month after month: an order is placed,
+approved and delivered, then a sales report sells part of the stock on hand
+(never more), before the next order. Now and then an order is cancelled
+instead of delivered. The partner's last order is left pending or approved.
+
+Rows are written with Core executemany in batches and explicit ids; the same
+parameters and seed always produce the same data. The change log is not
+written for generated rows.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import Book, Operation, OperationItem, Series, User, operation_totals
+from app.services.ledger import rebuild_customer_stock, rebuild_sales_rollup
+from app.services.workflow import rebuild_customer_workflow
+
+# Item lines buffered before they are written
+BATCH_ITEMS = 50_000
+
+SYNTHETIC_PASSWORD = "synthetic"
+
+
+class SyntheticWriter:
+    """Buffers operation and item rows, with ids following the existing ones."""
+
+    def __init__(self, prices):
+        self.prices = prices  # {book_id: unit_price}, for the item prices and operation totals
+        self.operations, self.items = [], []
+        self.next_op_id = (db.session.scalar(select(func.max(Operation.id))) or 0) + 1
+        self.next_item_id = (db.session.scalar(select(func.max(OperationItem.id))) or 0) + 1
+        self.counts = {"operations": 0, "items": 0}
+
+    def add(self, customer_id, type, status, created_at, lines):
+        op_id, self.next_op_id = self.next_op_id, self.next_op_id + 1
+        self.operations.append({
+            "id": op_id, "customer_id": customer_id, "type": type, "status": status,
+            "created_at": created_at, "date": created_at.date(),
+            **operation_totals((quantity, self.prices[book_id]) for book_id, quantity in lines),
+        })
+        for book_id, quantity in lines:
+            self.items.append({
+                "id": self.next_item_id, "operation_id": op_id, "book_id": book_id, "quantity": quantity,
+                "unit_price_at_time": self.prices[book_id],
+            })
+            self.next_item_id += 1
+        if len(self.items) >= BATCH_ITEMS:
+            self.flush()
+
+    def flush(self):
+        if self.operations:
+            db.session.execute(insert(Operation.__table__), self.operations)
+        if self.items:
+            db.session.execute(insert(OperationItem.__table__), self.items)
+        self.counts["operations"] += len(self.operations)
+        self.counts["items"] += len(self.items)
+        self.operations, self.items = [], []
+
+
+def _catalog(rng, titles, series):
+    """Create ``series`` series and ``titles`` books; returns {book_id: unit_price} of the new books."""
+    first_series = (db.session.scalar(select(func.max(Series.id))) or 0) + 1
+    first_book = (db.session.scalar(select(func.max(Book.id))) or 0) + 1
+    series_ids = list(range(first_series, first_series + series))
+    if series_ids:
+        db.session.execute(insert(Series.__table__), [
+            {"id": id, "name": f"Synthetic series {id}"} for id in series_ids
+        ])
+    books = [
+        {
+            "id": id, "title": f"Synthetic title {id}",
+            "unit_price": rng.choice((8, 9.9, 12.5, 14, 15.99, 19, 22)),
+            "series_id": rng.choice(series_ids) if series_ids and rng.random() < 0.6 else None,
+        }
+        for id in range(first_book, first_book + titles)
+    ]
+    db.session.execute(insert(Book.__table__), books)
+    return {b["id"]: b["unit_price"] for b in books}
+
+
+def _partners(count):
+    first = (db.session.scalar(select(func.max(User.id))) or 0) + 1
+    password_hash = generate_password_hash(SYNTHETIC_PASSWORD)  # hashing is slow: once for everyone
+    users = [
+        {
+            "id": id, "name": f"partner-{id}", "email": f"partner-{id}@synthetic.test",
+            "password_hash": password_hash, "role": "customer", "ledger_version": 0,
+        }
+        for id in range(first, first + count)
+    ]
+    db.session.execute(insert(User.__table__), users)
+    return [u["id"] for u in users]
+
+
+def _sync_sequences(tables):
+    """Explicit ids don't advance PostgreSQL sequences: move them past the new rows."""
+    if db.session.get_bind().dialect.name != "postgresql":
+        return
+    for table in tables:
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), (SELECT MAX(id) FROM \"{table}\"))"
+        ))
+
+
+def generate(partners=20, titles=50, series=5, years=2, orders_per_month=2, seed=42, end=None):
+    """Write a synthetic ledger and refresh the derived tables. The caller commits.
+
+    Returns {"partners", "books", "operations", "items"} counts.
+    """
+    rng = random.Random(seed)
+    prices = _catalog(rng, titles, series)
+    book_ids = list(prices)
+    customer_ids = _partners(partners)
+    writer = SyntheticWriter(prices)
+
+    end = end or date.today()
+    start = end - timedelta(days=365 * years)
+    cycles = max(1, round(12 * years * orders_per_month))
+    step = (end - start) / cycles  # one order + report per step
+
+    for customer_id in customer_ids:
+        stock = {}
+        catalog = rng.sample(book_ids, min(len(book_ids), rng.randint(5, 25)))
+        for cycle in range(cycles):
+            when = datetime.combine(start + step * cycle, datetime.min.time()) + timedelta(hours=rng.randint(8, 18))
+            lines = [(book_id, rng.randint(2, 12)) for book_id in rng.sample(catalog, min(len(catalog), rng.randint(1, 8)))]
+            if cycle == cycles - 1:
+                writer.add(customer_id, "order", rng.choice(("pending", "approved")), when, lines)
+                break
+            if rng.random() < 0.05:
+                writer.add(customer_id, "order", "cancelled", when, lines)
+                continue
+
+            writer.add(customer_id, "order", "delivered", when, lines)
+            for book_id, quantity in lines:
+                stock[book_id] = stock.get(book_id, 0) + quantity
+
+            # Sell part of what is on hand, a few days to weeks later
+            sold = [
+                (book_id, -rng.randint(1, on_hand))
+                for book_id, on_hand in stock.items() if on_hand and rng.random() < 0.7
+            ] or [(lines[0][0], -1)]  # always report something before the next order
+            for book_id, quantity in sold:
+                stock[book_id] += quantity
+            report_at = when + min(step * 0.8, timedelta(days=rng.randint(3, 20)))
+            writer.add(customer_id, "report", "recorded", report_at, sold)
+    writer.flush()
+    _sync_sequences(("book_series", "book", "user", "operation", "operation_item"))
+
+    rebuild_customer_stock()
+    rebuild_sales_rollup()
+    rebuild_customer_workflow()
+    return {"partners": len(customer_ids), "books": len(book_ids), **writer.counts}
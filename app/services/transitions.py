@@ -0,0 +1,127 @@
+"""Operation state changes as atomic compare-and-set statements.
+
+Every transition of ``TRANSITIONS`` runs as one conditional
+``UPDATE operation SET status=:target WHERE id IN (...) AND type=:type AND
+status IN (:sources) RETURNING id, customer_id``: only the rows still in an
+allowed status move, so two workers racing on the same operation can never
+both apply it. The loser simply gets no row back and reports a conflict; no
+lock is taken up front and nothing is retried.
+
+Report deletion is claimed the same way (status set to ``DELETED``) before
+its ledger effect is reversed and its rows are removed, in the caller's
+transaction. The ORM events don't see these statements, so the ledger,
+ledger versions, change log and customer workflow rows are updated here,
+in batch.
+"""
+from collections import namedtuple
+from datetime import date
+
+from sqlalchemy import delete, select, update
+
+from app.extensions import db
+from app.models import Operation, OperationItem, User, bump_ledger_versions, log_changes
+from app.services.ledger import apply_to_ledger
+from app.services.workflow import track_transition
+
+# Transient status of a report being deleted, never committed
+DELETED = "deleted"
+
+# type: operation type it applies to; sources: statuses it applies from (None: any);
+# target: new status; ledger: 1 enters the stock ledger, -1 leaves it, 0 no effect
+Transition = namedtuple("Transition", "type sources target ledger")
+TRANSITIONS = {
+    "approve": Transition("order", ("pending",), "approved", 0),
+    "deliver": Transition("order", ("approved",), "delivered", 1),
+    "withdraw": Transition("order", ("pending",), "cancelled", 0),  # by the customer
+    "cancel": Transition("order", ("pending", "approved"), "cancelled", 0),
+    "revoke": Transition("order", ("delivered",), "cancelled", -1),
+    "delete": Transition("report", None, DELETED, -1),
+}
+
+# Result of ``transition``: the action applied (None if none could be) and the
+# operation's type/status/customer afterwards (all None if it doesn't exist)
+Outcome = namedtuple("Outcome", "action id type status customer_id")
+
+# What the log events need about an order
+OrderInfo = namedtuple("OrderInfo", "id type status customer_id email books_count")
+
+
+def apply_transition(action, ids, customer_id=None, notes=None):
+    """Move the operations ``ids`` still allowed to through ``action``.
+
+    One conditional statement claims them; ``customer_id`` restricts it to
+    that customer's operations. Returns [(id, customer_id)] of those moved,
+    the others having been missing or in another status. The caller commits.
+    """
+    spec = TRANSITIONS[action]
+    table = Operation.__table__
+    criteria = [table.c.id.in_(ids), table.c.type == spec.type]
+    if spec.sources is not None:
+        criteria.append(table.c.status.in_(spec.sources))
+    if customer_id is not None:
+        criteria.append(table.c.customer_id == customer_id)
+    values = {"status": spec.target}
+    if spec.target == "delivered":
+        # The ledger, rollup and checkpoints count a delivery on the day it happens
+        values["date"] = date.today()
+    if notes and spec.type == "order":
+        values["notes"] = notes
+
+    moved = db.session.execute(
+        update(table).where(*criteria).values(**values).returning(table.c.id, table.c.customer_id)
+    ).all()
+    if not moved:
+        return []
+
+    moved_ids = [id for id, _ in moved]
+    connection = db.session.connection()
+    if spec.ledger:
+        apply_to_ledger(moved_ids, sign=spec.ledger)
+    bump_ledger_versions(connection, {customer for _, customer in moved})
+    if spec.target == DELETED:
+        items = OperationItem.__table__
+        item_ids = db.session.execute(
+            delete(items).where(items.c.operation_id.in_(moved_ids)).returning(items.c.id)
+        ).scalars().all()
+        db.session.execute(delete(table).where(table.c.id.in_(moved_ids)))
+        log_changes(connection, "operation_item", "delete", [{"id": id} for id in item_ids])
+        log_changes(connection, "operation", "delete", [{"id": id} for id in moved_ids])
+    else:
+        log_changes(connection, "operation", "update", [{"id": id, **values} for id in moved_ids])
+    track_transition(moved, spec.target)
+    return [tuple(row) for row in moved]
+
+
+def transition(operation_id, *actions, customer_id=None, notes=None):
+    """Apply to one operation the first of ``actions`` its status allows.
+
+    Each action is tried as its own compare-and-set statement, so at most
+    one is applied whatever happens concurrently. When none applies, the
+    operation is read once to tell why. The caller commits.
+    """
+    for action in actions:
+        moved = apply_transition(action, [operation_id], customer_id=customer_id, notes=notes)
+        if moved:
+            spec = TRANSITIONS[action]
+            target = None if spec.target == DELETED else spec.target
+            return Outcome(action, operation_id, spec.type, target, moved[0][1])
+
+    current = db.session.execute(
+        select(Operation.type, Operation.status, Operation.customer_id).where(Operation.id == operation_id)
+    ).first()
+    if current is None or (customer_id is not None and current.customer_id != customer_id):
+        return Outcome(None, None, None, None, None)
+    return Outcome(None, operation_id, *current)
+
+
+def order_infos(ids):
+    """{id: OrderInfo} for the operations ``ids``, with one query."""
+    return {
+        row.id: OrderInfo(*row)
+        for row in db.session.execute(
+            select(Operation.id, Operation.type, Operation.status, Operation.customer_id, User.email,
+                   Operation.total_quantity)
+            .join(User, Operation.customer_id == User.id)
+            .where(Operation.id.in_(ids))
+        )
+    }
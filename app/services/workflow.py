@@ -0,0 +1,152 @@
+"""Order admission from the per-customer workflow state (``customer_workflow``).
+
+A customer may request a delivery when they have no order yet, or when
+their last order is no longer pending and a sales report was filed since.
+Instead of looking for the last order and a later report, ``admit_order``
+checks and claims the customer's row with a single conditional UPDATE: the
+row lock it takes makes concurrent requests from the same customer queue up
+behind it and then see the claimed state, without locking any table.
+"""
+from collections import namedtuple
+
+from sqlalchemy import and_, exists, func, or_, select, tuple_, update
+from sqlalchemy.orm import aliased
+
+from app.extensions import db
+from app.models import LIVE_ORDER_STATUSES, CustomerWorkflow, Operation, User
+from app.services.ledger import upsert
+
+# Why an order is refused
+ORDER_PENDING = "pending"  # the last order is still pending
+REPORT_REQUIRED = "report_required"  # no sales report since the last order
+
+# Whether a customer may order now: refused is None or why not
+Admission = namedtuple("Admission", "refused last_order_status reported_since")
+
+
+def admit_order(op):
+    """Add the new order ``op`` (customer_id set) if its customer may order now.
+
+    Returns None when it was added, else ORDER_PENDING or REPORT_REQUIRED.
+    The caller commits.
+    """
+    workflow = CustomerWorkflow.__table__
+    claim = (
+        update(workflow)
+        .where(
+            workflow.c.customer_id == op.customer_id,
+            or_(
+                workflow.c.last_order_id.is_(None),
+                and_(workflow.c.last_order_status != "pending", workflow.c.reported_since),
+            ),
+        )
+        .values(last_order_status="pending", reported_since=False)
+    )
+    if not db.session.execute(claim).rowcount:
+        state = db.session.execute(
+            select(workflow.c.last_order_status).where(workflow.c.customer_id == op.customer_id)
+        ).first()
+        if state is None:  # customer created outside the ORM: derive their row once
+            rebuild_customer_workflow([op.customer_id])
+            return admit_order(op)
+        return ORDER_PENDING if state.last_order_status == "pending" else REPORT_REQUIRED
+
+    db.session.add(op)
+    db.session.flush()  # the insert makes it the customer's last order
+    return None
+
+
+def order_admission(customer_id):
+    """What ``admit_order`` would decide for ``customer_id`` now, without claiming anything."""
+    state = db.session.execute(
+        select(CustomerWorkflow.last_order_id, CustomerWorkflow.last_order_status, CustomerWorkflow.reported_since)
+        .where(CustomerWorkflow.customer_id == customer_id)
+    ).first()
+    if state is None:  # no row yet: derive it, admit_order will store it
+        last = db.session.execute(last_orders([customer_id])).first()
+        state = (last.id, last.status, bool(last.reported_since)) if last else (None, None, False)
+    last_order_id, status, reported = state
+    if last_order_id is None or (status != "pending" and reported):
+        refused = None
+    else:
+        refused = ORDER_PENDING if status == "pending" else REPORT_REQUIRED
+    return Admission(refused, status, reported)
+
+
+def track_transition(moved, status):
+    """Reflect orders ``moved`` [(id, customer_id)] to ``status`` in the workflow rows.
+
+    Approval and delivery only update the last order's status; a cancellation
+    or a report deletion can change which order is last or whether a report
+    followed it, so those customers' rows are recomputed.
+    """
+    if status in LIVE_ORDER_STATUSES:
+        workflow = CustomerWorkflow.__table__
+        db.session.execute(
+            update(workflow)
+            .where(workflow.c.last_order_id.in_([id for id, _ in moved]))
+            .values(last_order_status=status)
+        )
+    else:
+        rebuild_customer_workflow({customer_id for _, customer_id in moved})
+
+
+def last_orders(customer_ids=None):
+    """(customer_id, order_id, status, reported_since) of each customer's last order not cancelled."""
+    ranked = (
+        select(
+            Operation.customer_id, Operation.id, Operation.status, Operation.created_at,
+            func.row_number().over(
+                partition_by=Operation.customer_id,
+                order_by=(Operation.created_at.desc(), Operation.id.desc()),
+            ).label("rank"),
+        )
+        .where(Operation.type == "order", Operation.status.in_(LIVE_ORDER_STATUSES))
+    )
+    if customer_ids is not None:
+        ranked = ranked.where(Operation.customer_id.in_(customer_ids))
+    ranked = ranked.subquery()
+    report = aliased(Operation)
+    reported = exists().where(
+        report.customer_id == ranked.c.customer_id,
+        report.type == "report",
+        tuple_(report.created_at, report.id) > tuple_(ranked.c.created_at, ranked.c.id),
+    )
+    return select(ranked.c.customer_id, ranked.c.id, ranked.c.status, reported.label("reported_since")).where(
+        ranked.c.rank == 1
+    )
+
+
+def rebuild_customer_workflow(customer_ids=None):
+    """Recompute customer_workflow rows from the operations.
+
+    Every customer by default, or the users ``customer_ids`` whatever their role.
+    The existing rows are locked first, so an admission running meanwhile is
+    either seen or waits; missing rows are inserted unless another transaction
+    created them first. Returns the number of rows written. The caller commits.
+    """
+    if customer_ids is None:
+        customers = select(User.id).where(User.role == "customer")
+    else:
+        customers = select(User.id).where(User.id.in_(customer_ids))
+    existing = set(db.session.scalars(
+        select(CustomerWorkflow.customer_id)
+        .where(CustomerWorkflow.customer_id.in_(customers))
+        .with_for_update()
+    ))
+    states = {
+        id: {"customer_id": id, "last_order_id": None, "last_order_status": None, "reported_since": False}
+        for id in db.session.scalars(customers)
+    }
+    for customer_id, order_id, status, reported in db.session.execute(last_orders(customer_ids)):
+        if customer_id in states:
+            states[customer_id].update(last_order_id=order_id, last_order_status=status, reported_since=bool(reported))
+
+    updates = [row for id, row in states.items() if id in existing]
+    inserts = [row for id, row in states.items() if id not in existing]
+    if updates:
+        db.session.execute(update(CustomerWorkflow), updates)
+    if inserts:
+        # A row created meanwhile (by a concurrent admission or rebuild) is as recent: keep it
+        db.session.execute(upsert(CustomerWorkflow).on_conflict_do_nothing(index_elements=["customer_id"]), inserts)
+    return len(states)
@@ -332,7 +332,7 @@ async function loadAdminOperations() {
       <td>
         <button class="viewItemsBtn btn">View items</button>
         <button data-action="delete" data-id="${op.id}" class="btn btn-danger">Delete</button>
-        ${op.type === "order" && op.status === "pending" ? `<button data-action=\"confirm\" data-id=\"${op.id}\" class=\"btn btn-accent\">Confirm</button>` : ""}
+        ${op.type === "order" && op.status === "pending" ? `<button data-action=\"confirm\" data-id=\"${op.id}\" data-status=\"${op.status}\" class=\"btn btn-accent\">Confirm</button>` : ""}
       </td>
     `;
     tbody.appendChild(tr);
@@ -347,7 +347,10 @@ document.getElementById("admin-ops-table")?.addEventListener("click", async (e)
   const id = e.target.dataset.id;
   const action = e.target.dataset.action;
   if (action === "confirm") {
-    await apiFetch(`/api/admin/orders/${id}/confirm`, { method: "PUT" });
+    await apiFetch(`/api/admin/orders/${id}/confirm`, {
+      method: "PUT",
+      body: JSON.stringify({ expected_status: e.target.dataset.status })
+    });
   } else if (action === "delete") {
     await apiFetch(`/api/admin/operations/${id}`, { method: "DELETE" });
   }
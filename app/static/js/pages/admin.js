@@ -58,7 +58,10 @@ export async function mountAdmin(loaded) {
                         let successMessage = "";
                         let notes = "";
                         if (action === "confirm") {
-                            await apiFetch(`/api/admin/orders/${id}/confirm`, { method: "PUT" });
+                            await apiFetch(`/api/admin/orders/${id}/confirm`, {
+                                method: "PUT",
+                                body: JSON.stringify({ expected_status: status })
+                            });
                             successMessage = status === "approved" ? "Commande livrée" : "Commande approuvée";
                         } else if (action === "delete") {
                             if (type === "order") {
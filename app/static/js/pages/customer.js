@@ -1,7 +1,7 @@
 import { $, show, hide } from '../utils/dom.js';
 import { bindTabs } from '../ui/tabs.js';
 import { bindUserMenu } from '../ui/userMenu.js';
-import { apiFetch, loadBooks, loadCustomerOrders, loadInventory, loadStats, refreshBooksStock, refreshOrderBlockedState } from '../utils/api.js';
+import { apiFetch, customerOrdersExtendedView, loadBooks, loadCustomerOrders, loadInventory, loadMoreCustomerOrders, loadStats, refreshBooksStock, refreshOrderBlockedState } from '../utils/api.js';
 import { delegate } from '../utils/events.js';
 import { bindOrderForm } from '../features/orderForm.js';
 
@@ -24,7 +24,7 @@ function startStatsAutoRefresh() {
     const opsPane = document.getElementById('ops-tab');
     const tasks = [];
     if (statsPane?.classList.contains('active')) tasks.push(loadStats({ silent: true }));
-    if (historyPane?.classList.contains('active')) {
+    if (historyPane?.classList.contains('active') && !customerOrdersExtendedView()) {
       tasks.push(loadCustomerOrders(getActiveHistoryFilter(), { silent: true }));
     }
     if (inventoryPane?.classList.contains('active')) tasks.push(loadInventory({ silent: true }));
@@ -100,6 +100,11 @@ export async function mountCustomer(loaded) {
           }
         }
       ),
+      delegate(
+        customerHistory, 'click', '#history-load-more', async () => {
+          await loadMoreCustomerOrders(getActiveHistoryFilter());
+        }
+      ),
       delegate(
         customerHistory, 'click', 'button.filter-btn', async (e) => {
           historyFilter = e.target.dataset.filter || '';
@@ -440,51 +440,13 @@ export function setOrderBlockedState(blocked, message = fr.form.states.cannotOrd
 
 export async function refreshOrderBlockedState(options = {}) {
   try {
-    const res = await apiFetch("/api/operations", options);
-    const rows = res.data || [];
-    const orders = rows.filter(op => op.type === "order" && op.status !== "cancelled");
-    const reports = rows.filter(op => op.type === "report");
-    const hasPending = orders.some(op => op.status === "pending" || op.status === "approved");
-    let lastOrder = null;
-    const opTime = (op) => {
-      const ts = op?.created_at || op?.createdAt || op?.date || "";
-      const parsed = Date.parse(ts);
-      return Number.isFinite(parsed) ? parsed : null;
-    };
-    orders.forEach(op => {
-      if (!lastOrder) {
-        lastOrder = op;
-        return;
-      }
-      const aTime = opTime(op);
-      const bTime = opTime(lastOrder);
-      if (Number.isFinite(aTime) && Number.isFinite(bTime)) {
-        if (aTime > bTime || (aTime === bTime && (op.id || 0) > (lastOrder.id || 0))) {
-          lastOrder = op;
-        }
-      } else if ((op.id || 0) > (lastOrder.id || 0)) {
-        lastOrder = op;
-      }
-    });
-
-    let reportRequired = false;
-    let hasDelivery = false;
-    if (lastOrder && lastOrder.status === "delivered") {
-      hasDelivery = true;
-      const orderTime = opTime(lastOrder);
-      const reportAfter = reports.some(r => {
-        const reportTime = opTime(r);
-        if (Number.isFinite(reportTime) && Number.isFinite(orderTime)) {
-          if (reportTime > orderTime) return true;
-          if (reportTime === orderTime) return (r.id || 0) > (lastOrder.id || 0);
-          return false;
-        }
-        return (r.id || 0) > (lastOrder.id || 0);
-      });
-      reportRequired = !reportAfter;
-    }
+    // The server decides from the customer's workflow state, not from a page of history
+    const res = await apiFetch("/api/orders/admission", options);
+    const admission = res.data || {};
+    const hasDelivery = admission.last_order_status === "delivered";
+    const reportRequired = admission.refused === "report_required" && hasDelivery;
 
-    const blocked = hasPending || reportRequired;
+    const blocked = Boolean(admission.refused);
     const message = reportRequired ? fr.form.states.reportRequired : fr.form.states.cannotOrderPending;
     setOrderBlockedState(blocked, message);
 
@@ -537,17 +499,33 @@ export async function loadInventory(options = {}) {
   }
 }
 
-export async function loadCustomerOrders(typeFilter = "", options = {}) {
+// Cursor of the next history page, null once everything is shown
+let customerOrdersCursor = null;
+// Whether older pages were appended (the auto-refresh then leaves the list alone)
+let customerOrdersExtended = false;
+
+export function customerOrdersExtendedView() {
+  return customerOrdersExtended;
+}
+
+export async function loadCustomerOrders(typeFilter = "", options = {}, cursor = null) {
   // if (loginForm) loginForm.parentNode.classList.add("hidden");
-  const res = await apiFetch(`/api/operations?type=${typeFilter}`, options); // assumes Option A endpoints
+  const query = new URLSearchParams({ type: typeFilter });
+  if (cursor) query.set("cursor", cursor);
+  const res = await apiFetch(`/api/operations?${query}`, options); // assumes Option A endpoints
   applyNoteHeadersLabel();
   const table = document.getElementById("orders-table");
   const tbody = document.querySelector("#orders-table tbody");
   const empty = document.getElementById("history-empty-state");
-  tbody.innerHTML = "";
+  const more = document.getElementById("history-load-more");
+  if (!cursor) tbody.innerHTML = "";
+
+  customerOrdersCursor = res.next_cursor || null;
+  customerOrdersExtended = Boolean(cursor);
+  if (more) more.classList.toggle("hidden", !customerOrdersCursor);
 
   const rows = res.data || [];
-  if (rows.length === 0) {
+  if (!cursor && rows.length === 0) {
     if (empty) empty.classList.remove("hidden");
     if (table) table.classList.add("hidden");
     return;
@@ -578,6 +556,10 @@ export async function loadCustomerOrders(typeFilter = "", options = {}) {
   });
 }
 
+export async function loadMoreCustomerOrders(typeFilter = "") {
+  if (customerOrdersCursor) await loadCustomerOrders(typeFilter, {}, customerOrdersCursor);
+}
+
 export async function loadStats(options = {}) {
   const customerId = resolveTargetCustomerId();
   const res = await apiFetch(`/api/users/${customerId}/stats`, options);
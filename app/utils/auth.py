@@ -0,0 +1,125 @@
+# utils/auth.py
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from flask_jwt_extended import get_current_user
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import User
+from app.utils.helpers import error_response
+
+# Who is making the request, as currently stored (not as the token says)
+Principal = namedtuple("Principal", "id role name email")
+
+
+class PrincipalCache:
+    """Short-TTL in-process cache of user profiles, keyed by user id.
+
+    ``ttl`` is in seconds; 0 disables caching. Entries are dropped as soon as
+    a change to the user (profile, role, deletion) commits in this process;
+    changes made elsewhere are seen within ``ttl``.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def put(self, principal):
+        if self.ttl:
+            with self._lock:
+                self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+def init_principal_cache(app):
+    app.extensions["principal_cache"] = PrincipalCache(ttl=app.config["PRINCIPAL_CACHE_TTL"])
+
+
+def principal_cache():
+    return current_app.extensions["principal_cache"]
+
+
+def init_principal_loader(jwt):
+    """Load the principal of every verified token; a user gone since gets a 401."""
+
+    @jwt.user_lookup_loader
+    def _lookup_principal(jwt_header, jwt_data):
+        return load_principal(jwt_data["sub"])
+
+    @jwt.user_lookup_error_loader
+    def _unknown_principal(jwt_header, jwt_data):
+        return error_response("User no longer exists", 401, "auth")
+
+
+def current_principal(optional=False):
+    """Identity and role of the current request's user, loaded for its verified JWT.
+
+    The role is the stored one, through the principal cache, not the token
+    claim: a demoted user loses access within PRINCIPAL_CACHE_TTL at most.
+    Returns None when no token was verified for this request and
+    ``optional`` is set.
+    """
+    try:
+        principal = get_current_user()
+    except RuntimeError:  # no @jwt_required on this request
+        principal = None
+    if principal is None and not optional:
+        raise RuntimeError("current_principal() needs a verified JWT")
+    return principal
+
+
+def load_principal(user_id):
+    """Full principal (with name/email) for ``user_id``, through the principal cache."""
+    user_id = int(user_id)
+    cache = principal_cache()
+    principal = cache.get(user_id)
+    if principal is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        principal = cache_principal(user)
+    return principal
+
+
+def cache_principal(user):
+    """Put the principal of the loaded ``user`` in the cache and return it."""
+    principal = Principal(user.id, user.role, user.name, user.email)
+    principal_cache().put(principal)
+    return principal
+
+
+# A committed change to a user drops their cached principal
+@event.listens_for(Session, "after_flush")
+def _track_user_changes(session, flush_context):
+    changed = {obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, User)}
+    if changed:
+        session.info.setdefault("users_changed", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_principals(session):
+    changed = session.info.pop("users_changed", ())
+    if changed and has_app_context():
+        cache = current_app.extensions.get("principal_cache")
+        if cache:
+            for user_id in changed:
+                cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_changes(session):
+    session.info.pop("users_changed", None)
@@ -1,18 +1,54 @@
 # utils/decorators.py
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
+import hashlib
+from flask import jsonify, make_response, request
 from functools import wraps
+from sqlalchemy import select
+from app.extensions import db
 from app.models import User
+from app.utils.auth import current_principal
 from app.utils.helpers import error_response
 
 def role_required(role):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            user_id = get_jwt_identity()
-            user = User.query.get(user_id)
-            if not user or user.role != role:
+            # Stored role, through the principal cache (a gone user was refused a 401 already)
+            principal = current_principal(optional=True)
+            if not principal or principal.role != role:
                 return error_response(f"Forbidden to {role}", 403, "auth")
             return fn(*args, **kwargs)
         return wrapper
     return decorator
+
+def ledger_etag(customer_of):
+    """Conditional GET for views reading one customer's ledger.
+
+    ``customer_of(**view_kwargs)`` names the customer whose data the request
+    reads, or None when the view should run unconditionally (e.g. admin-wide
+    reads, or a request the view will reject). The ETag is derived from that
+    customer's ``ledger_version`` and the full URL, so a matching
+    If-None-Match is answered with 304 before any ledger table is touched.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            customer_id = customer_of(**kwargs)
+            version = None
+            if customer_id is not None:
+                version = db.session.scalar(select(User.ledger_version).where(User.id == customer_id))
+            if version is None:
+                return fn(*args, **kwargs)
+
+            key = f"{customer_id}:{version}:{request.full_path}"
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                resp = make_response("", 304)
+            else:
+                resp = make_response(fn(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag)
+            resp.cache_control.no_cache = True
+            return resp
+        return wrapper
+    return decorator
@@ -1,4 +1,7 @@
-from flask import jsonify
+import base64
+from datetime import date, datetime
+from flask import current_app, jsonify, request
+from marshmallow import ValidationError
 
 def error_res(message, status_code: int = 400, field = None):
     """
@@ -42,3 +45,62 @@ def error_response(message, status_code: int = 400, field=None):
 
     return jsonify(payload), status_code
 
+
+def date_arg(name):
+    """Read an optional ISO date (YYYY-MM-DD) from the query string.
+
+    Invalid values raise a ValidationError, rendered as a 400 by the app's
+    error handler.
+    """
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ValidationError({name: ["Invalid date, expected YYYY-MM-DD"]})
+
+
+def encode_cursor(created_at, id):
+    """Opaque pagination cursor for the row keyed (created_at, id)."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{id}".encode()).decode().rstrip("=")
+
+
+def cursor_arg(name="cursor"):
+    """Decode an optional pagination cursor into a (created_at, id) key."""
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    try:
+        created_at, id = base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)).decode().split("|")
+        return datetime.fromisoformat(created_at), int(id)
+    except ValueError:  # also covers bad base64 / utf-8
+        raise ValidationError({name: ["Invalid cursor"]})
+
+
+def limit_arg(default_key, name="limit", max_key="MAX_PAGE_SIZE"):
+    """Page size from the query string, defaulting to ``app.config[default_key]``
+    and capped at ``app.config[max_key]``."""
+    raw = request.args.get(name)
+    if raw is None:
+        return current_app.config[default_key]
+    try:
+        limit = int(raw)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= current_app.config[max_key]:
+        raise ValidationError({name: [f"Must be between 1 and {current_app.config[max_key]}"]})
+    return limit
+
+
+def flag_arg(name, default=True):
+    """Optional boolean from the query string: 1/true/yes or 0/false/no."""
+    raw = request.args.get(name)
+    if raw is None:
+        return default
+    value = raw.strip().lower()
+    if value in ("1", "true", "yes"):
+        return True
+    if value in ("0", "false", "no"):
+        return False
+    raise ValidationError({name: ["Must be true or false"]})
@@ -0,0 +1,85 @@
+# utils/json_provider.py
+import dataclasses
+import decimal
+import json
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:  # optional C-backed encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(o):
+    """Types the encoders don't know natively, serialized like Flask does."""
+    if isinstance(o, decimal.Decimal):
+        return str(o)  # keeps the exact unit_price, e.g. "12.50"
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider encoding with orjson when available, stdlib json otherwise.
+
+    Both backends write Decimal as a string and date/datetime as ISO 8601, and
+    honour ``sort_keys``. Non-string dict keys (e.g. book ids) become strings,
+    as with stdlib json.
+    """
+
+    def __init__(self, app, use_orjson=None):
+        super().__init__(app)
+        self.use_orjson = orjson is not None if use_orjson is None else use_orjson
+        if self.use_orjson and orjson is None:
+            raise RuntimeError("JSON_BACKEND=orjson but orjson is not installed")
+
+    def _orjson_options(self, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if self.use_orjson:
+            return self.dumps_bytes(obj, indent=kwargs.get("indent")).decode()
+        kwargs.setdefault("default", _default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj, indent=None):
+        if self.use_orjson:
+            return orjson.dumps(obj, default=_default, option=self._orjson_options(indent))
+        return self.dumps(obj, indent=indent).encode()
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.compact is False or (self.compact is None and self._app.debug) else None
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Install the JSON provider picked by ``JSON_BACKEND``.
+
+    "auto" (default) uses orjson if installed and stdlib json otherwise,
+    "orjson" / "stdlib" force one, "flask" keeps Flask's default provider.
+    """
+    backend = app.config["JSON_BACKEND"]
+    if backend == "flask":
+        return
+    if backend not in ("auto", "orjson", "stdlib"):
+        raise RuntimeError(f"Unknown JSON_BACKEND {backend!r}")
+    app.json = FastJSONProvider(app, use_orjson=None if backend == "auto" else backend == "orjson")
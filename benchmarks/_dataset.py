@@ -0,0 +1,92 @@
+"""Shared helpers for the benchmark scripts (not used by the app)."""
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.extensions import db
+from app.models import Book, Operation, OperationItem, User, operation_totals
+from app.services.ledger import rebuild_customer_stock
+
+
+def bench_app(path=None):
+    """Flask app bound to a throw-away SQLite file."""
+    path = path or os.path.join(tempfile.mkdtemp(prefix="toplivres-bench-"), "bench.db")
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "JWT_SECRET_KEY": "bench-secret",
+    })
+
+
+def build_dataset(customers=200, books=300, cycles=120, items_per_op=8, seed=1):
+    """Bulk-load a synthetic ledger: per customer, `cycles` delivered orders
+    each followed by a sales report, and a pending order for every 3rd one."""
+    rng = random.Random(seed)
+    db.session.execute(insert(User), [
+        {"id": i, "name": f"partner-{i}", "email": f"p{i}@bench.test",
+         "password_hash": "x", "role": "customer"}
+        for i in range(1, customers + 1)
+    ])
+    prices = {i: rng.randint(500, 3000) / 100 for i in range(1, books + 1)}
+    db.session.execute(insert(Book), [
+        {"id": i, "title": f"Title {i}", "unit_price": price} for i, price in prices.items()
+    ])
+
+    ops, items = [], []
+    start = datetime(2019, 1, 1)
+    op_id = 0
+    for customer_id in range(1, customers + 1):
+        when = start + timedelta(hours=rng.randint(0, 72))
+        for cycle in range(cycles + (customer_id % 3 == 0)):
+            pending = cycle == cycles
+            for kind in (("order",) if pending else ("order", "report")):
+                op_id += 1
+                when += timedelta(days=rng.randint(3, 12), minutes=rng.randint(0, 600))
+                lines = [
+                    (book_id, rng.randint(2, 10) if kind == "order" else -1)
+                    for book_id in rng.sample(range(1, books + 1), items_per_op)
+                ]
+                ops.append({
+                    "id": op_id, "customer_id": customer_id, "type": kind,
+                    "status": "pending" if pending else ("delivered" if kind == "order" else "recorded"),
+                    "created_at": when, "date": when.date(),
+                    **operation_totals((quantity, prices[book_id]) for book_id, quantity in lines),
+                })
+                items.extend(
+                    {"operation_id": op_id, "book_id": book_id, "quantity": quantity, "unit_price_at_time": prices[book_id]}
+                    for book_id, quantity in lines
+                )
+    db.session.execute(insert(Operation), ops)
+    db.session.execute(insert(OperationItem), items)
+    rebuild_customer_stock()
+    db.session.commit()
+    return {"customers": customers, "books": books, "operations": len(ops), "items": len(items)}
+
+
+@contextmanager
+def count_queries(engine):
+    """Count statements executed on `engine` inside the block."""
+    counter = {"count": 0}
+
+    def _count(*args, **kwargs):
+        counter["count"] += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+
+def timed(fn, repeat):
+    """Run fn() `repeat` times and return the mean wall time in ms."""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
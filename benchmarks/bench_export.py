@@ -0,0 +1,45 @@
+"""Memory and throughput of the streaming CSV export.
+
+Usage: `python -m benchmarks.bench_export [--cycles 40,160,640]`
+
+Consumes ``csv_chunks`` over growing ledgers and reports the item lines
+written, the time taken and the peak Python memory, which should stay flat.
+"""
+import argparse
+import time
+import tracemalloc
+
+from app.extensions import db
+from app.models import OperationItem, Operation
+from app.services.export import csv_chunks, export_statement
+from benchmarks._dataset import bench_app, build_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=100)
+    parser.add_argument("--cycles", default="40,160,640")
+    args = parser.parse_args()
+
+    print(f"{'item lines':>12}{'MB sent':>10}{'seconds':>10}{'peak KiB':>10}")
+    for cycles in (int(c) for c in args.cycles.split(",")):
+        app = bench_app()
+        with app.app_context():
+            db.create_all()
+            build_dataset(customers=args.customers, cycles=cycles)
+            db.session.expunge_all()
+
+            tracemalloc.start()
+            t0, sent = time.perf_counter(), 0
+            for chunk in csv_chunks(export_statement()):
+                sent += len(chunk)
+            elapsed = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1] / 1024
+            tracemalloc.stop()
+
+            lines = db.session.query(OperationItem).join(Operation).count()
+            print(f"{lines:>12}{sent / 1e6:>10.1f}{elapsed:>10.2f}{peak:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
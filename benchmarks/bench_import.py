@@ -0,0 +1,72 @@
+"""Throughput of `flask import-sheets` on generated legacy sheets.
+
+Usage: `python -m benchmarks.bench_import [--partners 50] [--years 5]`
+
+Writes one CSV per partner (weekly delivery and sales lines over the given
+years) and times ``import_sheets`` over all of them.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import Book, User
+from app.services.sheets_import import import_sheets
+from benchmarks._dataset import bench_app
+
+
+def write_sheets(directory, partners, books, years, seed=1):
+    rng = random.Random(seed)
+    paths, lines = [], 0
+    for p in range(1, partners + 1):
+        path = os.path.join(directory, f"partner-{p}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["partenaire", "date", "type", "titre", "quantité"])
+            day = date(2024 - years, 1, 1)
+            while day.year < 2024:
+                kind = "livraison" if day.isocalendar()[1] % 4 == 0 else "vente"
+                for book in rng.sample(range(1, books + 1), 8):
+                    writer.writerow([f"partner-{p}", day.strftime("%d/%m/%Y"), kind, f"Title {book}", rng.randint(1, 9)])
+                    lines += 1
+                day += timedelta(days=7)
+        paths.append(path)
+    return paths, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--partners", type=int, default=50)
+    parser.add_argument("--books", type=int, default=300)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [
+            {"id": i, "name": f"partner-{i}", "email": f"p{i}@bench.test", "password_hash": "x", "role": "customer"}
+            for i in range(1, args.partners + 1)
+        ])
+        db.session.execute(insert(Book), [
+            {"id": i, "title": f"Title {i}", "unit_price": 10} for i in range(1, args.books + 1)
+        ])
+        db.session.commit()
+
+        paths, lines = write_sheets(tempfile.mkdtemp(prefix="toplivres-sheets-"), args.partners, args.books, args.years)
+        t0 = time.perf_counter()
+        result = import_sheets(paths)
+        db.session.commit()
+        elapsed = time.perf_counter() - t0
+        print(f"{lines} lines in {len(paths)} files -> {result.operations} operations, {result.items} items "
+              f"in {elapsed:.2f}s ({lines / elapsed:,.0f} lines/s)")
+
+
+if __name__ == "__main__":
+    main()
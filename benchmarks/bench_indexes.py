@@ -0,0 +1,120 @@
+"""Before/after benchmark for the operation access-path indexes.
+
+Usage: `python -m benchmarks.bench_indexes [--customers 200] [--cycles 120]`
+
+Loads a synthetic ledger into a temporary SQLite file, times the hot queries
+with the secondary indexes dropped, then again with them created.
+"""
+import argparse
+import random
+
+from sqlalchemy import case, desc, or_, and_, select, func
+
+from app.extensions import db
+from app.models import Operation, OperationItem
+from app.services.workflow import last_orders
+from benchmarks._dataset import bench_app, build_dataset, timed
+
+INDEXED_TABLES = (Operation.__table__, OperationItem.__table__)
+
+
+def hot_queries(customer_ids):
+    rng = random.Random(7)
+    pick = lambda: rng.choice(customer_ids)
+    type_rank = case((Operation.type == "order", 0), else_=1)
+    actionable = and_(Operation.type == "order", Operation.status.in_(["pending", "approved"]))
+
+    def history():
+        db.session.execute(
+            select(Operation.id).where(Operation.customer_id == pick())
+            .order_by(Operation.created_at.desc(), Operation.id.desc())
+        ).all()
+
+    def list_orders():
+        db.session.execute(
+            select(Operation.id).where(
+                Operation.customer_id == pick(), Operation.type == "order",
+                Operation.status.in_(["delivered", "approved", "pending"]),
+            )
+        ).all()
+
+    def list_sales():
+        db.session.execute(
+            select(Operation.id).where(Operation.customer_id == pick(), Operation.type == "report")
+        ).all()
+
+    def admin_actionable():
+        db.session.execute(
+            select(Operation.id).where(actionable)
+            .order_by(type_rank, desc(Operation.created_at), desc(Operation.id))
+        ).all()
+
+    def admin_history():
+        db.session.execute(
+            select(Operation.id).where(~actionable)
+            .order_by(desc(Operation.created_at), desc(Operation.id)).limit(25)
+        ).all()
+
+    def items_by_book():
+        db.session.execute(
+            select(OperationItem.book_id, func.sum(OperationItem.quantity))
+            .join(Operation, OperationItem.operation_id == Operation.id)
+            .where(Operation.customer_id == pick(), or_(
+                and_(Operation.type == "order", Operation.status == "delivered"),
+                Operation.type == "report",
+            ))
+            .group_by(OperationItem.book_id)
+        ).all()
+
+    return {
+        "workflow last_orders": lambda: db.session.execute(last_orders([pick()])).all(),
+        "get_history": history,
+        "list_orders": list_orders,
+        "list_sales": list_sales,
+        "all_operations.actionable": admin_actionable,
+        "all_operations.history": admin_history,
+        "operation_item by book": items_by_book,
+    }
+
+
+def set_indexes(enabled):
+    engine = db.engine
+    for table in INDEXED_TABLES:
+        for index in table.indexes:
+            if enabled:
+                index.create(engine, checkfirst=True)
+            else:
+                index.drop(engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--books", type=int, default=300)
+    parser.add_argument("--cycles", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        sizes = build_dataset(customers=args.customers, books=args.books, cycles=args.cycles)
+        print("dataset: " + ", ".join(f"{k}={v}" for k, v in sizes.items()))
+
+        customer_ids = list(range(1, args.customers + 1))
+        results = {}
+        for label, enabled in (("before", False), ("after", True)):
+            set_indexes(enabled)
+            for name, fn in hot_queries(customer_ids).items():
+                results.setdefault(name, {})[label] = timed(fn, args.repeat)
+            db.session.rollback()
+
+        print(f"{'query':<28}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for name, r in results.items():
+            print(f"{name:<28}{r['before']:>12.3f}{r['after']:>12.3f}{r['before'] / r['after']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
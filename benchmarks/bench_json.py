@@ -0,0 +1,53 @@
+"""Response encoding: Flask's default JSON provider vs. FastJSONProvider.
+
+Usage: `python -m benchmarks.bench_json [--sizes 100,1000,10000]`
+
+Encodes admin-history-like payloads (read-model dumps) and the book catalog
+(with Decimal prices) through ``provider.response()``, the path ``jsonify``
+and dict returns take.
+"""
+import argparse
+
+from flask.json.provider import DefaultJSONProvider
+
+from app.extensions import db
+from app.models import Book, Operation
+from app.schemas import BookSchema
+from app.services.read_models import dump_operations, operation_rows
+from app.utils.json_provider import FastJSONProvider, orjson
+from benchmarks._dataset import bench_app, build_dataset, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    app = bench_app()
+    providers = {"flask": DefaultJSONProvider(app), "stdlib": FastJSONProvider(app, use_orjson=False)}
+    if orjson is not None:
+        providers["orjson"] = FastJSONProvider(app, use_orjson=True)
+    else:
+        print("orjson not installed: skipping it")
+
+    with app.app_context(), app.test_request_context():
+        db.create_all()
+        customers = 50
+        build_dataset(customers=customers, cycles=max(sizes) // (2 * customers) + 1)
+
+        payloads = {
+            f"history x{size}": {"data": dump_operations(operation_rows(order_by=(Operation.id.desc(),), limit=size))}
+            for size in sizes
+        }
+        payloads["catalog (Decimal)"] = {"data": BookSchema(many=True).dump(Book.query.all())}
+
+        print(f"{'payload':<20}" + "".join(f"{name + ' ms':>13}" for name in providers))
+        for label, payload in payloads.items():
+            times = [timed(lambda: p.response(payload), args.repeat) for p in providers.values()]
+            print(f"{label:<20}" + "".join(f"{t:>13.3f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Operation list serialization: ORM + OperationSchema vs. read models.
+
+Usage: `python -m benchmarks.bench_read_models [--sizes 100,1000,10000]`
+
+For each size, loads that many operations (with their items, books and
+customer) and serializes them, once through ORM entities dumped by
+``OperationSchema(many=True)`` and once through ``operation_rows`` +
+``dump_operations``. Reports mean latency and peak Python memory.
+"""
+import argparse
+import tracemalloc
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.extensions import db
+from app.models import Operation, OperationItem
+from app.schemas import OperationSchema
+from app.services.read_models import dump_operations, operation_rows
+from benchmarks._dataset import bench_app, build_dataset, timed
+
+ORDER = (Operation.id.desc(),)
+
+
+def orm_dump(limit):
+    db.session.expunge_all()
+    ops = (
+        Operation.query
+        .options(
+            selectinload(Operation.items).joinedload(OperationItem.book),
+            joinedload(Operation.customer),
+        )
+        .order_by(*ORDER).limit(limit).all()
+    )
+    return OperationSchema(many=True).dump(ops)
+
+
+def read_model_dump(limit):
+    return dump_operations(operation_rows(order_by=ORDER, limit=limit))
+
+
+def peak_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        # 2 operations per cycle: enough rows for the largest size
+        customers = 50
+        build_dataset(customers=customers, cycles=max(sizes) // (2 * customers) + 1)
+
+        print(f"{'ops':>7}{'orm ms':>11}{'read ms':>11}{'speedup':>9}{'orm KiB':>11}{'read KiB':>11}")
+        for size in sizes:
+            assert len(read_model_dump(size)) == len(orm_dump(size)) == size
+            t_orm = timed(lambda: orm_dump(size), args.repeat)
+            t_read = timed(lambda: read_model_dump(size), args.repeat)
+            m_orm, m_read = peak_kib(lambda: orm_dump(size)), peak_kib(lambda: read_model_dump(size))
+            print(f"{size:>7}{t_orm:>11.1f}{t_read:>11.1f}{t_orm / t_read:>8.1f}x{m_orm:>11.0f}{m_read:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Query count and latency of sales-report validation as reports grow.
+
+Usage: `python -m benchmarks.bench_validation [--sizes 1,10,60,200]`
+
+Compares the per-line lookups the schemas used to do (one ``Book`` get per
+line, plus the customer's whole inventory) with the batched validation in
+``SalesReportOperationSchema``.
+"""
+import argparse
+
+from app.extensions import db
+from app.models import Book
+from app.schemas import SalesReportOperationSchema
+from app.services.operations import get_inventory
+from benchmarks._dataset import bench_app, build_dataset, count_queries, timed
+
+CUSTOMER_ID = 1
+
+
+def report_payload(book_ids, size):
+    # Repeat books past the end of the stock list, as duplicate lines
+    return {"items": [{"book_id": book_ids[i % len(book_ids)], "quantity": 1} for i in range(size)]}
+
+
+def per_line_validation(payload):
+    """What the schemas did before: a lookup per line and a full inventory read."""
+    db.session.expunge_all()  # no identity-map hits between lines
+    inventory = get_inventory(CUSTOMER_ID)
+    for item in payload["items"]:
+        book = db.session.get(Book, item["book_id"])
+        assert book and inventory.get(book.id, 0) >= item["quantity"]
+
+
+def batched_validation(payload):
+    db.session.expunge_all()
+    SalesReportOperationSchema(user_id=CUSTOMER_ID).load(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1,10,60,200")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    app = bench_app()
+    with app.app_context():
+        db.create_all()
+        # A small ledger is enough: validation only reads one customer's stock
+        build_dataset(customers=5, books=max(sizes) + 50, cycles=max(sizes) // 8 + 10)
+        in_stock = sorted(b for b, qty in get_inventory(CUSTOMER_ID).items() if qty > 1)
+        print(f"customer {CUSTOMER_ID}: {len(in_stock)} books in stock")
+
+        print(f"{'lines':>6}{'before q':>10}{'after q':>10}{'before ms':>12}{'after ms':>12}")
+        for size in sizes:
+            payload = report_payload(in_stock, size)
+            row = []
+            for validate in (per_line_validation, batched_validation):
+                with count_queries(db.engine) as counter:
+                    validate(payload)
+                row.append((counter["count"], timed(lambda: validate(payload), args.repeat)))
+            (q0, t0), (q1, t1) = row
+            print(f"{size:>6}{q0:>10}{q1:>10}{t0:>12.3f}{t1:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
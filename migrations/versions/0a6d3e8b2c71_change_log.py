@@ -0,0 +1,32 @@
+"""Change log feed
+
+Revision ID: 0a6d3e8b2c71
+Revises: f1a9c4e27d38
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a6d3e8b2c71'
+down_revision = 'f1a9c4e27d38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'change_log',
+        sa.Column('seq', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('table_name', sa.String(length=30), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=6), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('change_log')
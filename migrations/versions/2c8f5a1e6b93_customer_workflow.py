@@ -0,0 +1,51 @@
+"""Per-customer workflow state for order admission
+
+Revision ID: 2c8f5a1e6b93
+Revises: 1b7e4f9a0d52
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8f5a1e6b93'
+down_revision = '1b7e4f9a0d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('customer_workflow',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('last_order_id', sa.Integer(), nullable=True),
+    sa.Column('last_order_status', sa.String(length=12), nullable=True),
+    sa.Column('reported_since', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['customer_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('customer_id')
+    )
+
+    # Backfill: each customer's last order not cancelled, and whether a report followed it
+    conn = op.get_bind()
+    conn.execute(sa.text("""
+        INSERT INTO customer_workflow (customer_id, last_order_id, last_order_status, reported_since)
+        SELECT u.id, l.id, l.status,
+               CASE WHEN l.id IS NOT NULL AND EXISTS (
+                   SELECT 1 FROM operation r
+                   WHERE r.customer_id = u.id AND r.type = 'report'
+                     AND (r.created_at > l.created_at OR (r.created_at = l.created_at AND r.id > l.id))
+               ) THEN TRUE ELSE FALSE END
+        FROM "user" u
+        LEFT JOIN (
+            SELECT customer_id, id, status, created_at,
+                   ROW_NUMBER() OVER (PARTITION BY customer_id ORDER BY created_at DESC, id DESC) AS rank
+            FROM operation
+            WHERE type = 'order' AND status IN ('pending', 'approved', 'delivered')
+        ) l ON l.customer_id = u.id AND l.rank = 1
+        WHERE u.role = 'customer'
+    """))
+
+
+def downgrade():
+    op.drop_table('customer_workflow')
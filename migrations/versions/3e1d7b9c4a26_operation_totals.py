@@ -0,0 +1,43 @@
+"""Denormalized item totals on operation
+
+Revision ID: 3e1d7b9c4a26
+Revises: 2c8f5a1e6b93
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e1d7b9c4a26'
+down_revision = '2c8f5a1e6b93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('operation') as batch_op:
+        batch_op.add_column(sa.Column('item_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('total_quantity', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False, server_default='0'))
+
+    # Backfill from the items, at the current catalog prices
+    conn = op.get_bind()
+    conn.execute(sa.text("""
+        UPDATE operation SET
+            item_count = (SELECT COUNT(*) FROM operation_item i WHERE i.operation_id = operation.id),
+            total_quantity = (SELECT COALESCE(SUM(i.quantity), 0) FROM operation_item i WHERE i.operation_id = operation.id),
+            total_amount = (
+                SELECT COALESCE(SUM(i.quantity * b.unit_price), 0)
+                FROM operation_item i JOIN book b ON b.id = i.book_id
+                WHERE i.operation_id = operation.id
+            )
+    """))
+
+
+def downgrade():
+    with op.batch_alter_table('operation') as batch_op:
+        batch_op.drop_column('total_amount')
+        batch_op.drop_column('total_quantity')
+        batch_op.drop_column('item_count')
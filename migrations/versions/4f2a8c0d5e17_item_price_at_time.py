@@ -0,0 +1,36 @@
+"""Price snapshot on operation items
+
+Revision ID: 4f2a8c0d5e17
+Revises: 3e1d7b9c4a26
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f2a8c0d5e17'
+down_revision = '3e1d7b9c4a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('operation_item') as batch_op:
+        batch_op.add_column(sa.Column('unit_price_at_time', sa.Numeric(precision=5, scale=2), nullable=True))
+
+    # Backfill with the current catalog price, the best known for past operations
+    conn = op.get_bind()
+    conn.execute(sa.text("""
+        UPDATE operation_item
+        SET unit_price_at_time = (SELECT b.unit_price FROM book b WHERE b.id = operation_item.book_id)
+    """))
+
+    with op.batch_alter_table('operation_item') as batch_op:
+        batch_op.alter_column('unit_price_at_time', existing_type=sa.Numeric(precision=5, scale=2), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('operation_item') as batch_op:
+        batch_op.drop_column('unit_price_at_time')
@@ -0,0 +1,42 @@
+"""Materialized customer_stock ledger
+
+Revision ID: a3c5e7f91b20
+Revises: 4d3a1e2f9abc
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e7f91b20'
+down_revision = '4d3a1e2f9abc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('customer_stock',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('customer_id', 'book_id')
+    )
+
+    # Backfill balances from the ledger (delivered orders + recorded reports)
+    conn = op.get_bind()
+    conn.execute(sa.text("""
+        INSERT INTO customer_stock (customer_id, book_id, quantity)
+        SELECT o.customer_id, i.book_id, SUM(i.quantity)
+        FROM operation_item i
+        JOIN operation o ON o.id = i.operation_id
+        WHERE (o.type = 'order' AND o.status = 'delivered') OR o.type = 'report'
+        GROUP BY o.customer_id, i.book_id
+    """))
+
+
+def downgrade():
+    op.drop_table('customer_stock')
@@ -0,0 +1,54 @@
+"""Indexes for the hot operation / operation_item access paths
+
+Revision ID: b7d2f4a6c813
+Revises: a3c5e7f91b20
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a6c813'
+down_revision = 'a3c5e7f91b20'
+branch_labels = None
+depends_on = None
+
+ACTIONABLE = sa.text("type = 'order' AND status IN ('pending', 'approved')")
+
+
+def upgrade():
+    # created_at / notes were added to the model without a migration; databases
+    # built from migrations only need them before the indexes can be created.
+    conn = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(conn).get_columns('operation')}
+    if 'created_at' not in columns:
+        op.add_column('operation', sa.Column('created_at', sa.DateTime(), nullable=True))
+        conn.execute(sa.text("UPDATE operation SET created_at = date"))
+        with op.batch_alter_table('operation') as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+    if 'notes' not in columns:
+        op.add_column('operation', sa.Column('notes', sa.Text(), nullable=True))
+
+    op.create_index('ix_operation_customer_created', 'operation', ['customer_id', 'created_at', 'id'])
+    op.create_index('ix_operation_customer_type_created', 'operation', ['customer_id', 'type', 'created_at', 'id'])
+    op.create_index('ix_operation_created', 'operation', ['created_at', 'id'])
+    # Partial index: only orders still waiting for an admin (pending/approved)
+    op.create_index(
+        'ix_operation_actionable', 'operation', ['created_at', 'id'],
+        postgresql_where=ACTIONABLE,
+        sqlite_where=ACTIONABLE,
+    )
+
+    op.create_index('ix_operation_item_operation', 'operation_item', ['operation_id', 'book_id', 'quantity'])
+    op.create_index('ix_operation_item_book', 'operation_item', ['book_id', 'operation_id', 'quantity'])
+
+
+def downgrade():
+    op.drop_index('ix_operation_item_book', table_name='operation_item')
+    op.drop_index('ix_operation_item_operation', table_name='operation_item')
+    op.drop_index('ix_operation_actionable', table_name='operation')
+    op.drop_index('ix_operation_created', table_name='operation')
+    op.drop_index('ix_operation_customer_type_created', table_name='operation')
+    op.drop_index('ix_operation_customer_created', table_name='operation')
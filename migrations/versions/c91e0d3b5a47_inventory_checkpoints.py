@@ -0,0 +1,36 @@
+"""Inventory checkpoints for as-of-date queries
+
+Revision ID: c91e0d3b5a47
+Revises: b7d2f4a6c813
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c91e0d3b5a47'
+down_revision = 'b7d2f4a6c813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inventory_checkpoint',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('as_of_date', sa.Date(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('delivered_qty', sa.Integer(), nullable=False),
+    sa.Column('sold_qty', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('customer_id', 'book_id', 'as_of_date')
+    )
+    op.create_index('ix_inventory_checkpoint_customer_date', 'inventory_checkpoint', ['customer_id', 'as_of_date'])
+
+
+def downgrade():
+    op.drop_index('ix_inventory_checkpoint_customer_date', table_name='inventory_checkpoint')
+    op.drop_table('inventory_checkpoint')
@@ -0,0 +1,49 @@
+"""Daily sales rollup
+
+Revision ID: d48a2c6e9f15
+Revises: c91e0d3b5a47
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd48a2c6e9f15'
+down_revision = 'c91e0d3b5a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_daily_rollup',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('sold_qty', sa.Integer(), nullable=False),
+    sa.Column('delivered_qty', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('date', 'customer_id', 'book_id')
+    )
+
+    # Backfill from the ledger (delivered orders + recorded reports)
+    conn = op.get_bind()
+    conn.execute(sa.text("""
+        INSERT INTO sales_daily_rollup (date, customer_id, book_id, sold_qty, delivered_qty, revenue)
+        SELECT o.date, o.customer_id, i.book_id,
+               SUM(CASE WHEN o.type = 'report' THEN -i.quantity ELSE 0 END),
+               SUM(CASE WHEN o.type = 'order' THEN i.quantity ELSE 0 END),
+               SUM(CASE WHEN o.type = 'report' THEN -i.quantity * b.unit_price ELSE 0 END)
+        FROM operation_item i
+        JOIN operation o ON o.id = i.operation_id
+        JOIN book b ON b.id = i.book_id
+        WHERE (o.type = 'order' AND o.status = 'delivered') OR o.type = 'report'
+        GROUP BY o.date, o.customer_id, i.book_id
+    """))
+
+
+def downgrade():
+    op.drop_table('sales_daily_rollup')
@@ -0,0 +1,36 @@
+"""Reorder suggestions cache
+
+Revision ID: e5f37b1d8c62
+Revises: d48a2c6e9f15
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f37b1d8c62'
+down_revision = 'd48a2c6e9f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reorder_suggestion',
+    sa.Column('customer_id', sa.Integer(), nullable=False),
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('sold_qty', sa.Integer(), nullable=False),
+    sa.Column('velocity', sa.Float(), nullable=False),
+    sa.Column('days_of_cover', sa.Float(), nullable=True),
+    sa.Column('suggested_qty', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['book_id'], ['book.id'], ),
+    sa.ForeignKeyConstraint(['customer_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('customer_id', 'book_id')
+    )
+
+
+def downgrade():
+    op.drop_table('reorder_suggestion')
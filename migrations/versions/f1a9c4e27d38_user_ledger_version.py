@@ -0,0 +1,26 @@
+"""Per-customer ledger version
+
+Revision ID: f1a9c4e27d38
+Revises: e5f37b1d8c62
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a9c4e27d38'
+down_revision = 'e5f37b1d8c62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.add_column(sa.Column('ledger_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user') as batch_op:
+        batch_op.drop_column('ledger_version')
@@ -1,6 +1,7 @@
 from app import create_app
 from app.extensions import db
 from app.models import User, Book, Series, Operation, OperationItem
+from app.services.ledger import rebuild_customer_stock, rebuild_sales_rollup
 from werkzeug.security import generate_password_hash
 from datetime import date
 
@@ -71,6 +72,8 @@ def seed():
         ])
         db.session.add(o3)
         db.session.add(s2)
+        rebuild_customer_stock()
+        rebuild_sales_rollup()
         db.session.commit()
 
         print("✅ Database seeded: alice is ICC Berlin and Bob ICC Bremen")
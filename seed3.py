@@ -3,6 +3,7 @@
 from app import create_app
 from app.extensions import db
 from app.models import User, Book, Operation, OperationItem
+from app.services.ledger import rebuild_customer_stock, rebuild_sales_rollup
 from werkzeug.security import generate_password_hash
 from datetime import datetime, date
 
@@ -70,6 +71,8 @@ def seed():
 
         # Add operations to session
         db.session.add_all([op1, op2, op3, op4, op5])
+        rebuild_customer_stock()
+        rebuild_sales_rollup()
         db.session.commit()
 
         print("Seeding complete!")
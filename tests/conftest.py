@@ -1,13 +1,16 @@
 import pytest, pprint
-from datetime import date
+from contextlib import contextmanager
+from sqlalchemy import event
+from datetime import date, datetime, time
 from http.cookies import SimpleCookie
 from app import create_app, db
 from app.models import User, Book, Operation, OperationItem
+from app.services.ledger import apply_to_ledger, rebuild_customer_stock, rebuild_sales_rollup
 
 collect_ignore = ["_legacy"]
 
 @pytest.fixture
-def app():
+def app(tmp_path):
     app = create_app({
         "TESTING": True,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
@@ -15,7 +18,12 @@ def app():
         # Accept both headers and cookies for JWT in tests
         "JWT_TOKEN_LOCATION": ["headers", "cookies"],
         # In tests, disable CSRF protection for JWT cookies to simplify auth
-        "JWT_COOKIE_CSRF_PROTECT": False
+        "JWT_COOKIE_CSRF_PROTECT": False,
+        # Run background jobs inline, writing results under the test's tmp dir
+        "JOBS_EAGER": True,
+        "JOBS_RESULT_DIR": str(tmp_path / "jobs"),
+        # No transaction outlives its request here: changes are settled once logged
+        "CHANGES_SETTLE_SECONDS": 0,
     })
     with app.app_context():
         db.create_all()
@@ -40,6 +48,8 @@ def app():
         ])
 
         db.session.add_all([bob, admin, customer, book1, book2, book3, op])
+        rebuild_customer_stock()
+        rebuild_sales_rollup()
         db.session.commit()
 
     yield app
@@ -58,6 +68,70 @@ def _app_ctx(app):
     with app.app_context():
         yield
 
+@pytest.fixture
+def count_queries(app):
+    """Context manager counting the SQL statements run inside the block.
+
+    Usage: with count_queries() as counter: ...; assert counter.count == 2
+    """
+    @contextmanager
+    def counting():
+        class Counter:
+            count = 0
+        counter = Counter()
+
+        def _count(*args, **kwargs):
+            counter.count += 1
+
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            yield counter
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+    return counting
+
+@pytest.fixture
+def assert_constant_queries(count_queries):
+    """Assert ``fetch()`` runs the same number of queries before and after ``grow()``.
+
+    The identity map is cleared before each run so lazy loads can't hide
+    behind objects loaded earlier in the test. Returns that query count.
+    """
+    def check(fetch, grow):
+        counts = []
+        for step in (None, grow):
+            if step:
+                step()
+            db.session.expunge_all()
+            with count_queries() as counter:
+                fetch()
+            counts.append(counter.count)
+        assert counts[0] == counts[1], f"query count grew with the result size: {counts}"
+        return counts[0]
+
+    return check
+
+@pytest.fixture
+def add_ledger_op(app):
+    """Insert a delivered order / recorded report on a given day, through the ledger service.
+
+    Usage: add_ledger_op(customer_id, "report", date(2025, 1, 5), [(book_id, -2)])
+    """
+    def add(customer_id, kind, day, items):
+        op = Operation(
+            customer_id=customer_id, type=kind, status="delivered" if kind == "order" else "recorded",
+            date=day, created_at=datetime.combine(day, time(12)),
+            items=[OperationItem(book_id=book_id, quantity=qty) for book_id, qty in items],
+        )
+        db.session.add(op)
+        apply_to_ledger(op)
+        db.session.commit()
+        return op
+
+    return add
+
 @pytest.fixture
 def auth_headers(app):
     """Return per-user headers for cookie-based JWT with CSRF.
@@ -20,3 +20,70 @@ def test_admin_delete_delivered_sets_cancelled(client, auth_headers):
     assert op is not None
     assert op.type == 'order'
     assert op.status == "cancelled"
+
+
+def test_admin_inventory_matrix(client, auth_headers):
+    res = client.get("/api/admin/inventory/matrix", headers=auth_headers["bob"])
+    assert res.status_code == 403
+
+    res = client.get("/api/admin/inventory/matrix", headers=auth_headers["admin"])
+    assert res.status_code == 200
+    m = res.get_json()["data"]
+    assert [c["name"] for c in m["customers"]] == ["bob", "customer"]
+    assert [b["title"] for b in m["books"]] == ["Book One", "Book Three", "Book Two"]
+    assert m["stock"] == [[10, 0, 2], [0, 0, 0]]
+    assert m["row_totals"] == [12, 0] and m["column_totals"] == [10, 0, 2]
+    assert m["row_values"] == [130.0, 0.0] and m["total_value"] == 130.0
+
+    res = client.get("/api/admin/inventory/matrix?book_id=2&customer_id=1", headers=auth_headers["admin"])
+    m = res.get_json()["data"]
+    assert m["stock"] == [[2]] and m["total"] == 2
+
+
+def test_admin_stats_for_all_customers(client, auth_headers):
+    res = client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 4}]}, headers=auth_headers["bob"])
+    assert res.status_code == 201
+
+    res = client.get("/api/admin/stats", headers=auth_headers["admin"])
+    assert res.status_code == 200
+    stats = {row["name"]: row for row in res.get_json()["data"]}
+    assert set(stats) == {"bob", "customer"}
+    bob = stats["bob"]
+    assert (bob["total_sales"], bob["total_delivered"], bob["total_amount"]) == (4, 12, 40.0)
+    assert bob["delivery_ratio"] == 0.33 and bob["sell_through"] == 0.3333
+    assert bob["outstanding_stock"] == 8
+    assert stats["customer"]["total_sales"] == 0 and stats["customer"]["outstanding_stock"] == 0
+
+    # Same numbers as the per-customer endpoint
+    res = client.get(f"/api/users/{bob['id']}/stats", headers=auth_headers["bob"])
+    assert res.get_json()["data"] == bob
+
+
+def test_export_csv_streams_with_filters(client, auth_headers, add_ledger_op):
+    import csv, gzip, io
+    from datetime import date
+
+    assert client.get("/api/admin/export/csv", headers=auth_headers["bob"]).status_code == 403
+    add_ledger_op(3, "order", date(2025, 3, 1), [(1, 4), (3, 2)])
+
+    def lines(query="", **headers):
+        res = client.get(f"/api/admin/export/csv{query}", headers={**auth_headers["admin"], **headers})
+        assert res.status_code == 200 and res.is_streamed
+        body = res.get_data()
+        if res.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return list(csv.reader(io.StringIO(body.decode())))[1:]
+
+    assert len(lines()) == 4  # Bob's seeded order (2 items) + the new one
+    assert [(l[2], l[3], l[6]) for l in lines("?customer_id=3")] == [("customer", "Book One", "40.00"), ("customer", "Book Three", "40.00")]
+    assert len(lines("?from=2025-01-01&type=order&status=delivered")) == 2
+    assert lines("?to=2024-12-31") == lines("?customer_id=1")
+    assert lines(**{"Accept-Encoding": "gzip"}) == lines()
+
+    res = client.get("/api/admin/export/csv?type=refund", headers=auth_headers["admin"])
+    assert res.status_code == 400
+
+    # One line per operation, from the stored totals
+    assert [l[2:6] for l in lines("?level=operation&customer_id=3")] == [["customer", "2", "6", "80.00"]]
+    assert len(lines("?level=operation")) == 2
+    assert client.get("/api/admin/export/csv?level=book", headers=auth_headers["admin"]).status_code == 400
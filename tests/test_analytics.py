@@ -0,0 +1,83 @@
+# tests/test_analytics.py
+from datetime import date
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import SalesDailyRollup
+from app.services.ledger import rebuild_sales_rollup
+
+
+def _rollup():
+    return {
+        (r.date, r.customer_id, r.book_id): (r.sold_qty, r.delivered_qty, Decimal(r.revenue))
+        for r in SalesDailyRollup.query
+    }
+
+
+def test_rollup_is_maintained_incrementally(client, auth_headers, add_ledger_op):
+    add_ledger_op(1, "report", date(2025, 1, 6), [(1, -3), (2, -1)])
+    add_ledger_op(1, "report", date(2025, 1, 6), [(1, -1)])
+    assert _rollup()[(date(2025, 1, 6), 1, 1)] == (4, 0, Decimal(40))
+    assert _rollup()[(date(2024, 10, 3), 1, 1)] == (0, 10, Decimal(0))
+
+    # Deleting a report takes it back out of the rollup
+    report = add_ledger_op(1, "report", date(2025, 1, 7), [(2, -1)])
+    client.delete(f"/api/admin/operations/{report.id}", headers=auth_headers["admin"])
+    db.session.expire_all()
+    assert _rollup()[(date(2025, 1, 7), 1, 2)] == (0, 0, Decimal(0))
+
+    incremental = {k: v for k, v in _rollup().items() if v != (0, 0, 0)}
+    rebuild_sales_rollup()
+    db.session.commit()
+    assert _rollup() == incremental
+
+
+def test_timeseries_buckets_and_groups(client, auth_headers, add_ledger_op):
+    add_ledger_op(1, "report", date(2025, 1, 6), [(1, -3)])
+    add_ledger_op(1, "report", date(2025, 2, 20), [(2, -2)])
+    add_ledger_op(1, "report", date(2025, 4, 2), [(1, -1)])
+
+    res = client.get("/api/admin/analytics/timeseries?bucket=quarter&from=2025-01-01", headers=auth_headers["admin"])
+    assert res.status_code == 200
+    (series,) = res.get_json()["data"]["series"]
+    assert series["points"] == [
+        {"period": "2025-01-01", "sold_qty": 5, "delivered_qty": 0, "revenue": 60.0},
+        {"period": "2025-04-01", "sold_qty": 1, "delivered_qty": 0, "revenue": 10.0},
+    ]
+
+    res = client.get("/api/admin/analytics/timeseries?bucket=month&group_by=book", headers=auth_headers["admin"])
+    by_book = {s["label"]: s["points"] for s in res.get_json()["data"]["series"]}
+    assert [p["period"] for p in by_book["Book One"]] == ["2024-10-01", "2025-01-01", "2025-04-01"]
+    assert by_book["Book Two"][-1] == {"period": "2025-02-01", "sold_qty": 2, "delivered_qty": 0, "revenue": 30.0}
+
+    res = client.get("/api/admin/analytics/timeseries?bucket=week&group_by=customer", headers=auth_headers["admin"])
+    (bob,) = res.get_json()["data"]["series"]
+    assert bob["label"] == "bob" and bob["points"][0]["period"] == "2024-09-30"
+
+    res = client.get("/api/admin/analytics/timeseries?bucket=year", headers=auth_headers["admin"])
+    assert res.status_code == 400
+    assert "bucket" in res.get_json()["errors"]
+
+
+def test_revenue_keeps_the_price_of_the_time(client, auth_headers):
+    import csv, io
+    from app.models import Book
+
+    bob, admin = auth_headers["bob"], auth_headers["admin"]
+    res = client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 2}]}, headers=bob)
+    assert res.get_json()["items"][0]["unit_price_at_time"] == "10.00"
+    # Set by the server only
+    res = client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 1, "unit_price_at_time": 0}]}, headers=bob)
+    assert res.status_code == 400
+
+    def revenue():
+        stats = client.get("/api/users/1/stats", headers=bob).get_json()["data"]
+        as_of = client.get("/api/users/1/stats?as_of=2099-01-01", headers=bob).get_json()["data"]
+        export = list(csv.reader(io.StringIO(client.get("/api/admin/export/csv?type=report", headers=admin).get_data(as_text=True))))
+        return stats["total_amount"], as_of["total_amount"], export[1][5:7]
+
+    before = revenue()
+    assert before == (20.0, 20.0, ["10.00", "-20.00"])
+    db.session.get(Book, 1).unit_price = 12
+    db.session.commit()
+    assert revenue() == before
@@ -0,0 +1,58 @@
+# tests/test_auth.py
+from app.extensions import db
+from app.models import User
+from app.utils.auth import principal_cache
+
+
+def _login_cookie(client, headers):
+    # SSR pages read the token from the cookie only
+    client.set_cookie("access_token_cookie", headers["Authorization"].split()[1])
+
+
+def test_role_check_uses_cached_principal(client, auth_headers, count_queries):
+    assert client.get("/api/admin/operations", headers=auth_headers["customer"]).status_code == 403
+    # Forbidden path: once cached, the role check alone must not touch the database
+    with count_queries() as counter:
+        res = client.get("/api/admin/operations", headers=auth_headers["customer"])
+    assert res.status_code == 403
+    assert counter.count == 0
+
+    assert client.get("/api/admin/operations", headers=auth_headers["admin"]).status_code == 200
+
+
+def test_role_follows_the_stored_user(client, auth_headers):
+    admin = auth_headers["admin"]
+    assert client.get("/api/admin/operations", headers=admin).status_code == 200
+
+    # Demoted: the still valid admin token no longer grants admin access
+    db.session.get(User, 2).role = "customer"
+    db.session.commit()
+    assert client.get("/api/admin/operations", headers=admin).status_code == 403
+
+    # Deleted: refused as unauthenticated, not a server error
+    db.session.delete(db.session.get(User, 2))
+    db.session.commit()
+    res = client.get("/api/admin/operations", headers=admin)
+    assert res.status_code == 401 and "auth" in res.get_json()["errors"]
+    assert client.get("/api/users/inventory", headers=admin).status_code == 401
+
+
+def test_ssr_pages_reuse_cached_principal(client, auth_headers, count_queries):
+    _login_cookie(client, auth_headers["customer"])
+    assert b"customer" in client.get("/").data
+    with count_queries() as counter:
+        res = client.get("/")
+        assert client.get("/admin").status_code == 302
+    assert res.status_code == 200
+    assert counter.count == 0
+
+
+def test_profile_update_invalidates_principal(client, auth_headers):
+    headers = auth_headers["customer"]
+    _login_cookie(client, headers)
+    client.get("/")
+    assert principal_cache().get(3) is not None
+    res = client.put("/api/users", json={"name": "renamed"}, headers=headers)
+    assert res.status_code == 200
+    assert principal_cache().get(3) is None
+    assert b"renamed" in client.get("/").data
@@ -0,0 +1,51 @@
+# tests/test_catalog.py
+import threading
+import time
+
+from app.services.catalog import CatalogCache
+
+
+def test_books_list_is_cached_and_revalidated(client, auth_headers, count_queries):
+    res = client.get("/api/books")
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+    assert [b["title"] for b in res.get_json()["data"]] == ["Book One", "Book Two", "Book Three"]
+
+    with count_queries() as counter:
+        res = client.get("/api/books")
+        assert res.status_code == 200 and res.headers["ETag"] == etag
+        res = client.get("/api/books", headers={"If-None-Match": etag})
+        assert res.status_code == 304 and res.data == b""
+    assert counter.count == 0
+
+    # Adding a book bumps the catalog version
+    res = client.post("/api/admin/books", json={"title": "Fresh", "unit_price": 9}, headers=auth_headers["admin"])
+    assert res.status_code == 201
+    res = client.get("/api/books", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.headers["ETag"] != etag
+    assert "Fresh" in [b["title"] for b in res.get_json()["data"]]
+
+
+def test_failed_book_insert_keeps_cache(client, auth_headers):
+    etag = client.get("/api/books").headers["ETag"]
+    res = client.post("/api/admin/books", json={"title": "Bad", "unit_price": 0}, headers=auth_headers["admin"])
+    assert res.status_code == 400
+    assert client.get("/api/books", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_concurrent_misses_build_once(monkeypatch):
+    cache = CatalogCache(ttl=0)
+    builds = []
+
+    def build():
+        builds.append(threading.get_ident())
+        time.sleep(0.05)  # long enough for every thread to miss
+        return b"{}"
+
+    monkeypatch.setattr(cache, "_build", build)
+    threads = [threading.Thread(target=cache.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(builds) == 1
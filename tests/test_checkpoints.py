@@ -0,0 +1,83 @@
+# tests/test_checkpoints.py
+from datetime import date
+
+from app.extensions import db
+from app.models import InventoryCheckpoint, Operation, OperationItem
+from app.services.ledger import LedgerTotals, stock_as_of, write_checkpoints
+from app.services.transitions import transition
+
+
+def _bob_history(add_ledger_op):
+    # Seed: Bob (id=1) got 10x Book One and 2x Book Two on 2024-10-03
+    add_ledger_op(1, "report", date(2024, 12, 31), [(1, -3)])
+    add_ledger_op(1, "order", date(2025, 2, 10), [(1, 5)])
+    add_ledger_op(1, "report", date(2025, 4, 15), [(2, -1)])
+
+
+def test_as_of_from_checkpoint_matches_full_replay(add_ledger_op):
+    _bob_history(add_ledger_op)
+    replayed = stock_as_of(date(2025, 3, 31), 1)
+    assert replayed == {(1, 1): LedgerTotals(12, 15, 3), (1, 2): LedgerTotals(2, 2, 0)}
+
+    assert write_checkpoints(date(2024, 12, 31)) == 2
+    db.session.commit()
+    assert stock_as_of(date(2025, 3, 31), 1) == replayed
+    assert stock_as_of(date(2024, 12, 31), 1)[(1, 1)] == LedgerTotals(7, 10, 3)
+    assert stock_as_of(date(2024, 1, 1), 1) == {}
+
+
+def test_backdated_change_invalidates_later_checkpoints(add_ledger_op):
+    _bob_history(add_ledger_op)
+    write_checkpoints(date(2025, 3, 31))
+    db.session.commit()
+
+    add_ledger_op(1, "report", date(2025, 1, 5), [(1, -2)])
+    assert InventoryCheckpoint.query.filter_by(customer_id=1).count() == 0
+    assert stock_as_of(date(2025, 3, 31), 1)[(1, 1)] == LedgerTotals(10, 15, 5)
+
+
+def test_delivery_counts_on_the_day_it_happens(add_ledger_op):
+    _bob_history(add_ledger_op)
+    order = Operation(customer_id=1, type="order", status="approved", date=date(2025, 3, 28),
+                      items=[OperationItem(book_id=1, quantity=5)])
+    db.session.add(order)
+    write_checkpoints(date(2025, 3, 31))
+    db.session.commit()
+    quarter_end = stock_as_of(date(2025, 3, 31), 1)
+
+    transition(order.id, "deliver")
+    db.session.commit()
+    assert order.date == date.today()
+    # The quarter is closed: its checkpoint and answer stay
+    assert InventoryCheckpoint.query.filter_by(customer_id=1).count() == 2
+    assert stock_as_of(date(2025, 3, 31), 1) == quarter_end
+    assert stock_as_of(date.today(), 1)[(1, 1)].delivered == quarter_end[(1, 1)].delivered + 5
+
+
+def test_inventory_and_stats_as_of(client, auth_headers, add_ledger_op):
+    _bob_history(add_ledger_op)
+    write_checkpoints(date(2024, 12, 31))
+    db.session.commit()
+
+    res = client.get("/api/users/inventory?as_of=2025-03-31", headers=auth_headers["bob"])
+    assert res.status_code == 200
+    assert [(row["title"], row["stock"]) for row in res.get_json()["data"]] == [("Book One", 12), ("Book Two", 2)]
+
+    res = client.get("/api/users/inventory?id=1&as_of=2024-12-31", headers=auth_headers["admin"])
+    assert [(row["title"], row["stock"]) for row in res.get_json()["data"]] == [("Book One", 7), ("Book Two", 2)]
+
+    res = client.get("/api/users/1/stats?as_of=2025-03-31", headers=auth_headers["bob"])
+    stats = res.get_json()["data"]
+    assert stats["as_of"] == "2025-03-31"
+    assert (stats["total_sales"], stats["total_delivered"], stats["total_amount"]) == (3, 17, 30.0)
+
+    res = client.get("/api/users/1/stats?as_of=31/03/2025", headers=auth_headers["bob"])
+    assert res.status_code == 400
+    assert "as_of" in res.get_json()["errors"]
+
+
+def test_checkpoint_command(app):
+    result = app.test_cli_runner().invoke(args=["checkpoint-stock", "--as-of", "2024-12-31"])
+    assert result.exit_code == 0
+    assert "2 checkpoint row(s)" in result.output
+    assert InventoryCheckpoint.query.filter_by(as_of_date=date(2024, 12, 31)).count() == 2
@@ -0,0 +1,29 @@
+# tests/test_forecast.py
+from datetime import date
+
+from app.extensions import db
+from app.services.forecast import compute_suggestions
+
+
+def test_suggestions_from_sales_velocity(client, auth_headers, add_ledger_op):
+    # Bob (id=1) holds 10x Book One, 2x Book Two since 2024-10-03
+    add_ledger_op(1, "report", date(2024, 11, 1), [(1, -1)])  # outside the window
+    add_ledger_op(1, "report", date(2025, 1, 15), [(1, -2)])
+    add_ledger_op(1, "report", date(2025, 3, 1), [(1, -3)])
+
+    assert compute_suggestions(window_days=90, cover_days=180, as_of=date(2025, 3, 31)) == 2
+    db.session.commit()
+
+    res = client.get("/api/users/1/suggestions", headers=auth_headers["bob"])
+    assert res.status_code == 200
+    book_one, book_two = res.get_json()["data"]
+    assert (book_one["title"], book_one["stock"], book_one["sold_qty"]) == ("Book One", 4, 5)
+    assert book_one["velocity"] == 0.056 and book_one["days_of_cover"] == 72.0
+    assert book_one["suggested_qty"] == 6  # ceil(5 * 180 / 90) - 4
+    assert (book_two["title"], book_two["days_of_cover"], book_two["suggested_qty"]) == ("Book Two", None, 0)
+
+    res = client.get("/api/users/1/suggestions", headers=auth_headers["customer"])
+    assert res.status_code == 403
+
+    res = client.get("/api/admin/suggestions", headers=auth_headers["admin"])
+    assert [(s["name"], s["suggested_qty"]) for s in res.get_json()["data"]] == [("bob", 6), ("bob", 0)]
@@ -0,0 +1,101 @@
+# tests/test_import.py
+from datetime import date
+
+from app.extensions import db
+from app.models import ChangeLog, InventoryCheckpoint, Operation, User
+from app.services import sheets_import
+from app.services.ledger import ledger_stock, stock_as_of, write_checkpoints
+from app.services.operations import get_inventory
+
+SHEET = """partenaire,date,type,titre,quantité,ref
+customer,2023-02-14,livraison,Book One,6,
+customer,14/02/2023,livraison,book two,3,
+Customer,2023-02-14,livraison,Book One,1,
+cust@test.com,28/02/2023,vente,Book One,2,
+customer,28/02/2023,vente,Book Nine,1,
+nobody,28/02/2023,vente,Book One,1,
+customer,2023-03-01,vente,Book Two,zero,
+customer,2023-03-01,vente,Book Two,1,
+
+customer,31/02/2023,vente,Book Two,1,
+"""
+
+
+def _run(app, tmp_path, *args):
+    sheet = tmp_path / "aya-2023.csv"
+    sheet.write_text(SHEET, encoding="utf-8")
+    return app.test_cli_runner().invoke(args=["import-sheets", *args, str(sheet)])
+
+
+def test_import_sheets(app, tmp_path):
+    version = User.query.get(3).ledger_version
+    before = Operation.query.count()
+    res = _run(app, tmp_path)
+    assert res.exit_code == 0, res.output
+
+    # one delivery (3 lines), two sales reports; 4 bad lines reported with their line numbers
+    assert "3 operation(s), 4 item(s)" in res.output and "4 line(s) rejected" in res.output
+    assert "aya-2023.csv:6: unknown book 'Book Nine'" in res.output
+    assert "aya-2023.csv:7: unknown partner 'nobody'" in res.output
+    assert "aya-2023.csv:8: invalid quantity 'zero'" in res.output
+    assert "aya-2023.csv:11: invalid date '31/02/2023'" in res.output
+
+    ops = Operation.query.filter(Operation.customer_id == 3).order_by(Operation.date).all()
+    assert [(op.type, op.status, op.date.isoformat()) for op in ops] == [
+        ("order", "delivered", "2023-02-14"), ("report", "recorded", "2023-02-28"), ("report", "recorded", "2023-03-01"),
+    ]
+    assert sorted((i.book_id, i.quantity) for i in ops[0].items) == [(1, 7), (2, 3)]
+    assert get_inventory(3) == {1: 5, 2: 2}
+    assert User.query.get(3).ledger_version == version + 1
+    assert ChangeLog.query.filter_by(table_name="operation", op="insert").count() >= 3
+
+    # Re-running is a no-op
+    res = _run(app, tmp_path)
+    assert "0 operation(s)" in res.output and "3 already imported" in res.output
+    assert Operation.query.count() == before + 3
+
+
+def test_import_dry_run(app, tmp_path):
+    before = Operation.query.count()
+    res = _run(app, tmp_path, "--dry-run")
+    assert res.exit_code == 0 and "Dry run: 3 operation(s)" in res.output
+    assert Operation.query.count() == before
+
+
+def test_operations_are_not_split_across_batches(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(sheets_import, "BATCH_ROWS", 4)
+    sheet = tmp_path / "long.csv"
+    sheet.write_text(
+        "partner,date,type,title,quantity\n"
+        + "customer,2023-02-14,livraison,Book One,1\n" * 6
+        + "customer,2023-02-14,livraison,Book Three,2\n"
+        + "customer,2023-02-28,vente,Book One,1\n" * 4
+        # back to the delivery, already written by the first batch
+        + "customer,2023-02-14,livraison,Book One,1\n"
+        + "customer,2023-02-14,livraison,Book Two,3\n",
+        encoding="utf-8",
+    )
+    res = app.test_cli_runner().invoke(args=["import-sheets", str(sheet)])
+    assert res.exit_code == 0, res.output
+    assert "2 operation(s), 4 item(s)" in res.output and "0 already imported" in res.output
+
+    delivery, report = Operation.query.filter(Operation.customer_id == 3).order_by(Operation.date).all()
+    assert sorted((i.book_id, i.quantity) for i in delivery.items) == [(1, 7), (2, 3), (3, 2)]
+    assert (delivery.item_count, delivery.total_quantity, float(delivery.total_amount)) == (3, 12, 155.0)
+    assert [(i.book_id, i.quantity) for i in report.items] == [(1, -4)]
+    assert get_inventory(3) == {1: 3, 2: 3, 3: 2}
+
+
+def test_import_drops_later_checkpoints(app, tmp_path, add_ledger_op):
+    # Stock held before the imported history starts, checkpointed before and after it
+    add_ledger_op(3, "order", date(2023, 1, 10), [(1, 3)])
+    write_checkpoints(date(2023, 1, 31))
+    write_checkpoints(date(2023, 3, 31))
+    db.session.commit()
+
+    res = _run(app, tmp_path)
+    assert res.exit_code == 0, res.output
+    # Only the checkpoint before the earliest imported day (02-14) survives
+    assert {c.as_of_date for c in InventoryCheckpoint.query.filter_by(customer_id=3)} == {date(2023, 1, 31)}
+    as_of = {key: t.quantity for key, t in stock_as_of(date(2023, 4, 30), 3).items()}
+    assert as_of == ledger_stock(3) == {(3, 1): 8, (3, 2): 2}
@@ -0,0 +1,104 @@
+# tests/test_jobs.py
+import csv
+import io
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.models import Job, SalesDailyRollup
+from app.services import jobs
+
+
+def test_export_job_lifecycle(client, auth_headers):
+    admin = auth_headers["admin"]
+    assert client.post("/api/admin/jobs", json={"kind": "export_csv"}, headers=auth_headers["bob"]).status_code == 403
+
+    res = client.post("/api/admin/jobs", json={"kind": "export_csv", "params": {"customer_id": 1}}, headers=admin)
+    assert res.status_code == 202
+    job = res.get_json()
+    assert res.headers["Location"] == f"/api/admin/jobs/{job['id']}"
+    # Eager mode in tests: already finished
+    assert job["status"] == "done" and job["progress"] == 100 and job["result"] == {"rows": 2}
+
+    polled = client.get(job["download"].rsplit("/", 1)[0], headers=admin).get_json()
+    assert polled["status"] == "done" and "result_path" not in polled
+    res = client.get(job["download"], headers=admin)
+    assert res.status_code == 200
+    rows = list(csv.reader(io.StringIO(res.get_data(as_text=True))))
+    assert rows[0][0] == "ID opération" and len(rows) == 3
+
+    listed = client.get("/api/admin/jobs", headers=admin).get_json()["data"]
+    assert [j["id"] for j in listed] == [job["id"]]
+
+
+def test_job_failures_and_validation(client, auth_headers, monkeypatch):
+    admin = auth_headers["admin"]
+    res = client.post("/api/admin/jobs", json={"kind": "format_disk"}, headers=admin)
+    assert res.status_code == 400 and "kind" in res.get_json()["errors"]
+
+    res = client.post("/api/admin/jobs", json={"kind": "backfill_rollup", "params": {"from": "not-a-date"}}, headers=admin)
+    assert res.status_code == 400 and res.get_json()["errors"]["params"] == [{"from": ["Not a valid date."]}]
+    res = client.post("/api/admin/jobs", json={"kind": "forecast", "params": {"windows": 30}}, headers=admin)
+    assert res.status_code == 400 and "windows" in res.get_json()["errors"]["params"][0]
+    assert Job.query.count() == 0
+
+    monkeypatch.setitem(jobs.JOB_KINDS, "rebuild_stock", lambda job: 1 / 0)
+    job = client.post("/api/admin/jobs", json={"kind": "rebuild_stock"}, headers=admin).get_json()
+    assert job["status"] == "failed" and job["error"] == "division by zero"
+    assert client.get(f"/api/admin/jobs/{job['id']}/download", headers=admin).status_code == 409
+
+    SalesDailyRollup.query.delete()
+    job = client.post("/api/admin/jobs", json={"kind": "backfill_rollup"}, headers=admin).get_json()
+    assert job["status"] == "done" and job["result"]["rows"] == SalesDailyRollup.query.count() == 2
+
+
+def test_recover_requeues_stuck_jobs(app):
+    stale = datetime.utcnow() - timedelta(hours=1)
+    db.session.add_all([
+        Job(kind="rebuild_stock", status="running", attempts=1, started_at=stale, heartbeat_at=stale),
+        Job(kind="rebuild_stock", status="running", attempts=3, started_at=stale, heartbeat_at=stale),
+        Job(kind="rebuild_stock", status="running", attempts=1, heartbeat_at=datetime.utcnow()),  # still alive
+        Job(kind="forecast"),
+    ])
+    db.session.commit()
+
+    assert app.extensions["jobs"].recover() == [1, 4]
+    db.session.expire_all()
+    assert [(j.status, j.attempts) for j in Job.query.order_by(Job.id)] == [
+        ("done", 2), ("failed", 3), ("running", 1), ("done", 1),
+    ]
+
+
+def test_thread_pool_runs_jobs(app, tmp_path):
+    # A file database: pool threads use their own connections
+    pooled = create_app({
+        **app.config, "JOBS_EAGER": False, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'jobs.db'}",
+    })
+    runner = pooled.extensions["jobs"]
+    with pooled.app_context():
+        db.create_all()
+        job = Job(kind="rebuild_stock")
+        db.session.add(job)
+        db.session.commit()
+        runner.submit(job.id)
+        runner.executor.shutdown(wait=True)
+        db.session.expire_all()
+        assert db.session.get(Job, job.id).status == "done"
+
+
+def test_heartbeat_outlives_silent_handlers(app, tmp_path, monkeypatch):
+    # A file database: the heartbeat thread uses its own connection
+    beating = create_app({
+        **app.config, "JOBS_HEARTBEAT_EVERY": 0.05, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'jobs.db'}",
+    })
+    monkeypatch.setitem(jobs.JOB_KINDS, "rebuild_stock", lambda job: time.sleep(0.3) or {})
+    with beating.app_context():
+        db.create_all()
+        job = Job(kind="rebuild_stock")
+        db.session.add(job)
+        db.session.commit()
+        beating.extensions["jobs"].submit(job.id)
+        db.session.expire_all()
+        job = db.session.get(Job, job.id)
+        assert job.status == "done" and job.heartbeat_at > job.started_at + timedelta(seconds=0.1)
@@ -0,0 +1,54 @@
+# tests/test_json.py
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.utils.json_provider import FastJSONProvider, orjson
+
+PAYLOAD = {
+    "unit_price": Decimal("12.50"),
+    "date": date(2025, 1, 31),
+    "created_at": datetime(2025, 1, 31, 9, 30, 5, 120),
+    "stock": {3: 2, 1: 10},
+    "title": "Été",
+}
+EXPECTED = {
+    "unit_price": "12.50",
+    "date": "2025-01-31",
+    "created_at": "2025-01-31T09:30:05.000120",
+    "stock": {"1": 10, "3": 2},
+    "title": "Été",
+}
+
+
+@pytest.mark.parametrize("use_orjson", [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(orjson is None, reason="orjson not installed")),
+])
+def test_backends_encode_alike(app, use_orjson):
+    provider = FastJSONProvider(app, use_orjson=use_orjson)
+    body = provider.dumps(PAYLOAD)
+    assert provider.loads(body) == EXPECTED
+    assert body.index("created_at") < body.index("unit_price")  # keys sorted
+
+    with app.test_request_context():
+        res = provider.response(PAYLOAD)
+    assert res.mimetype == "application/json"
+    assert res.get_data().endswith(b"\n") and provider.loads(res.get_data()) == EXPECTED
+
+
+def test_json_backend_config():
+    from app import create_app
+    from flask.json.provider import DefaultJSONProvider
+
+    flask_default = create_app({"TESTING": True, "JSON_BACKEND": "flask"})
+    assert type(flask_default.json) is DefaultJSONProvider
+    assert isinstance(create_app({"TESTING": True, "JSON_BACKEND": "stdlib"}).json, FastJSONProvider)
+    with pytest.raises(RuntimeError):
+        create_app({"TESTING": True, "JSON_BACKEND": "yaml"})
+
+
+def test_api_prices_stay_strings(client):
+    book = client.get("/api/books").get_json()["data"][0]
+    assert book["unit_price"] == "10.00"
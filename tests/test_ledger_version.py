@@ -0,0 +1,58 @@
+# tests/test_ledger_version.py
+from app.models import User
+
+
+def _revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def test_history_etag_follows_ledger_version(client, auth_headers):
+    headers = auth_headers["customer"]
+    res = client.get("/api/operations", headers=headers)
+    etag = res.headers["ETag"]
+    assert _revalidate(client, "/api/operations", headers, etag).status_code == 304
+    # Query string is part of the ETag
+    assert _revalidate(client, "/api/operations?type=order", headers, etag).status_code == 200
+
+    version = User.query.filter_by(name="customer").first().ledger_version
+    res = client.post("/api/orders", json={"items": [{"book_id": 1, "quantity": 2}]}, headers=headers)
+    order_id = res.get_json()["id"]
+    assert User.query.filter_by(name="customer").first().ledger_version == version + 1
+
+    res = _revalidate(client, "/api/operations", headers, etag)
+    assert res.status_code == 200 and res.headers["ETag"] != etag
+    etag = res.headers["ETag"]
+
+    client.put(f"/api/admin/orders/{order_id}/confirm", headers=auth_headers["admin"])
+    assert _revalidate(client, "/api/operations", headers, etag).status_code == 200
+
+
+def test_inventory_and_stats_conditional_get(client, auth_headers):
+    bob = auth_headers["bob"]
+    res = client.get("/api/users/inventory", headers=bob)
+    etag = res.headers["ETag"]
+    assert _revalidate(client, "/api/users/inventory", bob, etag).status_code == 304
+
+    res = client.get("/api/users/1/stats", headers=bob)
+    stats_etag = res.headers["ETag"]
+    assert _revalidate(client, "/api/users/1/stats", bob, stats_etag).status_code == 304
+
+    # Another customer never short-circuits on Bob's ETag
+    res = _revalidate(client, "/api/users/1/stats", auth_headers["customer"], stats_etag)
+    assert res.status_code == 403
+
+    # Admin-wide inventory has no single ledger to key on
+    assert "ETag" not in client.get("/api/users/inventory", headers=auth_headers["admin"]).headers
+    assert client.get("/api/users/inventory?id=1", headers=auth_headers["admin"]).headers["ETag"]
+
+    client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 1}]}, headers=bob)
+    assert _revalidate(client, "/api/users/inventory", bob, etag).status_code == 200
+    assert _revalidate(client, "/api/users/1/stats", bob, stats_etag).status_code == 200
+
+
+def test_rename_invalidates_ledger_etags(client, auth_headers):
+    bob = auth_headers["bob"]
+    etag = client.get("/api/users/1/stats", headers=bob).headers["ETag"]
+    client.put("/api/users", json={"name": "robert"}, headers=bob)
+    res = _revalidate(client, "/api/users/1/stats", bob, etag)
+    assert res.status_code == 200 and res.get_json()["data"]["name"] == "robert"
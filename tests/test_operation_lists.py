@@ -0,0 +1,112 @@
+# tests/test_operation_lists.py
+from datetime import date
+
+
+def _grow(add_ledger_op, customer_id):
+    # More operations, more items per operation, more distinct books
+    def grow():
+        for day in range(1, 6):
+            add_ledger_op(customer_id, "order", date(2025, 1, day), [(1, 3), (2, 3), (3, 3)])
+            add_ledger_op(customer_id, "report", date(2025, 2, day), [(1, -1), (3, -1)])
+    return grow
+
+
+def _ok(client, url, headers):
+    def fetch():
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200
+        return res
+    return fetch
+
+
+def test_customer_lists_fixed_query_count(client, auth_headers, assert_constant_queries, add_ledger_op):
+    bob = auth_headers["bob"]
+    grow = _grow(add_ledger_op, 1)
+    for url in ("/api/operations", "/api/orders", "/api/sales"):
+        assert assert_constant_queries(_ok(client, url, bob), grow) <= 3
+
+
+def test_admin_board_fixed_query_count(client, auth_headers, assert_constant_queries, add_ledger_op):
+    def grow():
+        _grow(add_ledger_op, 1)()
+        _grow(add_ledger_op, 3)()
+    fetch = _ok(client, "/api/admin/operations", auth_headers["admin"])
+    # actionable + history, each with at most one extra query for their items
+    assert assert_constant_queries(fetch, grow) <= 4
+
+    res = fetch().get_json()
+    assert res["history"][0]["customer"]["name"] in ("bob", "customer")
+    assert {item["book"] for op in res["history"] for item in op["items"]} >= {"Book One", "Book Three"}
+
+
+def test_read_model_matches_operation_schema(client, auth_headers):
+    from app.models import Operation
+    from app.schemas import OperationSchema
+    from app.services.read_models import dump_operations, operation_rows
+
+    client.put("/api/users", json={"name": "bobby"}, headers=auth_headers["bob"])
+    client.post("/api/sales", json={"items": [{"book_id": 2, "quantity": 1}]}, headers=auth_headers["bob"])
+    ops = Operation.query.order_by(Operation.id).all()
+    rows = operation_rows(order_by=(Operation.id,))
+    # Operation.items has no order_by: compare items in book order
+    by_book = lambda ops: [{**op, "items": sorted(op["items"], key=lambda i: i["book_id"])} for op in ops]
+    assert by_book(dump_operations(rows)) == by_book(OperationSchema(many=True).dump(ops))
+
+
+def test_operation_totals_and_lists_without_items(client, auth_headers, assert_constant_queries, add_ledger_op):
+    bob = auth_headers["bob"]
+    res = client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 3}, {"book_id": 2, "quantity": 1}]}, headers=bob)
+    report = res.get_json()
+    assert (report["item_count"], report["total_quantity"], report["total_amount"]) == (2, -4, "-45.00")
+
+    # Seeded with ORM objects, without the schema: totals filled in on insert
+    seeded = client.get("/api/operations?type=order&items=false", headers=bob).get_json()["data"][0]
+    assert (seeded["item_count"], seeded["total_quantity"], seeded["total_amount"]) == (2, 12, "130.00")
+    assert "items" not in seeded
+
+    fetch = _ok(client, "/api/operations?items=0", bob)
+    assert assert_constant_queries(fetch, _grow(add_ledger_op, 1)) <= 2
+    fetch = _ok(client, "/api/admin/operations?items=false", auth_headers["admin"])
+    assert assert_constant_queries(fetch, _grow(add_ledger_op, 3)) <= 2
+    assert "items" in client.get("/api/orders", headers=bob).get_json()["data"][0]
+    assert "items" in client.get("/api/orders?items=maybe", headers=bob).get_json()["errors"]
+
+
+def _walk(client, url, headers, key="data"):
+    pages, cursor = [], None
+    while True:
+        sep = "&" if "?" in url else "?"
+        res = client.get(url + (f"{sep}cursor={cursor}" if cursor else ""), headers=headers)
+        assert res.status_code == 200
+        body = res.get_json()
+        pages.append([op["id"] for op in body[key]])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_keyset_pagination(client, auth_headers, add_ledger_op):
+    bob = auth_headers["bob"]
+    for day in range(1, 4):  # two operations per day: same created_at, ids break the tie
+        add_ledger_op(1, "order", date(2025, 1, day), [(1, 1)])
+        add_ledger_op(1, "report", date(2025, 1, day), [(1, -1)])
+
+    everything = client.get("/api/operations", headers=bob).get_json()
+    assert everything["next_cursor"] is None
+    pages = _walk(client, "/api/operations?limit=2", bob)
+    assert [len(p) for p in pages] == [2, 2, 2, 1]
+    assert sum(pages, []) == [op["id"] for op in everything["data"]]
+
+    reports = _walk(client, "/api/sales?limit=2", bob)
+    assert [len(p) for p in reports] == [2, 1]
+    assert len(sum(_walk(client, "/api/operations?type=order&limit=3", bob), [])) == 4
+
+    admin_pages = _walk(client, "/api/admin/operations?limit=5", auth_headers["admin"], key="history")
+    assert len(sum(admin_pages, [])) == 7
+
+
+def test_pagination_rejects_bad_arguments(client, auth_headers):
+    bob = auth_headers["bob"]
+    assert "cursor" in client.get("/api/operations?cursor=garbage", headers=bob).get_json()["errors"]
+    assert client.get("/api/orders?limit=0", headers=bob).status_code == 400
+    assert client.get("/api/sales?limit=100000", headers=bob).status_code == 400
@@ -179,3 +179,50 @@ def test_customer_must_report_before_new_order(client, auth_headers):
     data = res.get_json()
     assert "order" in data["errors"]
     assert "report" in data["errors"]["order"][0]
+
+
+def test_admin_bulk_transitions(client, auth_headers, count_queries):
+    from app.models import Operation, User
+    from app.services.operations import get_inventory
+
+    res = client.post("/api/orders", json={"items": [{"book_id": 3, "quantity": 4}]}, headers=auth_headers["customer"])
+    pending_id = res.get_json()["id"]
+    admin = auth_headers["admin"]
+    assert client.post("/api/admin/orders/bulk", json={"ids": [pending_id], "action": "approve"},
+                       headers=auth_headers["customer"]).status_code == 403
+
+    with count_queries() as counter:
+        res = client.post("/api/admin/orders/bulk", json={"ids": [pending_id, 1, 999], "action": "approve"}, headers=admin)
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["updated"] == 1
+    assert body["results"] == [
+        {"id": pending_id, "outcome": "approved"},
+        {"id": 1, "outcome": "invalid_status:delivered"},
+        {"id": 999, "outcome": "not_found"},
+    ]
+    # validation + UPDATE + ledger version + change log, whatever the number of ids
+    assert counter.count <= 5
+
+    version = User.query.get(3).ledger_version
+    res = client.post("/api/admin/orders/bulk", json={"ids": [pending_id], "action": "deliver"}, headers=admin)
+    assert res.get_json()["results"] == [{"id": pending_id, "outcome": "delivered"}]
+    assert get_inventory(3) == {3: 4}
+    assert User.query.get(3).ledger_version == version + 1
+
+    res = client.post("/api/admin/orders/bulk", json={"ids": [pending_id], "action": "cancel"}, headers=admin)
+    assert res.get_json()["results"][0]["outcome"] == "invalid_status:delivered"
+    res = client.post("/api/admin/orders/bulk", json={"ids": [], "action": "ship"}, headers=admin)
+    assert res.status_code == 400 and set(res.get_json()["errors"]) == {"ids", "action"}
+
+
+def test_admin_bulk_cancel_with_note(client, auth_headers):
+    from app.models import Operation
+
+    res = client.post("/api/orders", json={"items": [{"book_id": 1, "quantity": 1}]}, headers=auth_headers["customer"])
+    order_id = res.get_json()["id"]
+    res = client.post("/api/admin/orders/bulk", json={"ids": [order_id, order_id], "action": "cancel", "notes": "Salon annulé"},
+                      headers=auth_headers["admin"])
+    assert res.get_json()["results"] == [{"id": order_id, "outcome": "cancelled"}]
+    op = Operation.query.get(order_id)
+    assert (op.status, op.notes) == ("cancelled", "Salon annulé")
@@ -111,3 +111,26 @@ def test_admin_can_delete_sale_report(client, auth_headers):
     assert "errors" in data
     assert "operation" in data["errors"]
     assert "not found" in data["errors"]["operation"][0]
+
+def test_duplicate_lines_are_merged(client, auth_headers):
+    # 1 + 2 copies of Book Two, only 2 in stock
+    payload = {"items": [{"book_id": 2, "quantity": 1}, {"book_id": 1, "quantity": 1}, {"book_id": 2, "quantity": 2}]}
+    res = client.post('/api/sales', json=payload, headers=auth_headers["bob"])
+    assert res.status_code == 400
+    assert "Insufficient stock (2x Book Two)" in res.get_json()["errors"]["items"][0]
+
+    payload["items"][2]["quantity"] = 1
+    res = client.post('/api/sales', json=payload, headers=auth_headers["bob"])
+    assert res.status_code == 201
+    assert sorted((i["book_id"], i["quantity"]) for i in res.get_json()["items"]) == [(1, -1), (2, -2)]
+
+def test_report_validation_query_count(count_queries):
+    from app.schemas import SalesReportOperationSchema
+    payload = {"items": [{"book_id": b, "quantity": 1} for b in (1, 2, 3, 1, 2)]}
+    with count_queries() as counter:
+        try:
+            SalesReportOperationSchema(user_id=1).load(payload)
+        except Exception:
+            pass  # Book Three is not in Bob's inventory
+    # one IN query for the books, one for the stock rows
+    assert counter.count == 2
@@ -0,0 +1,106 @@
+# tests/test_stock.py
+import threading
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import Book, CustomerStock, User
+from app.services.ledger import apply_stock_deltas, ledger_stock, rebuild_customer_stock
+from app.services.operations import get_inventory
+
+
+def _deliver(client, auth_headers, items):
+    res = client.post("/api/orders", json={"items": items}, headers=auth_headers["customer"])
+    order_id = res.get_json()["id"]
+    client.put(f"/api/admin/orders/{order_id}/confirm", headers=auth_headers["admin"])  # approved
+    client.put(f"/api/admin/orders/{order_id}/confirm", headers=auth_headers["admin"])  # delivered
+    return order_id
+
+
+def test_stock_follows_workflow_transitions(client, auth_headers):
+    customer_id = client.get("/api/users/me", headers=auth_headers["customer"]).get_json()["id"]
+    order_id = _deliver(client, auth_headers, [{"book_id": 1, "quantity": 5}, {"book_id": 3, "quantity": 2}])
+    assert get_inventory(customer_id) == {1: 5, 3: 2}
+
+    res = client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 4}]}, headers=auth_headers["customer"])
+    report_id = res.get_json()["id"]
+    assert get_inventory(customer_id) == {1: 1, 3: 2}
+
+    client.delete(f"/api/admin/operations/{report_id}", headers=auth_headers["admin"])
+    assert get_inventory(customer_id) == {1: 5, 3: 2}
+
+    # Cancelling a delivered order takes the books back out of stock
+    client.delete(f"/api/admin/operations/{order_id}", headers=auth_headers["admin"])
+    assert get_inventory(customer_id) == {1: 0, 3: 0}
+    assert rebuild_customer_stock() == []
+
+
+def test_rebuild_reports_and_fixes_drift(app):
+    db.session.get(CustomerStock, (1, 1)).quantity = 3
+    db.session.add(CustomerStock(customer_id=3, book_id=2, quantity=7))
+    db.session.commit()
+
+    drift = rebuild_customer_stock()
+    db.session.commit()
+    assert drift == [(1, 1, 3, 10), (3, 2, 7, None)]
+    assert get_inventory(1) == {1: 10, 2: 2} == {b: q for (c, b), q in ledger_stock(1).items()}
+    assert get_inventory(3) == {}
+
+
+def test_rebuild_stock_command_dry_run(app):
+    db.session.get(CustomerStock, (1, 2)).quantity = 0
+    db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["rebuild-stock", "--dry-run"])
+    assert "stored=0 ledger=2" in result.output
+    assert db.session.get(CustomerStock, (1, 2)).quantity == 0
+
+    result = runner.invoke(args=["rebuild-stock"])
+    assert result.exit_code == 0
+    db.session.expire_all()
+    assert db.session.get(CustomerStock, (1, 2)).quantity == 2
+
+
+def test_concurrent_first_writes_add_up(app, tmp_path):
+    # A file database: every thread works on its own connection
+    shared = create_app({**app.config, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'race.db'}"})
+    with shared.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(id=1, name="bob", email="bob@test.com", role="customer", password_hash="x"),
+            Book(id=1, title="Book One", unit_price=10),
+        ])
+        db.session.commit()
+
+    count = 8
+    barrier = threading.Barrier(count)
+    failed = []
+
+    def hold_inserts(conn, cursor, statement, *args):
+        # Every thread has done its reads, if any, before one of them writes
+        if statement.startswith("INSERT INTO customer_stock"):
+            barrier.wait(timeout=5)
+
+    with shared.app_context():
+        event.listen(db.engine, "before_cursor_execute", hold_inserts)
+
+    def deliver(i):
+        with shared.app_context():
+            try:
+                apply_stock_deltas({(1, 1): i + 1})  # every thread creates the row
+                db.session.commit()
+            except Exception as exc:
+                failed.append(exc)
+
+    threads = [threading.Thread(target=deliver, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert failed == []
+    with shared.app_context():
+        assert db.session.get(CustomerStock, (1, 1)).quantity == sum(range(1, count + 1))
+        db.drop_all()
@@ -0,0 +1,58 @@
+# tests/test_synthetic.py
+from collections import defaultdict
+from datetime import date
+
+from app.extensions import db
+from app.models import CustomerStock, Operation, OperationItem
+from app.services.synthetic import generate
+
+
+def _ledger():
+    return [
+        (op.customer_id, op.type, op.status, op.created_at, sorted((i.book_id, i.quantity) for i in op.items))
+        for op in Operation.query.filter(Operation.customer_id > 3).order_by(Operation.customer_id, Operation.created_at)
+    ]
+
+
+def test_synthetic_workflow_is_valid():
+    counts = generate(partners=4, titles=12, series=2, years=1, orders_per_month=2, seed=7, end=date(2025, 6, 30))
+    assert counts["partners"] == 4 and counts["books"] == 12
+    assert counts["items"] == OperationItem.query.count() - 2  # the fixture's order has 2 lines
+
+    by_customer = defaultdict(list)
+    for row in _ledger():
+        by_customer[row[0]].append(row)
+    for customer_id, ops in by_customer.items():
+        stock = defaultdict(int)
+        last_delivery_reported = True
+        for _, op_type, status, _, items in ops[:-1]:
+            if op_type == "order":
+                assert status in ("delivered", "cancelled")
+                if status == "delivered":
+                    assert last_delivery_reported, "order placed before reporting the previous delivery"
+                    last_delivery_reported = False
+                    for book_id, qty in items:
+                        stock[book_id] += qty
+            else:
+                last_delivery_reported = True
+                for book_id, qty in items:
+                    stock[book_id] += qty
+                    assert stock[book_id] >= 0, "oversold"
+        assert ops[-1][1:3] in (("order", "pending"), ("order", "approved"))
+
+        stored = {s.book_id: s.quantity for s in CustomerStock.query.filter_by(customer_id=customer_id)}
+        assert stored == dict(stock)
+
+
+def test_synthetic_is_deterministic(app):
+    generate(partners=3, titles=8, years=0.5, seed=3, end=date(2025, 6, 30))
+    first = _ledger()
+    db.session.rollback()
+    generate(partners=3, titles=8, years=0.5, seed=3, end=date(2025, 6, 30))
+    assert _ledger() == first
+
+
+def test_seed_synthetic_command(app):
+    res = app.test_cli_runner().invoke(args=["seed", "--synthetic", "--partners", "2", "--titles", "5", "--years", "0.25"])
+    assert res.exit_code == 0, res.output
+    assert "Synthetic dataset: 2 partner(s), 5 book(s)" in res.output
@@ -0,0 +1,112 @@
+# tests/test_transitions.py
+import threading
+
+from app import create_app
+from app.extensions import db
+from app.models import Book, ChangeLog, Operation, OperationItem, User
+from app.services.operations import get_inventory
+from app.services.transitions import apply_transition, transition
+
+
+def _order(customer_id, status, quantity=3):
+    op = Operation(customer_id=customer_id, type="order", status=status)
+    op.items.append(OperationItem(book_id=1, quantity=quantity))
+    db.session.add(op)
+    db.session.commit()
+    return op.id
+
+
+def test_transition_outcomes(app):
+    order_id = _order(3, "pending")
+    assert transition(order_id, "deliver").action is None  # not approved yet
+    done = transition(order_id, "approve", "deliver")
+    assert (done.action, done.status, done.customer_id) == ("approve", "approved", 3)
+
+    # Someone else's order looks missing when a customer is given
+    assert transition(order_id, "withdraw", customer_id=1) == (None, None, None, None, None)
+    assert transition(order_id, "withdraw", customer_id=3) == (None, order_id, "order", "approved", 3)
+    assert transition(999, "approve").id is None
+    db.session.commit()
+
+
+def test_confirm_with_expected_status(client, auth_headers):
+    admin = auth_headers["admin"]
+    order_id = _order(3, "pending")
+    res = client.put(f"/api/admin/orders/{order_id}/confirm", json={"expected_status": "pending"}, headers=admin)
+    assert res.get_json()["msg"] == "Order approved"
+    # A second admin who also saw it pending doesn't deliver it by accident
+    res = client.put(f"/api/admin/orders/{order_id}/confirm", json={"expected_status": "pending"}, headers=admin)
+    assert res.status_code == 409 and "approved" in res.get_json()["errors"]["order"][0]
+    assert db.session.get(Operation, order_id).status == "approved"
+    res = client.put(f"/api/admin/orders/{order_id}/confirm", json={"expected_status": "shipped"}, headers=admin)
+    assert res.status_code == 400 and "expected_status" in res.get_json()["errors"]
+    # Without it, one step from the current status
+    res = client.put(f"/api/admin/orders/{order_id}/confirm", headers=admin)
+    assert res.get_json()["msg"] == "Order delivered"
+    res = client.put(f"/api/admin/orders/{order_id}/confirm", headers=admin)
+    assert res.status_code == 404
+    assert db.session.get(Operation, order_id).status == "delivered"
+
+    res = client.delete(f"/api/admin/operations/{order_id}", json={"notes": "Stock épuisé"}, headers=admin)
+    assert res.status_code == 200 and res.get_json()["status"] == "cancelled"
+    res = client.delete(f"/api/admin/operations/{order_id}", headers=admin)
+    assert res.status_code == 409
+
+
+def test_revoke_takes_delivery_out_of_stock(client, auth_headers):
+    before = get_inventory(1)
+    version = db.session.get(User, 1).ledger_version
+    start = ChangeLog.query.count()
+    res = client.delete("/api/admin/operations/1", headers=auth_headers["admin"])
+    assert res.status_code == 200
+    assert get_inventory(1) == {book: 0 for book in before}
+    assert db.session.get(User, 1).ledger_version == version + 1
+    assert [c.data for c in ChangeLog.query.order_by(ChangeLog.seq).offset(start)] == [{"id": 1, "status": "cancelled"}]
+
+
+def _race(app, count, attempt):
+    """Run ``attempt(i)`` in ``count`` threads at once, each in its own app context."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(i):
+        with app.app_context():
+            barrier.wait()
+            results[i] = attempt(i)
+            db.session.commit()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_transitions_apply_once(app, tmp_path):
+    # A file database: every thread works on its own connection
+    shared = create_app({**app.config, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'race.db'}"})
+    with shared.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(id=1, name="bob", email="bob@test.com", role="customer", password_hash="x"),
+            Book(id=1, title="Book One", unit_price=10),
+        ])
+        db.session.commit()
+        approved = [_order(1, "approved", quantity=2) for _ in range(3)]
+        pending = _order(1, "pending")
+        version = db.session.get(User, 1).ledger_version
+
+    # Eight workers deliver the same three orders: each is delivered, and counted, exactly once
+    results = _race(shared, 8, lambda i: apply_transition("deliver", approved))
+    assert sorted(id for moved in results for id, _ in moved) == approved
+    winners = len([moved for moved in results if moved])
+    # Customer withdrawal against admin approval: exactly one of them wins
+    results = _race(shared, 6, lambda i: transition(pending, "withdraw" if i % 2 else "approve").action)
+    assert len([r for r in results if r]) == 1
+
+    with shared.app_context():
+        assert get_inventory(1) == {1: 6}
+        assert db.session.get(User, 1).ledger_version == version + winners + 1
+        assert db.session.get(Operation, pending).status in ("approved", "cancelled")
+        db.drop_all()
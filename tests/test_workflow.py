@@ -0,0 +1,127 @@
+# tests/test_workflow.py
+import threading
+
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models import Book, CustomerWorkflow, Operation, OperationItem, User
+from app.services.workflow import REPORT_REQUIRED, admit_order, rebuild_customer_workflow
+
+
+def _state(customer_id):
+    row = db.session.get(CustomerWorkflow, customer_id)
+    db.session.refresh(row)
+    return row.last_order_id, row.last_order_status, row.reported_since
+
+
+def test_workflow_follows_the_order_cycle(client, auth_headers):
+    admin, bob = auth_headers["admin"], auth_headers["bob"]
+    assert _state(1) == (1, "delivered", False)  # the seeded delivery
+    res = client.post("/api/orders", json={"items": [{"book_id": 1, "quantity": 1}]}, headers=bob)
+    assert res.status_code == 403 and res.get_json()["errors"]["order"] == ["order_report_required"]
+
+    client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 1}]}, headers=bob)
+    assert _state(1) == (1, "delivered", True)
+    order_id = client.post("/api/orders", json={"items": [{"book_id": 1, "quantity": 1}]}, headers=bob).get_json()["id"]
+    assert _state(1) == (order_id, "pending", False)
+
+    client.put(f"/api/admin/orders/{order_id}/confirm", headers=admin)
+    assert _state(1) == (order_id, "approved", False)
+    # Cancelling the last order brings the previous one back, with the report filed since
+    client.delete(f"/api/admin/operations/{order_id}", headers=admin)
+    assert _state(1) == (1, "delivered", True)
+
+    incremental = _state(1)
+    rebuild_customer_workflow()
+    assert _state(1) == incremental and _state(3) == (None, None, False)
+
+
+def test_missing_row_is_derived_on_admission(app):
+    db.session.delete(db.session.get(CustomerWorkflow, 1))
+    db.session.commit()
+    op = Operation(customer_id=1, type="order", status="pending", items=[OperationItem(book_id=1, quantity=1)])
+    assert admit_order(op) == REPORT_REQUIRED
+    assert _state(1) == (1, "delivered", False)
+
+
+def test_concurrent_orders_admit_one(app, tmp_path):
+    # A file database: every thread works on its own connection
+    shared = create_app({**app.config, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'race.db'}"})
+    with shared.app_context():
+        db.create_all()
+        db.session.add_all([
+            User(id=1, name="bob", email="bob@test.com", role="customer", password_hash="x"),
+            Book(id=1, title="Book One", unit_price=10),
+        ])
+        db.session.commit()
+
+    count = 8
+    barrier = threading.Barrier(count)
+    refused = [None] * count
+
+    def place_order(i):
+        with shared.app_context():
+            op = Operation(customer_id=1, type="order", status="pending", items=[OperationItem(book_id=1, quantity=i + 1)])
+            barrier.wait()
+            refused[i] = admit_order(op)
+            db.session.commit()
+
+    threads = [threading.Thread(target=place_order, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert refused.count(None) == 1 and set(refused) == {None, "pending"}
+    with shared.app_context():
+        orders = db.session.scalars(db.select(Operation.id).where(Operation.type == "order")).all()
+        assert len(orders) == 1 and _state(1) == (orders[0], "pending", False)
+        db.drop_all()
+
+
+def test_admission_endpoint(client, auth_headers):
+    bob = auth_headers["bob"]
+    res = client.get("/api/orders/admission", headers=bob)
+    assert res.get_json()["data"] == {"refused": "report_required", "last_order_status": "delivered", "reported_since": False}
+    client.post("/api/sales", json={"items": [{"book_id": 1, "quantity": 1}]}, headers=bob)
+    assert client.get("/api/orders/admission", headers=bob).get_json()["data"]["refused"] is None
+    client.post("/api/orders", json={"items": [{"book_id": 1, "quantity": 1}]}, headers=bob)
+    assert client.get("/api/orders/admission", headers=bob).get_json()["data"]["refused"] == "pending"
+
+    # Same answer without a workflow row
+    db.session.delete(db.session.get(CustomerWorkflow, 1))
+    db.session.commit()
+    assert client.get("/api/orders/admission", headers=bob).get_json()["data"] == {
+        "refused": "pending", "last_order_status": "pending", "reported_since": False,
+    }
+    assert client.get("/api/orders/admission", headers=auth_headers["admin"]).status_code == 403
+
+
+def test_row_created_meanwhile_is_kept(app, tmp_path):
+    # A file database: the concurrent writer below uses its own connection
+    shared = create_app({**app.config, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'race.db'}"})
+    with shared.app_context():
+        db.create_all()
+        db.session.add(User(id=1, name="bob", email="bob@test.com", role="customer", password_hash="x"))
+        db.session.commit()
+        CustomerWorkflow.query.delete()  # as if bob was created outside the ORM
+        db.session.commit()
+
+        raced = []
+
+        def create_row_first(conn, cursor, statement, *args):
+            # Another transaction admits bob's first order between our read and our insert
+            if statement.startswith("INSERT INTO customer_workflow") and not raced:
+                raced.append(statement)
+                with db.engine.begin() as other:
+                    other.execute(CustomerWorkflow.__table__.insert().values(
+                        customer_id=1, last_order_id=7, last_order_status="pending", reported_since=False,
+                    ))
+
+        event.listen(db.engine, "before_cursor_execute", create_row_first)
+        rebuild_customer_workflow([1])
+        db.session.commit()
+        event.remove(db.engine, "before_cursor_execute", create_row_first)
+        assert _state(1) == (7, "pending", False)
+        db.drop_all()